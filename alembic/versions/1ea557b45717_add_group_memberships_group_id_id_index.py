@@ -0,0 +1,34 @@
+"""add group_memberships group_id id index
+
+Revision ID: 1ea557b45717
+Revises: f3f59bfcdecd
+Create Date: 2026-10-16 22:45:46.848876
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1ea557b45717"
+down_revision: Union[str, Sequence[str], None] = "f3f59bfcdecd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination of a group's members orders by id within group_id
+    op.create_index(
+        "ix_group_memberships_group_id_id",
+        "group_memberships",
+        ["group_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_group_memberships_group_id_id", table_name="group_memberships")
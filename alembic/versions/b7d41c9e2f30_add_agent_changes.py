@@ -0,0 +1,51 @@
+"""add agent_changes
+
+Revision ID: b7d41c9e2f30
+Revises: 1ea557b45717
+Create Date: 2026-10-17 10:04:12.385120
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d41c9e2f30"
+down_revision: Union[str, Sequence[str], None] = "1ea557b45717"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "agent_changes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entra_object_id", sa.String(length=36), nullable=True),
+        sa.Column("agent_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(
+        "ix_agent_changes_entra_object_id_id",
+        "agent_changes",
+        ["entra_object_id", "id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_agent_changes_created_at"),
+        "agent_changes",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_agent_changes_created_at"), table_name="agent_changes")
+    op.drop_index("ix_agent_changes_entra_object_id_id", table_name="agent_changes")
+    op.drop_table("agent_changes")
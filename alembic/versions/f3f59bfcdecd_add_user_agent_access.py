@@ -0,0 +1,70 @@
+"""add user_agent_access
+
+Revision ID: f3f59bfcdecd
+Revises: 8505bf970827
+Create Date: 2026-10-16 09:12:41.518203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3f59bfcdecd"
+down_revision: Union[str, Sequence[str], None] = "8505bf970827"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The grouprole type already exists on PostgreSQL (group_memberships.role)
+grouprole = sa.Enum("ADMIN", "USER", name="grouprole").with_variant(
+    postgresql.ENUM("ADMIN", "USER", name="grouprole", create_type=False),
+    "postgresql",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_agent_access",
+        sa.Column("entra_object_id", sa.String(length=36), nullable=False),
+        sa.Column("agent_id", sa.Integer(), nullable=False),
+        sa.Column("best_role", grouprole, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["agent_id"],
+            ["agents.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["entra_object_id"],
+            ["users.entra_object_id"],
+        ),
+        sa.PrimaryKeyConstraint("entra_object_id", "agent_id"),
+    )
+    op.create_index(
+        op.f("ix_user_agent_access_agent_id"),
+        "user_agent_access",
+        ["agent_id"],
+        unique=False,
+    )
+
+    # Backfill from the live join. MIN picks ADMIN over USER: roles are
+    # stored by name, and ADMIN sorts first both as text and in the
+    # grouprole enum's declaration order.
+    op.execute(
+        """
+        INSERT INTO user_agent_access (entra_object_id, agent_id, best_role)
+        SELECT gm.entra_object_id, ga.agent_id, MIN(gm.role)
+        FROM group_memberships gm
+        JOIN group_agents ga ON ga.group_id = gm.group_id
+        GROUP BY gm.entra_object_id, ga.agent_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_user_agent_access_agent_id"), table_name="user_agent_access")
+    op.drop_table("user_agent_access")
@@ -0,0 +1,81 @@
+"""
+Builds an in-process copy of the API (production middleware stack, routers
+and services) over an in-memory SQLite database for benchmarks.
+"""
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import benchmarks._tokens  # noqa: F401 — sets placeholder Azure AD settings
+import src.domain.models.entities  # noqa: F401
+from src.base.config.database import Base
+from src.base.config.redis_cache import RedisCache
+from src.base.middleware.correlation_middleware import CorrelationMiddleware
+from src.base.middleware.global_exception_handler_middleware import (
+    GlobalExceptionHandlerMiddleware,
+)
+from src.base.middleware.jwt_middleware import JWTMiddleware
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User
+from src.domain.routes.agent_routes import router as agent_router
+from src.domain.routes.permission_routes import router as permission_router
+from src.domain.services.agent_service import AgentService
+from src.domain.services.permission_service import PermissionService
+from src.domain.services.user_agent_access_service import UserAgentAccessService
+from src.domain.services.user_service import UserService
+
+BENCH_USER_ID = "bench-user"
+
+
+async def build_app(
+    cache: RedisCache | None = None,
+    *,
+    database_url: str = "sqlite+aiosqlite://",
+    user_service: UserService | None = None,
+) -> tuple[FastAPI, dict]:
+    """Return (app, ids) with a seeded database: one user, group and agent."""
+    engine = create_async_engine(
+        database_url, connect_args={"check_same_thread": False}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        session.add(
+            User(entra_object_id=BENCH_USER_ID, display_name="Bench", email="b@x")
+        )
+        group = Group(name="Bench group")
+        agent = Agent(agent_external_id="bench-agent", name="Bench", created_by="x")
+        session.add_all([group, agent])
+        await session.flush()
+        session.add_all(
+            [
+                GroupMembership(
+                    entra_object_id=BENCH_USER_ID,
+                    group_id=group.id,
+                    role=GroupRole.USER,
+                ),
+                GroupAgent(group_id=group.id, agent_id=agent.id, added_by="x"),
+            ]
+        )
+        await session.commit()
+        await UserAgentAccessService().backfill(session)
+        ids = {"group_id": group.id, "agent_id": agent.id}
+
+    app = FastAPI()
+    app.state.db_engine = engine
+    app.state.db_session_factory = session_factory
+    app.state.agent_service = AgentService()
+    app.state.permission_service = PermissionService(cache or RedisCache())
+    app.state.user_service = user_service or UserService()
+    app.add_middleware(JWTMiddleware)
+    app.add_middleware(CorrelationMiddleware)
+    app.add_middleware(GlobalExceptionHandlerMiddleware)
+    app.include_router(agent_router, prefix="/api")
+    app.include_router(permission_router, prefix="/api")
+    return app, ids
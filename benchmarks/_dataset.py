@@ -0,0 +1,109 @@
+"""
+A large file-backed SQLite dataset for query benchmarks: 100k users, 10k
+groups and 50k agents, each user in 3 groups and each agent in 2. Rows are
+written with Core bulk inserts, so user_agent_access is backfilled after.
+"""
+
+import random
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import src.domain.models.entities  # noqa: F401
+from src.base.config.database import Base
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User
+from src.domain.services.user_agent_access_service import UserAgentAccessService
+
+USERS = 100_000
+GROUPS = 10_000
+AGENTS = 50_000
+GROUPS_PER_USER = 3
+GROUPS_PER_AGENT = 2
+CHUNK = 20_000
+
+
+async def _insert(session: AsyncSession, table, rows: list[dict]) -> None:
+    for start in range(0, len(rows), CHUNK):
+        await session.execute(insert(table), rows[start : start + CHUNK])
+
+
+async def _seed(session: AsyncSession) -> None:
+    rng = random.Random(0)
+    await _insert(
+        session,
+        User,
+        [
+            {"entra_object_id": f"u{i}", "display_name": f"U{i}", "email": "x"}
+            for i in range(USERS)
+        ],
+    )
+    await _insert(session, Group, [{"name": f"Group {i}"} for i in range(GROUPS)])
+    await _insert(
+        session,
+        Agent,
+        [
+            {"agent_external_id": f"a{i}", "name": f"Agent {i}", "created_by": "x"}
+            for i in range(AGENTS)
+        ],
+    )
+    await _insert(
+        session,
+        GroupMembership,
+        [
+            {
+                "entra_object_id": f"u{i}",
+                "group_id": group_id,
+                "role": rng.choice([GroupRole.USER, GroupRole.ADMIN]),
+            }
+            for i in range(USERS)
+            for group_id in rng.sample(range(1, GROUPS + 1), GROUPS_PER_USER)
+        ],
+    )
+    await _insert(
+        session,
+        GroupAgent,
+        [
+            {"group_id": group_id, "agent_id": i, "added_by": "x"}
+            for i in range(1, AGENTS + 1)
+            for group_id in rng.sample(range(1, GROUPS + 1), GROUPS_PER_AGENT)
+        ],
+    )
+    await session.commit()
+    await UserAgentAccessService().backfill(session)
+
+
+@asynccontextmanager
+async def large_dataset(
+    database_url: str | None = None,
+) -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    """Yield a session factory over a freshly seeded database.
+
+    Defaults to a temporary SQLite file. A `database_url` must point at an
+    empty database; its tables are dropped afterwards.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        print(f"Seeding {USERS} users, {GROUPS} groups, {AGENTS} agents...")
+        async with session_factory() as session:
+            await _seed(session)
+        try:
+            yield session_factory
+        finally:
+            if database_url:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
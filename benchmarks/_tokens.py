@@ -0,0 +1,82 @@
+"""
+Helpers for minting RS256 test tokens and a matching JWKS in benchmarks.
+
+Importing this module sets placeholder Azure AD settings so that
+src.base.auth.auth_core can be imported without a real tenant.
+"""
+
+import json
+import os
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault("AZURE_TENANT_ID", "bench-tenant")
+os.environ.setdefault("AZURE_CLIENT_ID", "bench-client")
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from jose import jwk, jwt  # noqa: E402
+
+from src.base.auth import auth_core  # noqa: E402
+from src.base.auth.jwks_provider import JWKSProvider  # noqa: E402
+
+
+class SigningKey:
+    """An RSA key pair with its public JWK, used to sign benchmark tokens."""
+
+    def __init__(self, kid: str | None = None):
+        self.kid = kid or uuid.uuid4().hex
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        # Parse once; jose would otherwise rebuild the key for every token
+        self._private_key = jwk.construct(private_pem, "RS256")
+        public_pem = (
+            private_key.public_key()
+            .public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+            .decode()
+        )
+        self.public_jwk = {
+            **jwk.construct(public_pem, "RS256").to_dict(),
+            "kid": self.kid,
+            "use": "sig",
+        }
+
+    def mint(self, subject: str = "bench-user", lifetime: int = 3600) -> str:
+        """Return a signed token accepted by auth_core.validate_jwt_token."""
+        now = int(time.time())
+        claims = {
+            "aud": auth_core.CLIENT_ID,
+            "iss": auth_core.ISSUER,
+            "iat": now,
+            "nbf": now,
+            "exp": now + lifetime,
+            "oid": subject,
+            "name": subject,
+            "roles": [],
+            "scp": "access",
+        }
+        return jwt.encode(
+            claims, self._private_key, algorithm="RS256", headers={"kid": self.kid}
+        )
+
+
+def make_jwks(*keys: SigningKey) -> dict:
+    return {"keys": [k.public_jwk for k in keys]}
+
+
+async def install_local_jwks(*keys: SigningKey) -> JWKSProvider:
+    """Point auth_core at a JWKS file containing the given keys."""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as jwks_file:
+        json.dump(make_jwks(*keys), jwks_file)
+    provider = JWKSProvider(jwks_file.name)
+    await provider.refresh()
+    auth_core.jwks_provider = provider
+    return provider
@@ -0,0 +1,108 @@
+"""
+Permission-check cache misses resolved through the group_memberships ⋈
+group_agents join vs. the materialized user_agent_access table, at 100k
+users / 10k groups / 50k agents (file-backed SQLite, Redis disabled so
+every check is a miss).
+
+Also reports what the table costs: the per-write refresh of one user's or
+one agent's rows, a full backfill and a verify pass.
+
+Run with:
+    uv run python -m benchmarks.bench_access_table
+"""
+
+import asyncio
+import random
+import time
+
+import benchmarks._tokens  # noqa: F401 — sets placeholder Azure AD settings
+from benchmarks._dataset import AGENTS, USERS, large_dataset
+from src.base.config.redis_cache import RedisCache
+from src.domain.models.permission_schemas import PermissionAction
+from src.domain.services import permission_service
+from src.domain.services.permission_service import PermissionService
+from src.domain.services.user_agent_access_service import UserAgentAccessService
+
+CHECKS = 2000
+BATCHES = 100
+BATCH_SIZE = 50
+REFRESHES = 500
+
+
+async def _time_us(fn, calls: list) -> float:
+    start = time.perf_counter()
+    for args in calls:
+        await fn(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+async def main() -> None:
+    rng = random.Random(1)
+    service = PermissionService(cache=RedisCache())
+    access = UserAgentAccessService()
+
+    def pair() -> tuple[str, int]:
+        return f"u{rng.randrange(USERS)}", rng.randrange(1, AGENTS + 1)
+
+    checks = [pair() for _ in range(CHECKS)]
+    batches = [
+        [(*pair(), PermissionAction.ACCESS) for _ in range(BATCH_SIZE)]
+        for _ in range(BATCHES)
+    ]
+
+    async with large_dataset() as session_factory:
+        async with session_factory() as session:
+
+            async def check(user_id, agent_id):
+                await service.check_permission(
+                    session, user_id, agent_id, PermissionAction.ACCESS
+                )
+
+            async def batch(checks):
+                await service.check_permissions_batch(session, checks)
+
+            results = []
+            for label, use_table in (("join", False), ("table", True)):
+                permission_service.PERMISSION_ACCESS_TABLE = use_table
+                results.append(
+                    (
+                        label,
+                        await _time_us(check, checks),
+                        await _time_us(batch, [(b,) for b in batches]),
+                    )
+                )
+
+            async def refresh_user(user_id):
+                await access.refresh_users(session, [user_id])
+
+            async def refresh_agent(agent_id):
+                await access.refresh_agents(session, [agent_id])
+
+            refresh_user_us = await _time_us(
+                refresh_user, [(f"u{rng.randrange(USERS)}",) for _ in range(REFRESHES)]
+            )
+            refresh_agent_us = await _time_us(
+                refresh_agent,
+                [(rng.randrange(1, AGENTS + 1),) for _ in range(REFRESHES)],
+            )
+            await session.rollback()
+
+            start = time.perf_counter()
+            rows = await access.backfill(session)
+            backfill_s = time.perf_counter() - start
+            start = time.perf_counter()
+            differences = await access.diff(session)
+            verify_s = time.perf_counter() - start
+
+    print(f"{'':<8}{'check µs':>12}{f'batch of {BATCH_SIZE} µs':>18}")
+    for label, check_us, batch_us in results:
+        print(f"{label:<8}{check_us:>12.1f}{batch_us:>18.1f}")
+    print(
+        f"refresh per write: user {refresh_user_us:.0f} µs, agent {refresh_agent_us:.0f} µs"
+    )
+    print(f"backfill: {backfill_s:.2f} s for {rows} rows")
+    print(f"verify: {verify_s:.2f} s, {len(differences)} differences")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""
+GET /api/admin/agents as one JSON document vs. an NDJSON stream, at 100k
+agents in 10 groups each (1M group_agents rows).
+
+Reports, per mode, the peak Python heap while serving the request, the time
+to the first body byte and the total time. The app is driven over raw ASGI
+with a sink that only counts body bytes, so the client holds nothing.
+Peaks are measured with tracemalloc, which also slows both modes down.
+
+Run with:
+    uv run python -m benchmarks.bench_admin_export
+"""
+
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import src.domain.models.entities  # noqa: F401
+from src.base.config.database import Base
+from src.base.models.user import User
+from src.domain.auth.authorization import require_superadmin
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.routes.admin_routes import router
+from src.domain.services.admin_service import AdminService
+
+AGENTS = 100_000
+GROUPS = 1_000
+GROUPS_PER_AGENT = 10
+CHUNK = 50_000
+
+SUPERADMIN = User(id="sa", email="sa@x", name="Super Admin", is_superadmin=True)
+
+
+async def _seed(session_factory) -> None:
+    async with session_factory() as session:
+        await session.execute(
+            insert(Group), [{"name": f"Group {i}"} for i in range(GROUPS)]
+        )
+        await session.execute(
+            insert(Agent),
+            [
+                {"agent_external_id": f"a{i}", "name": f"Agent {i}", "created_by": "x"}
+                for i in range(AGENTS)
+            ],
+        )
+        rows = [
+            {"group_id": (i * 7 + k) % GROUPS + 1, "agent_id": i + 1, "added_by": "x"}
+            for i in range(AGENTS)
+            for k in range(GROUPS_PER_AGENT)
+        ]
+        for start in range(0, len(rows), CHUNK):
+            await session.execute(insert(GroupAgent), rows[start : start + CHUNK])
+        await session.commit()
+
+
+def _build_app(session_factory) -> FastAPI:
+    app = FastAPI()
+    app.state.db_session_factory = session_factory
+    app.state.admin_service = AdminService()
+
+    app.dependency_overrides[require_superadmin] = lambda: SUPERADMIN
+    app.include_router(router, prefix="/api")
+    return app
+
+
+async def _get(app: FastAPI, path: str, accept: str) -> tuple[int, float]:
+    """Serve one GET; return (body bytes, seconds to the first body byte)."""
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept", accept.encode())],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    requested = False
+    done = asyncio.Event()
+
+    async def receive():
+        # The request, then nothing until the response is complete (a
+        # streaming response listens for a disconnect meanwhile)
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte, size
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(message["body"])
+
+    await app(scope, receive, send)
+    done.set()
+    return size, first_byte
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        print(
+            f"Seeding {AGENTS} agents x {GROUPS_PER_AGENT} groups "
+            f"({AGENTS * GROUPS_PER_AGENT} group_agents rows)..."
+        )
+        await _seed(session_factory)
+        app = _build_app(session_factory)
+
+        results = []
+        for label, accept in [
+            ("json", "application/json"),
+            ("ndjson", "application/x-ndjson"),
+        ]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            size, first_byte = await _get(app, "/api/admin/agents", accept)
+            total = time.perf_counter() - start
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+            results.append((label, peak_mb, first_byte, total, size / 2**20))
+        await engine.dispose()
+
+    print(f"{'':<8}{'peak MiB':>10}{'first byte s':>14}{'total s':>10}{'body MiB':>10}")
+    for label, peak_mb, first_byte, total, body_mb in results:
+        print(
+            f"{label:<8}{peak_mb:>10.1f}{first_byte:>14.2f}{total:>10.2f}{body_mb:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
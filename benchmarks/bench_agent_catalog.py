@@ -0,0 +1,148 @@
+"""
+The superadmin agent catalog at 100k users / 10k groups / 50k agents:
+one cache entry per superadmin, reloaded whole after every change (as
+before), vs. the shared catalog hash patched per changed agent.
+
+Each round assigns one agent to a group, then every superadmin reads their
+catalog and GET /api/admin/agents lists it once. Reports ms per round for
+the assignment's cache invalidation and for the reads, and the bytes of
+catalog data held in Redis.
+
+Needs a Redis that runs Lua scripts; point REDIS_URL at a scratch instance.
+
+Run with:
+    REDIS_URL=redis://localhost:6379/15 uv run python -m benchmarks.bench_agent_catalog
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from redis.asyncio import Redis
+
+from benchmarks._dataset import AGENTS, GROUPS, large_dataset
+from src.base.config.redis_cache import RedisCache
+from src.domain.services.admin_service import AdminService
+from src.domain.services.agent_service import AgentService
+from src.domain.services.cache_codec import render_user_agents
+from src.domain.services.permission_service import (
+    AGENT_CATALOG_GEN_KEY,
+    AGENT_CATALOG_KEY,
+    USER_AGENTS_HARD_TTL_SECONDS,
+    USER_AGENTS_SOFT_TTL_SECONDS,
+    PermissionService,
+)
+
+SUPERADMINS = 5
+ROUNDS = 3
+
+
+class _PerSuperadminCatalog(PermissionService):
+    """Superadmin catalogs as cached before the shared catalog: one entry per
+    superadmin, versioned by AGENT_CATALOG_GEN_KEY; the admin listing read
+    the database every time."""
+
+    async def get_user_agents(self, user_id, load, *, is_superadmin=False):
+        if not is_superadmin:
+            return await super().get_user_agents(user_id, load)
+        gen = (await self._generations([AGENT_CATALOG_GEN_KEY]))[AGENT_CATALOG_GEN_KEY]
+        key = f"user_agents:{user_id}:all:g{gen}"
+        value = await self._cache.get(key)
+        if value is None:
+            soft_expires_at = time.time() + USER_AGENTS_SOFT_TTL_SECONDS
+            value = self._codec.encode_user_agents(soft_expires_at, await load())
+            await self._cache.set(key, value, USER_AGENTS_HARD_TTL_SECONDS)
+        return self._codec.decode_user_agents(value)[1]
+
+    async def get_agent_catalog(self, load):
+        return render_user_agents(await load())
+
+    async def _patch_catalog(self, session, agent_id, version):
+        await self._cache.incr(AGENT_CATALOG_GEN_KEY)
+
+
+async def _cached_bytes(redis: Redis) -> int:
+    total = 0
+    async for key in redis.scan_iter("user_agents:*"):
+        total += await redis.strlen(key)
+    for value in (await redis.hgetall(AGENT_CATALOG_KEY)).values():
+        total += len(value)
+    return total
+
+
+async def _run(service: PermissionService, session_factory, redis, assignments):
+    """(invalidation ms per round, reads ms per round, bytes cached)"""
+    admin, agents = AdminService(), AgentService()
+
+    async def load_catalog() -> list[dict]:
+        async with session_factory() as session:
+            return await admin.list_all_agents(session)
+
+    async def read_all() -> None:
+        for i in range(SUPERADMINS):
+            await service.get_user_agents(f"sa{i}", load_catalog, is_superadmin=True)
+        await service.get_agent_catalog(load_catalog)
+
+    await read_all()  # warm
+    invalidate_s = read_s = 0.0
+    async with session_factory() as session:
+        for group_id, agent_id in assignments:
+            await agents.assign_agent_to_group(session, group_id, agent_id, "bench")
+            start = time.perf_counter()
+            await service.invalidate_agent_assignment(session, agent_id, [group_id])
+            invalidate_s += time.perf_counter() - start
+
+            start = time.perf_counter()
+            await read_all()
+            read_s += time.perf_counter() - start
+    rounds = len(assignments)
+    return (
+        invalidate_s / rounds * 1e3,
+        read_s / rounds * 1e3,
+        await _cached_bytes(redis),
+    )
+
+
+async def main() -> None:
+    url = os.getenv("REDIS_URL")
+    if not url:
+        raise SystemExit("Set REDIS_URL to a scratch Redis instance to run this")
+    redis = Redis.from_url(url, decode_responses=True)
+    rng = random.Random(2)
+    # Each agent is in 2 of the 10k groups: random pairs are new assignments
+    assignments = [
+        (rng.randrange(1, GROUPS + 1), rng.randrange(1, AGENTS + 1))
+        for _ in range(2 * ROUNDS)
+    ]
+
+    rows = []
+    try:
+        async with large_dataset() as session_factory:
+            for label, cls, batch in (
+                ("per superadmin", _PerSuperadminCatalog, assignments[:ROUNDS]),
+                ("shared catalog", PermissionService, assignments[ROUNDS:]),
+            ):
+                await redis.flushdb()
+                service = cls(RedisCache(redis))
+                try:
+                    rows.append(
+                        (label, *await _run(service, session_factory, redis, batch))
+                    )
+                finally:
+                    await service.stop()
+    finally:
+        await redis.flushdb()
+        await redis.aclose()
+
+    print(
+        f"{SUPERADMINS} superadmins + GET /api/admin/agents, "
+        f"one assignment per round, {ROUNDS} rounds"
+    )
+    print(f"{'':<16}{'invalidate ms':>15}{'reads ms':>12}{'cached bytes':>15}")
+    for label, invalidate_ms, read_ms, cached in rows:
+        print(f"{label:<16}{invalidate_ms:>15.2f}{read_ms:>12.1f}{cached:>15}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Delta sync of user agent lists at 100k users / 10k groups / 50k agents:
+downloading the whole list again vs. GET /users/{id}/agents/changes after
+one agent was assigned to one of the user's groups, for regular users
+(~30 agents each) and for the superadmin catalog (every agent).
+
+Reports ms per call and response bytes, and the cost the change log adds to
+assign_agent_to_group.
+
+Run with:
+    uv run python -m benchmarks.bench_agent_changes
+"""
+
+import asyncio
+import random
+import time
+
+from sqlalchemy import select
+
+from benchmarks._dataset import AGENTS, USERS, large_dataset
+from src.domain.models.agent_schemas import (
+    UserAgentChangesResponse,
+    UserAgentListResponse,
+)
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.services import agent_change_log_service
+from src.domain.services.agent_change_log_service import AgentChangeLogService
+from src.domain.services.agent_service import AgentService
+
+SAMPLED_USERS = 200
+
+
+class _NoChangeLog(AgentChangeLogService):
+    """Assignments as they were before the change log."""
+
+    async def record_assignment(self, session, agent_id, group_ids) -> None:
+        pass
+
+
+async def _first_group(session, user_id: str) -> int:
+    return await session.scalar(
+        select(GroupMembership.group_id)
+        .where(GroupMembership.entra_object_id == user_id)
+        .limit(1)
+    )
+
+
+async def _assign_ms(service: AgentService, session, assignments) -> float:
+    start = time.perf_counter()
+    for group_id, agent_id in assignments:
+        await service.assign_agent_to_group(session, group_id, agent_id, "bench")
+    return (time.perf_counter() - start) / len(assignments) * 1e3
+
+
+async def _sync(service, session, user_id, token, *, is_superadmin=False):
+    """(ms for a full list, its bytes, ms for the delta, its bytes)"""
+    start = time.perf_counter()
+    agents = await service.get_user_agents(
+        session, user_id, is_superadmin=is_superadmin
+    )
+    full = UserAgentListResponse(agents=agents).model_dump_json()
+    full_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    changes = await service.get_user_agent_changes(
+        session, user_id, token, is_superadmin=is_superadmin
+    )
+    assert not changes["full_resync"]
+    delta = UserAgentChangesResponse(**changes).model_dump_json()
+    delta_ms = (time.perf_counter() - start) * 1e3
+    return full_ms, len(full), delta_ms, len(delta)
+
+
+async def main() -> None:
+    # Tokens are taken right before the changes they should see
+    agent_change_log_service.AGENT_CHANGES_SETTLE_SECONDS = 0
+    rng = random.Random(1)
+    users = [f"u{i}" for i in rng.sample(range(USERS), SAMPLED_USERS)]
+    service = AgentService()
+
+    async with large_dataset() as session_factory:
+        async with session_factory() as session:
+            groups = [await _first_group(session, user_id) for user_id in users]
+            # Agents far from any the dataset put in these groups
+            extra = rng.sample(range(1, AGENTS + 1), 2 * SAMPLED_USERS)
+
+            before = await _assign_ms(
+                AgentService(changes=_NoChangeLog()),
+                session,
+                list(zip(groups, extra[:SAMPLED_USERS], strict=True)),
+            )
+
+            tokens = {}
+            for user_id in users:
+                changes = await service.get_user_agent_changes(session, user_id, None)
+                tokens[user_id] = changes["next_token"]
+            catalog = await service.get_user_agent_changes(
+                session, "sa", None, is_superadmin=True
+            )
+            after = await _assign_ms(
+                service,
+                session,
+                list(zip(groups, extra[SAMPLED_USERS:], strict=True)),
+            )
+
+            rows = [
+                await _sync(service, session, user_id, tokens[user_id])
+                for user_id in users
+            ]
+            catalog_row = await _sync(
+                service, session, "sa", catalog["next_token"], is_superadmin=True
+            )
+
+    def mean(column: int) -> float:
+        return sum(row[column] for row in rows) / len(rows)
+
+    print(f"{SAMPLED_USERS} users, one agent assigned to a group of each")
+    print(f"{'':<22}{'full ms':>10}{'bytes':>12}{'delta ms':>10}{'bytes':>8}")
+    print(
+        f"{'user (mean)':<22}{mean(0):>10.2f}{mean(1):>12.0f}{mean(2):>10.2f}{mean(3):>8.0f}"
+    )
+    full_ms, full_bytes, delta_ms, delta_bytes = catalog_row
+    print(
+        f"{'superadmin catalog':<22}{full_ms:>10.2f}{full_bytes:>12}"
+        f"{delta_ms:>10.2f}{delta_bytes:>8}"
+    )
+    print(f"assign_agent_to_group: {before:.2f} ms before, {after:.2f} ms with the log")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Agent listings with groups: the previous ORM query grouped in Python vs.
+plain columns grouped in Python (the fallback for other dialects) vs.
+groups aggregated per agent in SQL, at 100k users / 10k groups / 50k
+agents.
+
+Reports ms per call for the full catalog (superadmin) and for a regular
+user's agents. Runs on a temporary SQLite file; set BENCH_DATABASE_URL to
+an empty PostgreSQL database (postgresql+asyncpg://...) to run there too.
+
+Run with:
+    uv run python -m benchmarks.bench_agent_listing
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks._dataset import USERS, large_dataset
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.services import agent_listing
+
+CATALOG_CALLS = 5
+USER_CALLS = 500
+
+
+async def orm_listing(session: AsyncSession, member: str | None = None) -> list:
+    """The listing as it was: Agent entities per (agent, group) row, and a
+    list scan per row to skip duplicate groups."""
+    stmt = (
+        select(Agent, Group.id, Group.name)
+        .join(GroupAgent, GroupAgent.agent_id == Agent.id)
+        .join(Group, Group.id == GroupAgent.group_id)
+    )
+    if member is not None:
+        stmt = stmt.join(
+            GroupMembership, GroupMembership.group_id == GroupAgent.group_id
+        ).where(GroupMembership.entra_object_id == member)
+    result = await session.execute(stmt.order_by(Agent.id, Group.id))
+
+    agents_map: dict[int, dict] = {}
+    for agent, group_id, group_name in result.all():
+        if agent.id not in agents_map:
+            agents_map[agent.id] = {
+                "id": agent.id,
+                "agent_external_id": agent.agent_external_id,
+                "name": agent.name,
+                "created_by": agent.created_by,
+                "created_at": agent.created_at,
+                "groups": [],
+            }
+        group_entry = {"group_id": group_id, "group_name": group_name}
+        if group_entry not in agents_map[agent.id]["groups"]:
+            agents_map[agent.id]["groups"].append(group_entry)
+    return list(agents_map.values())
+
+
+async def column_listing(session: AsyncSession, member: str | None = None) -> list:
+    return await agent_listing._group_in_python(session, (), member)
+
+
+async def aggregate_listing(session: AsyncSession, member: str | None = None) -> list:
+    return await agent_listing.list_agents_with_groups(session, member=member)
+
+
+async def _time_ms(fn, session: AsyncSession, members: list) -> float:
+    start = time.perf_counter()
+    for member in members:
+        await fn(session, member)
+        # Drop loaded entities between calls, as a fresh request session would
+        session.expunge_all()
+    return (time.perf_counter() - start) / len(members) * 1e3
+
+
+async def run(database_url: str | None) -> list[tuple]:
+    rng = random.Random(1)
+    members = [f"u{rng.randrange(USERS)}" for _ in range(USER_CALLS)]
+    results = []
+    async with large_dataset(database_url) as session_factory:
+        async with session_factory() as session:
+            for label, fn in [
+                ("orm", orm_listing),
+                ("columns", column_listing),
+                ("aggregate", aggregate_listing),
+            ]:
+                catalog = await _time_ms(fn, session, [None] * CATALOG_CALLS)
+                user = await _time_ms(fn, session, members)
+                results.append((label, catalog, user))
+    return results
+
+
+async def main() -> None:
+    backends = [("sqlite", None)]
+    if os.getenv("BENCH_DATABASE_URL"):
+        backends.append(("postgresql", os.environ["BENCH_DATABASE_URL"]))
+
+    for backend, database_url in backends:
+        results = await run(database_url)
+        print(f"\n{backend}")
+        print(f"{'':<12}{'catalog ms':>12}{'user ms':>10}")
+        for label, catalog, user in results:
+            print(f"{label:<12}{catalog:>12.1f}{user:>10.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Permission checks and user agent lists from SQL vs. the in-memory
+authorization graph, at 100k users / 10k groups / 50k agents.
+
+Reports the graph's load time and Python heap size, per-call time for a
+check and an agents listing on each path, and the cost of a full
+consistency check against SQL. SQL runs against a file-backed SQLite
+database, so its numbers are a lower bound for a networked database.
+
+Run with:
+    uv run python -m benchmarks.bench_authorization_graph
+"""
+
+import asyncio
+import random
+import time
+import tracemalloc
+
+import benchmarks._tokens  # noqa: F401 — sets placeholder Azure AD settings
+from benchmarks._dataset import AGENTS, USERS, large_dataset
+from src.base.config.redis_cache import RedisCache
+from src.domain.models.permission_schemas import PermissionAction
+from src.domain.services.agent_service import AgentService
+from src.domain.services.authorization_graph import AuthorizationGraph
+from src.domain.services.permission_service import PermissionService
+
+CHECKS = 2000
+LISTINGS = 200
+
+
+async def _time_us(fn, calls: list) -> float:
+    start = time.perf_counter()
+    for args in calls:
+        await fn(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+async def main() -> None:
+    rng = random.Random(1)
+    async with large_dataset() as session_factory:
+        graph = AuthorizationGraph(session_factory)
+        tracemalloc.start()
+        start = time.perf_counter()
+        await graph.load()
+        load_s = time.perf_counter() - start
+        heap_mb = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+
+        sql = PermissionService(cache=RedisCache())
+        in_memory = PermissionService(cache=RedisCache(), graph=graph)
+        agent_service = AgentService()
+        checks = [
+            (f"u{rng.randrange(USERS)}", rng.randrange(1, AGENTS + 1))
+            for _ in range(CHECKS)
+        ]
+        listings = [f"u{rng.randrange(USERS)}" for _ in range(LISTINGS)]
+
+        async with session_factory() as session:
+
+            async def sql_check(user_id, agent_id):
+                await sql.check_permission(
+                    session, user_id, agent_id, PermissionAction.ACCESS
+                )
+
+            async def sql_listing(user_id):
+                await agent_service.get_user_agents(session, user_id)
+
+            async def graph_check(user_id, agent_id):
+                await in_memory.check_permission(
+                    None, user_id, agent_id, PermissionAction.ACCESS
+                )
+
+            async def graph_listing(user_id):
+                graph.user_agents(user_id)
+
+            results = [
+                (
+                    "sql",
+                    await _time_us(sql_check, checks),
+                    await _time_us(sql_listing, [(u,) for u in listings]),
+                ),
+                (
+                    "graph",
+                    await _time_us(graph_check, checks),
+                    await _time_us(graph_listing, [(u,) for u in listings]),
+                ),
+            ]
+
+        start = time.perf_counter()
+        differences = await graph.check_consistency()
+        consistency_s = time.perf_counter() - start
+
+    print(f"graph load: {load_s:.2f} s, {heap_mb:.0f} MiB Python heap")
+    print(f"consistency check: {consistency_s:.2f} s, {len(differences)} differences")
+    print(f"{'':<8}{'check µs':>12}{'agents list µs':>16}")
+    for label, check_us, listing_us in results:
+        print(f"{label:<8}{check_us:>12.1f}{listing_us:>16.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Bytes per cached value and cost per cache hit for the permission cache
+codecs: the previous read path (JSON document, agents revalidated through
+pydantic on every hit), the JSON codec and the compact codec.
+
+A hit is timed from the Redis string to the response body, so the agents
+list includes rendering it as the route does. Value sizes are the payload
+Redis stores for the key (excluding its per-key overhead).
+
+Run with:
+    uv run python -m benchmarks.bench_cache_codec
+"""
+
+import datetime
+import json
+import time
+
+from fastapi.responses import JSONResponse
+
+from src.domain.models.agent_schemas import UserAgentListResponse, UserAgentResponse
+from src.domain.services.cache_codec import CompactCacheCodec, JsonCacheCodec
+
+AGENTS = 200
+GROUPS_PER_AGENT = 2
+ROUNDS = 2000
+
+
+def _agents() -> list[dict]:
+    created_at = datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.UTC)
+    return [
+        {
+            "id": i,
+            "agent_external_id": f"bench-agent-{i:05d}",
+            "name": f"Benchmark Agent {i}",
+            "created_by": "6f1c2d3e-aaaa-bbbb-cccc-0123456789ab",
+            "created_at": created_at,
+            "groups": [
+                {"group_id": g, "group_name": f"Group {g}"}
+                for g in range(i % 7, i % 7 + GROUPS_PER_AGENT)
+            ],
+        }
+        for i in range(AGENTS)
+    ]
+
+
+def _legacy_verdict(value: str) -> tuple[bool, str | None]:
+    data = json.loads(value)
+    return data["allowed"], data.get("role")
+
+
+def _legacy_hit(value: str) -> bytes:
+    agents = json.loads(value)["agents"]
+    response = UserAgentListResponse(agents=[UserAgentResponse(**a) for a in agents])
+    return response.model_dump_json().encode()
+
+
+def _codec_hit(codec, value: str) -> bytes:
+    _, agents = codec.decode_user_agents(value)
+    return JSONResponse({"agents": agents}).body
+
+
+def _time_us(fn, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main() -> None:
+    agents = _agents()
+    soft_expires_at = time.time()
+    compact, plain = CompactCacheCodec(), JsonCacheCodec()
+
+    legacy_verdict = json.dumps({"allowed": True, "role": "admin"})
+    legacy_list = json.dumps(
+        {"soft_expires_at": soft_expires_at, "agents": agents}, default=str
+    )
+    rows = [
+        (
+            "previous (json + pydantic)",
+            legacy_verdict,
+            lambda: _legacy_verdict(legacy_verdict),
+            legacy_list,
+            lambda: _legacy_hit(legacy_list),
+        )
+    ]
+    for codec in (plain, compact):
+        verdict = codec.encode_verdict(True, "admin")
+        agent_list = codec.encode_user_agents(soft_expires_at, agents)
+        rows.append(
+            (
+                f"{codec.name} codec",
+                verdict,
+                lambda c=codec, v=verdict: c.decode_verdict(v),
+                agent_list,
+                lambda c=codec, v=agent_list: _codec_hit(c, v),
+            )
+        )
+
+    print(f"{AGENTS} agents x {GROUPS_PER_AGENT} groups, {ROUNDS} rounds")
+    print(
+        f"{'':<28}{'verdict B':>10}{'verdict µs':>12}{'list B':>10}{'list hit µs':>13}"
+    )
+    for label, verdict, decode_verdict, agent_list, list_hit in rows:
+        print(
+            f"{label:<28}{len(verdict.encode()):>10}"
+            f"{_time_us(decode_verdict, ROUNDS * 50):>12.3f}"
+            f"{len(agent_list.encode()):>10}{_time_us(list_hit):>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
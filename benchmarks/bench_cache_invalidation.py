@@ -0,0 +1,97 @@
+"""
+Agent invalidation latency as the cache keyspace grows: the old SCAN-based
+delete_pattern("perm:*:{agent}:*") + delete_pattern("user_agents:*") vs.
+bumping the agent and user-agents generation counters with INCR.
+
+Needs a real Redis; point REDIS_URL at a scratch instance. Keys are written
+under a "bench-" user prefix and removed afterwards, but filling 1M keys
+takes a few hundred MB of memory.
+
+Run with:
+    REDIS_URL=redis://localhost:6379/15 uv run python -m benchmarks.bench_cache_invalidation
+"""
+
+import asyncio
+import os
+import time
+
+from redis.asyncio import Redis
+
+import benchmarks._tokens  # noqa: F401 — sets placeholder Azure AD settings
+from src.base.config.redis_cache import RedisCache
+from src.domain.services.permission_service import (
+    CACHE_TTL_SECONDS,
+    PermissionService,
+)
+
+KEYSPACE_SIZES = [10_000, 100_000, 1_000_000]
+AGENTS = 100
+BATCH = 10_000
+ROUNDS = 5
+TARGET_AGENT = 7
+
+
+async def _fill(redis: Redis, size: int) -> None:
+    """Write `size` permission/user-agents keys spread across AGENTS agents."""
+    for start in range(0, size, BATCH):
+        pipe = redis.pipeline(transaction=False)
+        for i in range(start, min(start + BATCH, size)):
+            if i % 10 == 0:
+                key = f"user_agents:bench-u{i}"
+            else:
+                key = f"perm:bench-u{i}:{i % AGENTS}:access"
+            pipe.set(
+                key, '{"allowed": true, "role": "user"}', ex=CACHE_TTL_SECONDS * 60
+            )
+        await pipe.execute()
+
+
+async def _cleanup(cache: RedisCache) -> None:
+    await cache.delete_pattern("perm:bench-*")
+    await cache.delete_pattern("user_agents:bench-*")
+
+
+async def _time_scan_delete(cache: RedisCache) -> float:
+    start = time.perf_counter()
+    await cache.delete_pattern(f"perm:*:{TARGET_AGENT}:*")
+    await cache.delete_pattern("user_agents:*")
+    return time.perf_counter() - start
+
+
+async def _time_incr(service: PermissionService) -> float:
+    start = time.perf_counter()
+    await service.invalidate_agent_permissions(TARGET_AGENT)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    url = os.getenv("REDIS_URL")
+    if not url:
+        raise SystemExit("Set REDIS_URL to a scratch Redis instance to run this")
+
+    redis = Redis.from_url(url, decode_responses=True)
+    cache = RedisCache(redis)
+    service = PermissionService(cache)
+
+    print(f"{'keys':>10}  {'SCAN delete (ms)':>17}  {'INCR (ms)':>10}")
+    try:
+        for size in KEYSPACE_SIZES:
+            scan_times, incr_times = [], []
+            for _ in range(ROUNDS):
+                # Refill each round: the SCAN path deletes what it matches
+                await _fill(redis, size)
+                scan_times.append(await _time_scan_delete(cache))
+                incr_times.append(await _time_incr(service))
+            await _cleanup(cache)
+
+            scan_ms = sorted(scan_times)[ROUNDS // 2] * 1000
+            incr_ms = sorted(incr_times)[ROUNDS // 2] * 1000
+            print(f"{size:>10}  {scan_ms:>17.1f}  {incr_ms:>10.3f}")
+    finally:
+        await _cleanup(cache)
+        await redis.delete(f"gen:agent:{TARGET_AGENT}", "gen:user_agents")
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
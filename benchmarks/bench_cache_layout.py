@@ -0,0 +1,79 @@
+"""
+Redis memory used by cached permission verdicts in the two layouts: one
+string key per (user, agent, action) vs. one hash per user.
+
+Each run writes the same verdicts through PermissionService's batch write
+path and reports the growth of used_memory, then deletes them.
+
+Needs a real Redis; point REDIS_URL at a scratch instance.
+
+Run with:
+    REDIS_URL=redis://localhost:6379/15 uv run python -m benchmarks.bench_cache_layout
+"""
+
+import asyncio
+import os
+
+from redis.asyncio import Redis
+
+import benchmarks._tokens  # noqa: F401 — sets placeholder Azure AD settings
+from src.base.config.redis_cache import RedisCache
+from src.domain.services import permission_service
+from src.domain.services.permission_service import CACHE_TTL_SECONDS, PermissionService
+
+USERS = 1000
+AGENTS_PER_USER = [10, 100, 500]
+ACTIONS = ["access", "create"]
+USERS_PER_BATCH = 50
+
+
+async def _used_memory(redis: Redis) -> int:
+    return (await redis.info("memory"))["used_memory"]
+
+
+async def _fill(service: PermissionService, agents: int) -> None:
+    """Write USERS x agents x ACTIONS verdicts in the active layout."""
+    for start in range(0, USERS, USERS_PER_BATCH):
+        values = {
+            service._cache_key(f"bench-u{user}", agent, action, 0, 0): "u"
+            for user in range(start, min(start + USERS_PER_BATCH, USERS))
+            for agent in range(agents)
+            for action in ACTIONS
+        }
+        await service._write_many(values, CACHE_TTL_SECONDS * 60)
+
+
+async def _measure(redis: Redis, service: PermissionService, agents: int) -> int:
+    cache = RedisCache(redis)
+    await cache.delete_pattern("perm:bench-u*")
+    before = await _used_memory(redis)
+    await _fill(service, agents)
+    after = await _used_memory(redis)
+    await cache.delete_pattern("perm:bench-u*")
+    return after - before
+
+
+async def main() -> None:
+    url = os.getenv("REDIS_URL")
+    if not url:
+        raise SystemExit("Set REDIS_URL to a scratch Redis instance to run this")
+
+    redis = Redis.from_url(url, decode_responses=True)
+    service = PermissionService(RedisCache(redis))
+
+    print(f"{USERS} users, {len(ACTIONS)} actions per agent")
+    print(f"{'agents/user':>12}  {'keys (B/verdict)':>17}  {'hash (B/verdict)':>17}")
+    try:
+        for agents in AGENTS_PER_USER:
+            verdicts = USERS * agents * len(ACTIONS)
+            sizes = {}
+            for layout in ("keys", "hash"):
+                permission_service.PERMISSION_CACHE_LAYOUT = layout
+                sizes[layout] = await _measure(redis, service, agents) / verdicts
+            print(f"{agents:>12}  {sizes['keys']:>17.1f}  {sizes['hash']:>17.1f}")
+    finally:
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
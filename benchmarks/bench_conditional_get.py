@@ -0,0 +1,73 @@
+"""
+Cost of a repeat GET /api/users/{id}/agents through the middleware stack:
+a full response served from the Redis-cached list (decode + serialize) vs.
+a conditional request whose If-None-Match still matches (304, no body).
+
+Needs a real Redis (ETags are derived from the generation counters kept
+there); point REDIS_URL at a scratch instance.
+
+Run with:
+    REDIS_URL=redis://localhost:6379/15 uv run python -m benchmarks.bench_conditional_get
+"""
+
+import asyncio
+import os
+import time
+
+from httpx import ASGITransport, AsyncClient
+from redis.asyncio import Redis
+
+from benchmarks._app import BENCH_USER_ID, build_app
+from benchmarks._tokens import SigningKey, install_local_jwks
+from benchmarks.bench_user_agents_latency import _seed_agents
+from src.base.config.redis_cache import RedisCache
+
+REQUESTS = 2000
+
+
+async def _time_us(client: AsyncClient, headers: dict, status: int) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        resp = await client.get(f"/api/users/{BENCH_USER_ID}/agents", headers=headers)
+        assert resp.status_code == status, resp.text
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+async def main() -> None:
+    url = os.getenv("REDIS_URL")
+    if not url:
+        raise SystemExit("Set REDIS_URL to a scratch Redis instance to run this")
+
+    key = SigningKey()
+    await install_local_jwks(key)
+    headers = {"Authorization": f"Bearer {key.mint(subject=BENCH_USER_ID)}"}
+    redis = Redis.from_url(url, decode_responses=True)
+
+    try:
+        app, ids = await build_app(RedisCache(redis))
+        await _seed_agents(app, ids["group_id"])
+        await app.state.permission_service.invalidate_user_permissions(BENCH_USER_ID)
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            resp = await client.get(
+                f"/api/users/{BENCH_USER_ID}/agents", headers=headers
+            )
+            body_bytes = len(resp.content)
+            conditional = {**headers, "If-None-Match": resp.headers["etag"]}
+
+            full = await _time_us(client, headers, 200)
+            not_modified = await _time_us(client, conditional, 304)
+        await app.state.permission_service.stop()
+    finally:
+        await RedisCache(redis).delete_pattern(f"user_agents:{BENCH_USER_ID}:*")
+        await redis.aclose()
+
+    print(f"{REQUESTS} sequential requests, {body_bytes} byte list")
+    print(f"{'200 (cached list)':<20}{full:>10.1f} µs")
+    print(f"{'304 (ETag match)':<20}{not_modified:>10.1f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
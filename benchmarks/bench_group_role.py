@@ -0,0 +1,96 @@
+"""
+Cost of the group-admin guard per request: the previous inline SELECT on
+group_memberships vs. PermissionService.get_group_role served from each
+cache tier (in-memory graph, L1, and Redis when REDIS_URL is set), at
+100k users / 10k groups.
+
+Run with:
+    uv run python -m benchmarks.bench_group_role
+    REDIS_URL=redis://localhost:6379/15 uv run python -m benchmarks.bench_group_role
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+
+import benchmarks._tokens  # noqa: F401 — sets placeholder Azure AD settings
+from benchmarks._dataset import GROUPS, USERS, large_dataset
+from src.base.config.redis_cache import RedisCache
+from src.base.utils.expiring_lru_cache import ExpiringLRUCache
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.services import permission_service
+from src.domain.services.authorization_graph import AuthorizationGraph
+from src.domain.services.permission_service import PermissionService
+
+PAIRS = 2000
+
+
+async def _time_us(fn, pairs: list[tuple[str, int]]) -> float:
+    start = time.perf_counter()
+    for user_id, group_id in pairs:
+        await fn(user_id, group_id)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+
+async def main() -> None:
+    rng = random.Random(1)
+    pairs = [
+        (f"u{rng.randrange(USERS)}", rng.randrange(1, GROUPS + 1)) for _ in range(PAIRS)
+    ]
+    url = os.getenv("REDIS_URL")
+    redis = Redis.from_url(url, decode_responses=True) if url else None
+
+    async with large_dataset() as session_factory:
+        graph = AuthorizationGraph(session_factory)
+        await graph.load()
+
+        async with session_factory() as session:
+
+            async def inline_select(user_id, group_id):
+                result = await session.execute(
+                    select(GroupMembership).where(
+                        GroupMembership.entra_object_id == user_id,
+                        GroupMembership.group_id == group_id,
+                        GroupMembership.role == GroupRole.ADMIN,
+                    )
+                )
+                result.scalar_one_or_none()
+
+            def lookup(service):
+                async def fn(user_id, group_id):
+                    await service.get_group_role(session, user_id, group_id)
+
+                return fn
+
+            rows = [("inline SELECT (before)", await _time_us(inline_select, pairs))]
+
+            l1 = PermissionService(
+                RedisCache(), local_cache=ExpiringLRUCache(len(pairs))
+            )
+            await _time_us(lookup(l1), pairs)  # warm
+            rows.append(("L1 hit", await _time_us(lookup(l1), pairs)))
+
+            if redis is not None:
+                permission_service.PERMISSION_L1_MAX_SIZE = 0
+                remote = PermissionService(RedisCache(redis))
+                await _time_us(lookup(remote), pairs)  # warm
+                rows.append(("Redis hit", await _time_us(lookup(remote), pairs)))
+
+            in_memory = PermissionService(RedisCache(), graph=graph)
+            rows.append(("graph", await _time_us(lookup(in_memory), pairs)))
+
+    if redis is not None:
+        await redis.aclose()
+
+    print(f"{PAIRS} (user, group) lookups")
+    for label, us in rows:
+        print(f"{label:<24}{us:>10.1f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
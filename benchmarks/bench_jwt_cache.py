@@ -0,0 +1,86 @@
+"""
+CPU cost per authenticated request with and without the verified-token cache.
+
+Drives JWTMiddleware in front of a trivial endpoint and reports process CPU
+time per request for (a) the cache disabled and (b) the same token repeated.
+Also reports the isolated cost of the verification step on its own.
+
+Run with:
+    uv run python -m benchmarks.bench_jwt_cache
+"""
+
+import asyncio
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks._tokens import SigningKey, install_local_jwks
+from src.base.auth import auth_core
+from src.base.auth.token_cache import token_cache
+from src.base.middleware.jwt_middleware import JWTMiddleware
+
+REQUESTS = 2000
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(JWTMiddleware)
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def _cpu_per_request(client: AsyncClient, token: str, use_cache: bool) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    token_cache.clear()
+    start = time.process_time()
+    for _ in range(REQUESTS):
+        if not use_cache:
+            token_cache.clear()
+        resp = await client.get("/api/ping", headers=headers)
+        assert resp.status_code == 200, resp.text
+    return (time.process_time() - start) / REQUESTS
+
+
+def _verify_only(token: str) -> tuple[float, float]:
+    start = time.process_time()
+    for _ in range(REQUESTS):
+        auth_core.validate_jwt_token(token)
+    full = (time.process_time() - start) / REQUESTS
+
+    token_cache.put(token, auth_core.validate_jwt_token(token))
+    start = time.process_time()
+    for _ in range(REQUESTS):
+        token_cache.get(token)
+    hit = (time.process_time() - start) / REQUESTS
+    return full, hit
+
+
+async def main() -> None:
+    key = SigningKey()
+    await install_local_jwks(key)
+    token = key.mint()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=_build_app()), base_url="http://bench"
+    ) as client:
+        uncached = await _cpu_per_request(client, token, use_cache=False)
+        cached = await _cpu_per_request(client, token, use_cache=True)
+
+    full, hit = _verify_only(token)
+
+    print(f"requests per run:        {REQUESTS}")
+    print(f"verify only, RS256:      {full * 1e6:8.1f} µs")
+    print(f"verify only, cache hit:  {hit * 1e6:8.1f} µs")
+    print(f"CPU/request, no cache:   {uncached * 1e6:8.1f} µs")
+    print(f"CPU/request, cached:     {cached * 1e6:8.1f} µs")
+    print(f"speedup:                 {uncached / cached:8.1f}x")
+    print(f"cache stats:             {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Load test: latency under concurrent requests with distinct tokens, with JWT
+verification inline on the event loop vs. offloaded to the thread pool.
+
+Every authenticated request carries its own token, so the verified-token
+cache never hits and each one pays a full RS256 check. Alongside that load,
+cheap requests to a whitelisted endpoint measure how long the event loop is
+stalled.
+
+Run with:
+    uv run python -m benchmarks.bench_jwt_offload
+"""
+
+import asyncio
+import statistics
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks._tokens import SigningKey, install_local_jwks
+from src.base.auth import auth_core
+from src.base.auth.token_cache import token_cache
+from src.base.auth.verification_pool import VerificationPool
+from src.base.middleware.jwt_middleware import JWTMiddleware
+
+TOKENS = 1000
+CONCURRENCY = 50
+PROBES = 200
+POOL_WORKERS = 4
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(JWTMiddleware)
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/api/health")
+    async def health():
+        return {"ok": True}
+
+    return app
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run(client: AsyncClient, tokens: list[str]) -> dict[str, list[float]]:
+    token_cache.clear()
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for token in tokens:
+        queue.put_nowait(token)
+
+    auth_latencies: list[float] = []
+    probe_latencies: list[float] = []
+
+    async def worker():
+        while not queue.empty():
+            token = queue.get_nowait()
+            start = time.perf_counter()
+            resp = await client.get(
+                "/api/ping", headers={"Authorization": f"Bearer {token}"}
+            )
+            auth_latencies.append(time.perf_counter() - start)
+            assert resp.status_code == 200, resp.text
+
+    async def prober():
+        for _ in range(PROBES):
+            start = time.perf_counter()
+            await client.get("/api/health")
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(prober(), *(worker() for _ in range(CONCURRENCY)))
+    return {"auth": auth_latencies, "probe": probe_latencies}
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"  {label:<14} p50={statistics.median(samples) * 1e3:7.2f} ms"
+        f"  p99={_percentile(samples, 99) * 1e3:7.2f} ms"
+    )
+
+
+async def main() -> None:
+    key = SigningKey()
+    await install_local_jwks(key)
+    tokens = [key.mint(subject=f"user-{i}") for i in range(TOKENS)]
+
+    async with AsyncClient(
+        transport=ASGITransport(app=_build_app()), base_url="http://bench"
+    ) as client:
+        auth_core.verification_pool = None
+        inline = await _run(client, tokens)
+
+        pool = VerificationPool(POOL_WORKERS)
+        auth_core.verification_pool = pool
+        offloaded = await _run(client, tokens)
+        pool.shutdown()
+
+    print(f"{TOKENS} distinct tokens, concurrency={CONCURRENCY}")
+    print("inline verification:")
+    _report("authenticated", inline["auth"])
+    _report("whitelisted", inline["probe"])
+    print(f"thread pool verification ({POOL_WORKERS} workers):")
+    _report("authenticated", offloaded["auth"])
+    _report("whitelisted", offloaded["probe"])
+    print(f"pool stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
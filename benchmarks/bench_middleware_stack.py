@@ -0,0 +1,75 @@
+"""
+Requests/sec for GET /api/permissions/check through the middleware stack.
+
+The JWT, correlation and exception middlewares are pure ASGI. For the
+"before" figure the same stack is wrapped in three pass-through
+BaseHTTPMiddleware layers, which reproduces the per-layer task and stream
+plumbing the old BaseHTTPMiddleware subclasses paid on every request.
+
+Run with:
+    uv run python -m benchmarks.bench_middleware_stack
+"""
+
+import asyncio
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from benchmarks._app import BENCH_USER_ID, build_app
+from benchmarks._tokens import SigningKey, install_local_jwks
+
+REQUESTS = 3000
+CONCURRENCY = 10
+
+
+class PassThroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+async def _requests_per_second(app: FastAPI, url: str, token: str) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        remaining = REQUESTS
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                resp = await client.get(url, headers=headers)
+                assert resp.status_code == 200, resp.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    key = SigningKey()
+    await install_local_jwks(key)
+    token = key.mint(subject=BENCH_USER_ID)
+
+    app, ids = await build_app()
+    url = (
+        f"/api/permissions/check?user_id={BENCH_USER_ID}"
+        f"&agent_id={ids['agent_id']}&action=access"
+    )
+    pure_asgi = await _requests_per_second(app, url, token)
+
+    legacy_app, _ = await build_app()
+    for _ in range(3):
+        legacy_app.add_middleware(PassThroughMiddleware)
+    legacy = await _requests_per_second(legacy_app, url, token)
+
+    print(f"{REQUESTS} requests, concurrency={CONCURRENCY}")
+    print(f"with 3x BaseHTTPMiddleware plumbing: {legacy:8.0f} req/s")
+    print(f"pure ASGI stack:                     {pure_asgi:8.0f} req/s")
+    print(f"improvement:                         {pure_asgi / legacy:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Per-token verify time: raw JWKS scan vs. the pre-parsed signing key registry.
+
+"before" reproduces the old lookup (linear scan over jwks["keys"] and
+passing the JWK dict to jose, which rebuilds the RSA key every call);
+"after" is auth_core.validate_jwt_token with the kid-indexed registry.
+
+Run with:
+    uv run python -m benchmarks.bench_signing_keys
+"""
+
+import asyncio
+import time
+
+from jose import jwt
+
+from benchmarks._tokens import SigningKey, install_local_jwks
+from src.base.auth import auth_core
+
+ITERATIONS = 2000
+KEYS_IN_JWKS = 8
+
+
+def _verify_before(token: str, jwks: dict) -> dict:
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = next((k for k in jwks["keys"] if k["kid"] == kid), None)
+    return jwt.decode(
+        token,
+        key,
+        algorithms=["RS256"],
+        audience=auth_core.CLIENT_ID,
+        issuer=auth_core.ISSUER,
+    )
+
+
+def _time_per_call(fn, token: str) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(token)
+    return (time.perf_counter() - start) / ITERATIONS
+
+
+async def main() -> None:
+    keys = [SigningKey() for _ in range(KEYS_IN_JWKS)]
+    provider = await install_local_jwks(*keys)
+    # Sign with the last key so the linear scan walks the whole list
+    token = keys[-1].mint()
+
+    before = _time_per_call(lambda t: _verify_before(t, provider.jwks), token)
+    after = _time_per_call(auth_core.validate_jwt_token, token)
+
+    print(f"keys in JWKS:        {KEYS_IN_JWKS}")
+    print(f"verify, scan + JWK:  {before * 1e6:8.1f} µs")
+    print(f"verify, registry:    {after * 1e6:8.1f} µs")
+    print(f"speedup:             {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+p50/p95/p99 latency of GET /api/users/{id}/agents under steady load while
+the cached list keeps expiring: plain TTL expiry (every expiry sends the
+next caller to the database) vs. stale-while-revalidate (stale list served,
+reload in the background). A no-cache run gives the cost of the query.
+
+Needs a real Redis; point REDIS_URL at a scratch instance.
+
+Run with:
+    REDIS_URL=redis://localhost:6379/15 uv run python -m benchmarks.bench_user_agents_latency
+"""
+
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from redis.asyncio import Redis
+
+from benchmarks._app import BENCH_USER_ID, build_app
+from benchmarks._tokens import SigningKey, install_local_jwks
+from src.base.config.redis_cache import RedisCache
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.services import permission_service
+
+AGENTS = 200
+DURATION_SECONDS = 10
+CONCURRENCY = 10
+SOFT_TTL_SECONDS = 1
+
+
+async def _seed_agents(app: FastAPI, group_id: int) -> None:
+    """Give the bench user a realistically sized agent list."""
+    async with app.state.db_session_factory() as session:
+        agents = [
+            Agent(agent_external_id=f"bench-{i}", name=f"Agent {i}", created_by="x")
+            for i in range(AGENTS)
+        ]
+        session.add_all(agents)
+        await session.flush()
+        session.add_all(
+            GroupAgent(group_id=group_id, agent_id=agent.id, added_by="x")
+            for agent in agents
+        )
+        await session.commit()
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run(app: FastAPI, token: str) -> list[float]:
+    # Start from an empty cache for this run
+    await app.state.permission_service.invalidate_user_permissions(BENCH_USER_ID)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    deadline = time.perf_counter() + DURATION_SECONDS
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                resp = await client.get(
+                    f"/api/users/{BENCH_USER_ID}/agents", headers=headers
+                )
+                latencies.append(time.perf_counter() - start)
+                assert resp.status_code == 200, resp.text
+
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return latencies
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<24} n={len(samples):6d}"
+        f"  p50={_percentile(samples, 50) * 1e3:6.2f} ms"
+        f"  p95={_percentile(samples, 95) * 1e3:6.2f} ms"
+        f"  p99={_percentile(samples, 99) * 1e3:6.2f} ms"
+    )
+
+
+async def main() -> None:
+    url = os.getenv("REDIS_URL")
+    if not url:
+        raise SystemExit("Set REDIS_URL to a scratch Redis instance to run this")
+
+    key = SigningKey()
+    await install_local_jwks(key)
+    token = key.mint(subject=BENCH_USER_ID)
+    redis = Redis.from_url(url, decode_responses=True)
+
+    try:
+        uncached_app, ids = await build_app()
+        await _seed_agents(uncached_app, ids["group_id"])
+        uncached = await _run(uncached_app, token)
+
+        app, ids = await build_app(RedisCache(redis))
+        await _seed_agents(app, ids["group_id"])
+
+        permission_service.USER_AGENTS_SOFT_TTL_SECONDS = SOFT_TTL_SECONDS
+        permission_service.USER_AGENTS_HARD_TTL_SECONDS = SOFT_TTL_SECONDS
+        hard_expiry = await _run(app, token)
+
+        permission_service.USER_AGENTS_HARD_TTL_SECONDS = 600
+        swr = await _run(app, token)
+        await app.state.permission_service.stop()
+    finally:
+        await RedisCache(redis).delete_pattern(f"user_agents:{BENCH_USER_ID}:*")
+        await redis.aclose()
+
+    print(
+        f"{AGENTS} agents, concurrency={CONCURRENCY}, {DURATION_SECONDS}s per run,"
+        f" list expires every {SOFT_TTL_SECONDS}s"
+    )
+    _report("no cache", uncached)
+    _report("TTL expiry", hard_expiry)
+    _report("stale-while-revalidate", swr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
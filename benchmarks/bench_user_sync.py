@@ -0,0 +1,89 @@
+"""
+Requests/sec for read endpoints when every request upserts the caller's
+users row (SELECT then COMMIT, the previous behaviour) vs. the
+change-detecting sync, which skips the database while the token's name and
+email match what this worker last wrote.
+
+Runs against a file-backed SQLite database, so each avoided commit is a
+real write; a networked database adds a round trip per statement on top.
+
+Run with:
+    uv run python -m benchmarks.bench_user_sync
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks._app import BENCH_USER_ID, build_app
+from benchmarks._tokens import SigningKey, install_local_jwks
+from src.domain.services.user_service import UserService
+
+REQUESTS = 3000
+CONCURRENCY = 10
+
+
+class PerRequestUpsert(UserService):
+    """The previous behaviour: read and commit the row on every request."""
+
+    async def sync_user(self, session, entra_object_id, display_name, email):
+        await self._upsert_select_first(session, entra_object_id, display_name, email)
+
+
+async def _requests_per_second(app: FastAPI, url: str, token: str) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        remaining = REQUESTS
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                resp = await client.get(url, headers=headers)
+                assert resp.status_code == 200, resp.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    key = SigningKey()
+    await install_local_jwks(key)
+    token = key.mint(subject=BENCH_USER_ID)
+
+    print(f"{REQUESTS} requests, concurrency={CONCURRENCY}")
+    print(f"{'':<26}{'upsert/request':>16}{'sync on change':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, service in (("before", PerRequestUpsert), ("after", UserService)):
+            app, ids = await build_app(
+                database_url=f"sqlite+aiosqlite:///{Path(tmp) / f'{label}.db'}",
+                user_service=service(),
+            )
+            urls = {
+                "GET /permissions/check": (
+                    f"/api/permissions/check?user_id={BENCH_USER_ID}"
+                    f"&agent_id={ids['agent_id']}&action=access"
+                ),
+                "GET /users/{id}/agents": f"/api/users/{BENCH_USER_ID}/agents",
+            }
+            for name, url in urls.items():
+                results[name, label] = await _requests_per_second(app, url, token)
+            await app.state.db_engine.dispose()
+
+    for name in urls:
+        print(
+            f"{name:<26}{results[name, 'before']:>12.0f} r/s"
+            f"{results[name, 'after']:>12.0f} r/s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
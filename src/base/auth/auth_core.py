@@ -1,17 +1,18 @@
-# Authentication infrastructure: JWT validation, JWKS fetching, and
+# Authentication infrastructure: JWT validation, JWKS provider, and
 # token-level role/scope checks.  Everything here reads from the token
 # only — no database access.  Domain-level authorization (group
 # membership checks, etc.) lives in src/domain/auth/.
 
 import logging
 import os
-from functools import lru_cache
 from typing import Any
 
-import requests
 from dotenv import load_dotenv
 from jose import JWTError, jwt
 
+from src.base.auth.jwks_provider import JWKSProvider
+from src.base.auth.signing_keys import SIGNING_ALGORITHM
+from src.base.auth.verification_pool import VerificationPool
 from src.base.models.role import Role
 
 # --- Env setup ---
@@ -23,14 +24,27 @@ if not TENANT_ID or not CLIENT_ID:
     raise RuntimeError("AZURE_TENANT_ID and AZURE_CLIENT_ID must be set")
 
 ISSUER = f"https://sts.windows.net/{TENANT_ID}/"
-JWKS_URL = f"https://login.microsoftonline.com/{TENANT_ID}/discovery/v2.0/keys"
+JWKS_URL = (
+    os.getenv("JWKS_URL")
+    or f"https://login.microsoftonline.com/{TENANT_ID}/discovery/v2.0/keys"
+)
 
 logger = logging.getLogger(__name__)
 
+# Signature verification mode: "inline" runs RS256 checks on the event loop,
+# "thread" offloads them to a bounded thread pool.
+JWT_VERIFY_MODE = os.getenv("JWT_VERIFY_MODE", "inline").lower()
+JWT_VERIFY_MAX_WORKERS = int(os.getenv("JWT_VERIFY_MAX_WORKERS", "4"))
+
+# Started and stopped by the app lifespan
+jwks_provider = JWKSProvider(JWKS_URL)
+verification_pool: VerificationPool | None = (
+    VerificationPool(JWT_VERIFY_MAX_WORKERS) if JWT_VERIFY_MODE == "thread" else None
+)
+
 
-@lru_cache(maxsize=1)
 def get_jwks() -> dict[str, Any]:
-    return requests.get(JWKS_URL).json()
+    return jwks_provider.jwks
 
 
 def validate_jwt_token(token: str) -> dict[str, Any]:
@@ -40,19 +54,22 @@ def validate_jwt_token(token: str) -> dict[str, Any]:
     logger.debug("Starting JWT token validation")
 
     try:
-        jwks = get_jwks()
         unverified_header = jwt.get_unverified_header(token)
 
         kid = unverified_header.get("kid")
         logger.debug(f"Token key ID: {kid}")
 
-        key = next((k for k in jwks["keys"] if k["kid"] == kid), None)
-        if not key:
+        key = jwks_provider.keys.get(kid)
+        if key is None:
             logger.error(f"No matching signing key found for kid: {kid}")
             raise JWTError("Invalid signing key")
 
         payload = jwt.decode(
-            token, key, algorithms=["RS256"], audience=CLIENT_ID, issuer=ISSUER
+            token,
+            key,
+            algorithms=[SIGNING_ALGORITHM],
+            audience=CLIENT_ID,
+            issuer=ISSUER,
         )
 
         logger.info("JWT validated successfully")
@@ -67,6 +84,26 @@ def validate_jwt_token(token: str) -> dict[str, Any]:
         raise JWTError(f"Token validation error: {e}") from e
 
 
+async def validate_jwt_token_async(token: str) -> dict[str, Any]:
+    """
+    Like validate_jwt_token, but first refetches the JWKS (rate limited) when
+    the token's kid is unknown, so key rotations are picked up without a restart.
+    In "thread" verify mode the signature check runs on the verification pool.
+    """
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except JWTError as e:
+        logger.error(f"JWT validation failed: {e}")
+        raise
+
+    if not jwks_provider.has_kid(kid):
+        await jwks_provider.refresh_for_kid(kid)
+
+    if verification_pool is not None:
+        return await verification_pool.run(validate_jwt_token, token)
+    return validate_jwt_token(token)
+
+
 def check_roles_and_scopes(
     user_roles: list[str],
     user_scopes: list[str],
@@ -0,0 +1,168 @@
+# Non-blocking JWKS provider: loads the signing keys at startup, refreshes
+# them in the background on a schedule, and refetches once (rate limited)
+# when a token arrives with a `kid` that isn't in the current key set —
+# which is what happens right after Entra ID rotates its keys.
+#
+# The source can be an http(s) URL or a local JWKS file (plain path or
+# file:// URL), which keeps the provider testable without network access.
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+
+from src.base.auth.signing_keys import SigningKeyRegistry
+
+logger = logging.getLogger(__name__)
+
+JWKS_REFRESH_INTERVAL_SECONDS = float(
+    os.getenv("JWKS_REFRESH_INTERVAL_SECONDS", "3600")
+)
+JWKS_MIN_REFETCH_INTERVAL_SECONDS = float(
+    os.getenv("JWKS_MIN_REFETCH_INTERVAL_SECONDS", "30")
+)
+JWKS_FETCH_TIMEOUT_SECONDS = float(os.getenv("JWKS_FETCH_TIMEOUT_SECONDS", "5"))
+
+
+class JWKSProvider:
+    """Holds the current JWKS and keeps it fresh without blocking the event loop."""
+
+    def __init__(
+        self,
+        source: str,
+        refresh_interval: float = JWKS_REFRESH_INTERVAL_SECONDS,
+        min_refetch_interval: float = JWKS_MIN_REFETCH_INTERVAL_SECONDS,
+        timeout: float = JWKS_FETCH_TIMEOUT_SECONDS,
+    ):
+        self._source = source
+        self._refresh_interval = refresh_interval
+        self._min_refetch_interval = min_refetch_interval
+        self._timeout = timeout
+        self._jwks: dict[str, Any] = {"keys": []}
+        self._keys = SigningKeyRegistry()
+        self._last_fetch: float | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def jwks(self) -> dict[str, Any]:
+        """The most recently loaded JWKS document."""
+        return self._jwks
+
+    @property
+    def keys(self) -> SigningKeyRegistry:
+        """Pre-parsed public keys of the current JWKS, indexed by kid."""
+        return self._keys
+
+    def has_kid(self, kid: str | None) -> bool:
+        return kid in self._keys
+
+    async def start(self) -> None:
+        """Load the keys and start the background refresh. Call once at startup.
+
+        A failed initial load is logged, not raised: the first token with an
+        unknown kid will trigger another fetch.
+        """
+        if self._is_http():
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self._timeout)
+            )
+        try:
+            await self.refresh()
+        except Exception:
+            logger.error("Initial JWKS load failed", exc_info=True)
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop the background refresh and release the HTTP session."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def refresh(self) -> None:
+        """Fetch the JWKS from the source and swap it in."""
+        self._last_fetch = time.monotonic()
+        jwks = await self._fetch()
+        keys = jwks.get("keys")
+        if not isinstance(keys, list):
+            raise ValueError("JWKS document has no 'keys' list")
+
+        registry = SigningKeyRegistry.from_jwks(jwks)
+        # Single attribute assignments: readers see either the old or the
+        # new key set, never a mix.
+        self._keys = registry
+        self._jwks = jwks
+        logger.info("Loaded JWKS with %d signing keys", len(registry))
+
+    async def refresh_for_kid(self, kid: str | None) -> bool:
+        """Refetch the JWKS once because a token carried an unknown kid.
+
+        Refetches are rate limited to one per `min_refetch_interval` so a
+        flood of tokens with bogus kids cannot hammer the identity provider.
+        Returns True if the kid is known afterwards.
+        """
+        if self.has_kid(kid):
+            return True
+
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited
+            if self.has_kid(kid):
+                return True
+
+            if (
+                self._last_fetch is not None
+                and time.monotonic() - self._last_fetch < self._min_refetch_interval
+            ):
+                logger.warning("Unknown kid %s; JWKS refetch rate limited", kid)
+                return False
+
+            logger.info("Unknown kid %s; refetching JWKS", kid)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.error("JWKS refetch failed", exc_info=True)
+                return False
+
+        return self.has_kid(kid)
+
+    # ------------------------
+    # Internal helpers
+    # ------------------------
+    def _is_http(self) -> bool:
+        return self._source.startswith(("http://", "https://"))
+
+    async def _fetch(self) -> dict[str, Any]:
+        if not self._is_http():
+            path = Path(self._source.removeprefix("file://"))
+            text = await asyncio.to_thread(path.read_text)
+            return json.loads(text)
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self._timeout)
+            )
+        async with self._session.get(self._source) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                async with self._lock:
+                    await self.refresh()
+            except Exception:
+                logger.warning("Scheduled JWKS refresh failed", exc_info=True)
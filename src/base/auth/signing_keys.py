@@ -0,0 +1,49 @@
+# Pre-parsed JWT signing keys indexed by kid.  Each JWK is turned into a
+# ready-to-use jose public key object once, when the JWKS is loaded, so
+# token validation is a dict lookup plus the signature check instead of a
+# linear scan and an RSA key construction per token.
+
+import logging
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from jose import jwk
+from jose.backends.base import Key
+
+logger = logging.getLogger(__name__)
+
+SIGNING_ALGORITHM = "RS256"
+
+
+class SigningKeyRegistry(Mapping[str, Key]):
+    """Immutable kid -> public key mapping built from a JWKS document.
+
+    A new registry is built for every JWKS load and swapped in as a whole,
+    so readers never observe a partially updated key set.
+    """
+
+    def __init__(self, keys: dict[str, Key] | None = None):
+        self._keys = dict(keys or {})
+
+    @classmethod
+    def from_jwks(cls, jwks: dict[str, Any]) -> "SigningKeyRegistry":
+        """Parse every usable key in a JWKS document. Unparseable keys are skipped."""
+        keys: dict[str, Key] = {}
+        for entry in jwks.get("keys", []):
+            kid = entry.get("kid")
+            if not kid:
+                continue
+            try:
+                keys[kid] = jwk.construct(entry, SIGNING_ALGORITHM)
+            except Exception:
+                logger.warning("Skipping unparseable JWKS key kid=%s", kid)
+        return cls(keys)
+
+    def __getitem__(self, kid: str) -> Key:
+        return self._keys[kid]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
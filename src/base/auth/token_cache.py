@@ -0,0 +1,60 @@
+# Verified-claims cache: remembers the claims of bearer tokens that have
+# already passed full signature validation, so repeated requests with the
+# same token skip the RS256 check.  Entries are keyed by a SHA-256 digest
+# of the raw token (the token itself is never stored) and expire at the
+# token's `exp` minus a leeway, so an expired token always goes through
+# full validation again and gets the proper ExpiredSignatureError.
+
+import hashlib
+import logging
+import os
+from typing import Any
+
+from src.base.utils.expiring_lru_cache import ExpiringLRUCache
+
+logger = logging.getLogger(__name__)
+
+JWT_CACHE_MAX_SIZE = int(os.getenv("JWT_CACHE_MAX_SIZE", "10000"))
+JWT_CACHE_LEEWAY_SECONDS = int(os.getenv("JWT_CACHE_LEEWAY_SECONDS", "30"))
+
+
+class VerifiedTokenCache:
+    """Bounded LRU cache of verified JWT claims keyed by token digest."""
+
+    def __init__(
+        self,
+        max_size: int = JWT_CACHE_MAX_SIZE,
+        leeway_seconds: int = JWT_CACHE_LEEWAY_SECONDS,
+        cache: ExpiringLRUCache | None = None,
+    ):
+        self._leeway = leeway_seconds
+        self._cache = cache if cache is not None else ExpiringLRUCache(max_size)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        """Return previously verified claims for this token, or None."""
+        return self._cache.get(self._digest(token))
+
+    def put(self, token: str, claims: dict[str, Any]) -> None:
+        """Remember verified claims until the token's exp minus the leeway.
+
+        Tokens without a numeric `exp` claim are never cached.
+        """
+        exp = claims.get("exp")
+        if not isinstance(exp, int | float):
+            return
+        self._cache.set(self._digest(token), claims, expires_at=exp - self._leeway)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        return self._cache.stats()
+
+
+# Process-wide instance shared by the HTTP middleware and WebSocket auth.
+token_cache = VerifiedTokenCache()
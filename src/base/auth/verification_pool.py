@@ -0,0 +1,63 @@
+# Bounded thread pool for JWT signature verification.  RSA verification is
+# CPU-bound and would otherwise run on the event loop, stalling every other
+# coroutine on the worker.  A semaphore caps how many verifications run at
+# once; callers beyond the cap wait on the event loop (and can be cancelled)
+# instead of piling up in the executor's unbounded internal queue.
+
+import asyncio
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class VerificationPool:
+    """Runs blocking verification calls in a bounded thread pool with metrics."""
+
+    def __init__(self, max_workers: int):
+        if max_workers <= 0:
+            raise ValueError("max_workers must be positive")
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="jwt-verify"
+        )
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.completed = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the pool, waiting for a free slot if needed."""
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("JWT verification pool stopped. stats=%s", self.stats())
+
+    def stats(self) -> dict[str, int]:
+        """Return queue depth (waiting), in-flight and completed counters."""
+        return {
+            "max_workers": self._max_workers,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+        }
@@ -7,16 +7,20 @@ import logging
 from fastapi import WebSocket, WebSocketException, status
 from jose import ExpiredSignatureError, JWTError
 
-from src.base.auth.auth_core import check_roles_and_scopes, validate_jwt_token
+from src.base.auth.auth_core import check_roles_and_scopes, validate_jwt_token_async
+from src.base.auth.token_cache import token_cache
 from src.base.models.role import Role
 from src.base.models.user import User
 
 logger = logging.getLogger(__name__)
 
 
-def authenticate_websocket(websocket: WebSocket, token: str = None):
+async def authenticate_websocket(websocket: WebSocket, token: str = None):
     """
     Authenticate WebSocket connection and return claims.
+
+    Tokens are verified as in the HTTP middleware: through the verified-token
+    cache, refetching the JWKS when the kid is unknown.
     """
     token = token or websocket.query_params.get("token")
 
@@ -26,7 +30,10 @@ def authenticate_websocket(websocket: WebSocket, token: str = None):
         )
 
     try:
-        claims = validate_jwt_token(token)
+        claims = token_cache.get(token)
+        if claims is None:
+            claims = await validate_jwt_token_async(token)
+            token_cache.put(token, claims)
         return claims
     except ExpiredSignatureError as e:
         raise WebSocketException(
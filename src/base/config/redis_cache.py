@@ -1,9 +1,138 @@
+import asyncio
 import logging
+import uuid
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
 
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 
 logger = logging.getLogger(__name__)
 
+# Delete the lock only if we still own it; it may have expired and been
+# taken by another worker in the meantime.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Set the key only if its current value is ARGV[2] (or, with ARGV[1] == "1",
+# only if it does not exist). Returns 1 when the value was written.
+_COMPARE_AND_SET_SCRIPT = """
+local current = redis.call("GET", KEYS[1])
+if ARGV[1] == "1" then
+    if current then
+        return 0
+    end
+elseif current ~= ARGV[2] then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[3], "EX", ARGV[4])
+return 1
+"""
+
+# Write hash fields (ARGV[2..] as field, value pairs) and set the expiry to
+# ARGV[1] seconds only if the hash has none yet, so later writes never
+# extend it. Same effect as HSET + EXPIRE NX, which needs Redis 7.
+_HSET_WITH_TTL_SCRIPT = """
+redis.call("HSET", KEYS[1], unpack(ARGV, 2))
+if redis.call("TTL", KEYS[1]) < 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+# Patch fields of hash KEYS[1] with version ARGV[1], then INCR KEYS[2] and
+# return its new value. ARGV[2..] are field, value pairs; an empty value
+# deletes the field. Each patched field's version is kept in the hash as
+# "v:<field>", and a field already patched with a version at least as high
+# is left alone. A missing hash is not created, only the counter bumped.
+_HASH_PATCH_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    local version = tonumber(ARGV[1])
+    for i = 2, #ARGV, 2 do
+        local stamp = "v:" .. ARGV[i]
+        if tonumber(redis.call("HGET", KEYS[1], stamp) or "0") < version then
+            if ARGV[i + 1] == "" then
+                redis.call("HDEL", KEYS[1], ARGV[i])
+            else
+                redis.call("HSET", KEYS[1], ARGV[i], ARGV[i + 1])
+            end
+            redis.call("HSET", KEYS[1], stamp, version)
+        end
+    end
+end
+return redis.call("INCR", KEYS[2])
+"""
+
+# Rename KEYS[1] to KEYS[2], expiring in ARGV[2] seconds, if counter KEYS[3]
+# still reads ARGV[1] (a missing counter reads "0"); otherwise delete
+# KEYS[1]. Returns 1 when the key was renamed.
+_RENAME_IF_UNCHANGED_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+if (redis.call("GET", KEYS[3]) or "0") ~= ARGV[1] then
+    redis.call("DEL", KEYS[1])
+    return 0
+end
+redis.call("RENAME", KEYS[1], KEYS[2])
+redis.call("EXPIRE", KEYS[2], ARGV[2])
+return 1
+"""
+
+
+def _flatten_mapping(mapping: dict[str, str]) -> list[str]:
+    return [item for pair in mapping.items() for item in pair]
+
+
+class CachePipeline:
+    """Commands queued on a RedisCache.pipeline(), sent in one round-trip.
+
+    Every method is a no-op when Redis is None. After the block exits,
+    `results` holds the replies in queue order (empty if nothing ran).
+    """
+
+    def __init__(self, pipe: Pipeline | None):
+        self._pipe = pipe
+        self.queued = 0
+        self.results: list[Any] = []
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        if self._pipe is not None:
+            self._pipe.set(key, value, ex=ttl)
+            self.queued += 1
+
+    def hset_with_ttl(self, key: str, mapping: dict[str, str], ttl: int) -> None:
+        if self._pipe is not None and mapping:
+            self._pipe.eval(
+                _HSET_WITH_TTL_SCRIPT, 1, key, ttl, *_flatten_mapping(mapping)
+            )
+            self.queued += 1
+
+    def hmget(self, key: str, fields: list[str]) -> None:
+        if self._pipe is not None:
+            self._pipe.hmget(key, fields)
+            self.queued += 1
+
+    def incr(self, key: str) -> None:
+        if self._pipe is not None:
+            self._pipe.incr(key)
+            self.queued += 1
+
+    def delete(self, *keys: str) -> None:
+        if self._pipe is not None and keys:
+            self._pipe.delete(*keys)
+            self.queued += 1
+
+    def publish(self, channel: str, message: str) -> None:
+        if self._pipe is not None:
+            self._pipe.publish(channel, message)
+            self.queued += 1
+
 
 class RedisCache:
     """Thin wrapper around redis.asyncio.Redis providing safe cache operations.
@@ -15,6 +144,11 @@ class RedisCache:
     def __init__(self, redis_client: Redis | None = None):
         self._redis = redis_client
 
+    @property
+    def enabled(self) -> bool:
+        """True when a Redis client is configured."""
+        return self._redis is not None
+
     async def get(self, key: str) -> str | None:
         if not self._redis:
             return None
@@ -32,6 +166,225 @@ class RedisCache:
         except Exception:
             logger.warning("Redis cache write failed", exc_info=True)
 
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        """Read many keys in one round-trip. Missing keys (or errors) yield None."""
+        if not self._redis or not keys:
+            return [None] * len(keys)
+        try:
+            return await self._redis.mget(keys)
+        except Exception:
+            logger.warning("Redis cache multi-read failed", exc_info=True)
+            return [None] * len(keys)
+
+    async def mget_counters(self, keys: list[str]) -> list[int] | None:
+        """Read counters in one round-trip; unset counters read as 0.
+
+        Returns None on error, unlike mget, so callers can tell a failed read
+        from counters never bumped. All 0 when Redis is None.
+        """
+        if not self._redis or not keys:
+            return [0] * len(keys)
+        try:
+            values = await self._redis.mget(keys)
+        except Exception:
+            logger.warning("Redis counter read failed", exc_info=True)
+            return None
+        return [int(value or 0) for value in values]
+
+    async def mset_with_ttl(self, mapping: dict[str, str], ttl: int) -> None:
+        """Write many keys with the same TTL in one pipelined round-trip."""
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ttl)
+
+    async def hget(self, key: str, field: str) -> str | None:
+        if not self._redis:
+            return None
+        try:
+            return await self._redis.hget(key, field)
+        except Exception:
+            logger.warning("Redis cache hash read failed", exc_info=True)
+            return None
+
+    async def hmget(self, key: str, fields: list[str]) -> list[str | None]:
+        """Read many fields of one hash. Missing fields (or errors) yield None."""
+        if not self._redis or not fields:
+            return [None] * len(fields)
+        try:
+            return await self._redis.hmget(key, fields)
+        except Exception:
+            logger.warning("Redis cache hash multi-read failed", exc_info=True)
+            return [None] * len(fields)
+
+    async def hset_with_ttl(self, key: str, mapping: dict[str, str], ttl: int) -> None:
+        """Write hash fields; the hash expires `ttl` seconds after it was created.
+
+        Later writes do not extend the expiry, so no field outlives `ttl`.
+        """
+        if not self._redis or not mapping:
+            return
+        try:
+            await self._redis.eval(
+                _HSET_WITH_TTL_SCRIPT, 1, key, ttl, *_flatten_mapping(mapping)
+            )
+        except Exception:
+            logger.warning("Redis cache hash write failed for %s", key, exc_info=True)
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        """Read every field of a hash. A missing hash (or an error) yields {}."""
+        if not self._redis:
+            return {}
+        try:
+            return await self._redis.hgetall(key)
+        except Exception:
+            logger.warning("Redis cache hash read failed for %s", key, exc_info=True)
+            return {}
+
+    async def hash_patch(
+        self, key: str, version: int, mapping: dict[str, str | None], counter: str
+    ) -> None:
+        """Atomically patch fields of an existing hash and bump `counter`.
+
+        A None value deletes the field. Fields are only written if not
+        already patched with a version >= `version` (tracked in the hash as
+        "v:<field>"), so patches applied out of order keep the newest value.
+        A missing hash stays missing; `counter` is bumped either way.
+        """
+        if not self._redis:
+            return
+        try:
+            await self._redis.eval(
+                _HASH_PATCH_SCRIPT,
+                2,
+                key,
+                counter,
+                version,
+                *(
+                    item
+                    for field, value in mapping.items()
+                    for item in (field, value or "")
+                ),
+            )
+        except Exception:
+            logger.warning("Redis hash patch failed for %s", key, exc_info=True)
+
+    async def rename_if_unchanged(
+        self, source: str, key: str, ttl: int, counter: str, expected: int
+    ) -> bool:
+        """Atomically move `source` to `key` (expiring in `ttl` seconds) if
+        `counter` still reads `expected`; otherwise delete `source`.
+
+        Returns True if `key` was replaced; False on a mismatch, when Redis
+        is None, or on error.
+        """
+        if not self._redis:
+            return False
+        try:
+            renamed = await self._redis.eval(
+                _RENAME_IF_UNCHANGED_SCRIPT, 3, source, key, counter, expected, ttl
+            )
+        except Exception:
+            logger.warning("Redis rename failed for %s", key, exc_info=True)
+            return False
+        return bool(renamed)
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[CachePipeline]:
+        """Queue commands and send them in one round-trip when the block exits.
+
+        With `transaction=True` they run atomically (MULTI/EXEC). Failures on
+        send are logged, not raised; an exception inside the block discards
+        the queued commands.
+        """
+        pipe = self._redis.pipeline(transaction=transaction) if self._redis else None
+        batch = CachePipeline(pipe)
+        try:
+            yield batch
+        except BaseException:
+            if pipe is not None:
+                await pipe.reset()
+            raise
+        if pipe is None or not batch.queued:
+            return
+        try:
+            batch.results = await pipe.execute()
+        except Exception:
+            logger.warning("Redis pipeline failed", exc_info=True)
+
+    async def incr(self, key: str) -> int | None:
+        """Atomically increment a counter. Returns the new value, or None."""
+        if not self._redis:
+            return None
+        try:
+            return await self._redis.incr(key)
+        except Exception:
+            logger.warning("Redis cache incr failed for %s", key, exc_info=True)
+            return None
+
+    async def set_if_absent(self, key: str, value: str) -> bool:
+        """Set a key with no expiry unless it exists (SET NX).
+
+        Returns True if the value was written; False if the key exists, when
+        Redis is None, or on error.
+        """
+        if not self._redis:
+            return False
+        try:
+            return bool(await self._redis.set(key, value, nx=True))
+        except Exception:
+            logger.warning("Redis cache write failed for %s", key, exc_info=True)
+            return False
+
+    async def compare_and_set(
+        self, key: str, expected: str | None, value: str, ttl: int
+    ) -> bool:
+        """Atomically replace `key` only if it still holds `expected`.
+
+        `expected=None` means the key must not exist. Returns True if the
+        value was written; False on a mismatch, when Redis is None, or on error.
+        """
+        if not self._redis:
+            return False
+        try:
+            written = await self._redis.eval(
+                _COMPARE_AND_SET_SCRIPT,
+                1,
+                key,
+                "1" if expected is None else "0",
+                expected or "",
+                value,
+                ttl,
+            )
+        except Exception:
+            logger.warning("Redis compare-and-set failed for %s", key, exc_info=True)
+            return False
+        return bool(written)
+
+    async def acquire_lock(self, key: str, ttl_ms: int) -> str | None:
+        """Try to take a short-lived lock (SET NX PX).
+
+        Returns a token to pass to release_lock, or None if the lock is held
+        elsewhere, Redis is None, or the call failed.
+        """
+        if not self._redis:
+            return None
+        token = uuid.uuid4().hex
+        try:
+            if await self._redis.set(key, token, nx=True, px=ttl_ms):
+                return token
+        except Exception:
+            logger.warning("Redis lock acquire failed for %s", key, exc_info=True)
+        return None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """Release a lock, but only if it is still held with `token`."""
+        if not self._redis:
+            return
+        try:
+            await self._redis.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+        except Exception:
+            logger.warning("Redis lock release failed for %s", key, exc_info=True)
+
     async def delete(self, *keys: str) -> None:
         if not self._redis or not keys:
             return
@@ -58,3 +411,49 @@ class RedisCache:
             logger.warning(
                 "Redis cache delete_pattern failed for %s", pattern, exc_info=True
             )
+
+    async def publish(self, channel: str, message: str) -> None:
+        """Publish a message on a pub/sub channel."""
+        if not self._redis:
+            return
+        try:
+            await self._redis.publish(channel, message)
+        except Exception:
+            logger.warning("Redis publish failed on %s", channel, exc_info=True)
+
+    async def listen(
+        self,
+        channel: str,
+        handler: Callable[[str], None],
+        on_subscribe: Callable[[], None] | None = None,
+        retry_delay: float = 1.0,
+    ) -> None:
+        """Call `handler` for every message on a channel until cancelled.
+
+        Reconnects after errors. `on_subscribe` runs after every (re)subscribe,
+        so callers can drop state that may have missed messages while the
+        subscription was down. Returns immediately when Redis is None.
+        """
+        if not self._redis:
+            return
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                if on_subscribe:
+                    on_subscribe()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        handler(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(
+                    "Redis subscription to %s failed; retrying", channel, exc_info=True
+                )
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(retry_delay)
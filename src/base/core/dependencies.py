@@ -1,10 +1,16 @@
 import logging
 from collections.abc import AsyncGenerator
 
-from fastapi import Depends, Request
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.base.models.user import User
+from src.base.utils.pagination import (
+    PAGE_SIZE_DEFAULT,
+    PAGE_SIZE_MAX,
+    PageRequest,
+    decode_cursor,
+)
 from src.domain.services.admin_service import AdminService
 from src.domain.services.agent_service import AgentService
 from src.domain.services.group_service import GroupService
@@ -45,21 +51,48 @@ def get_user_service(request: Request) -> UserService:
     return request.app.state.user_service
 
 
+def get_db_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """Return the app-level session factory, for work outside the request scope."""
+    return request.app.state.db_session_factory
+
+
 async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession]:
     """Yield a database session from the app-level session factory."""
     async with request.app.state.db_session_factory() as session:
         yield session
 
 
+def get_page_request(
+    limit: int | None = Query(None, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(None),
+) -> PageRequest | None:
+    """Read the `limit` and `cursor` query parameters of a listing.
+
+    Returns None when neither is given: the listing is returned whole.
+    """
+    if limit is None and cursor is None:
+        return None
+    try:
+        after = decode_cursor(cursor) if cursor is not None else 0
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from None
+    return PageRequest(limit=limit or PAGE_SIZE_DEFAULT, after=after)
+
+
 async def get_current_user(
     request: Request,
     session: AsyncSession = Depends(get_db_session),
     user_service: UserService = Depends(get_user_service),
 ) -> User:
-    """Read the authenticated user from request state and upsert into the DB."""
+    """Read the authenticated user from request state and sync it to the DB.
+
+    The users row is only written when the name or email in the token changed.
+    """
     user: User = request.state.user
 
-    await user_service.upsert_user(
+    await user_service.sync_user(
         session=session,
         entra_object_id=user.id,
         display_name=user.name or "",
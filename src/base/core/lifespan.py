@@ -4,12 +4,17 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 import src.domain.models.entities  # noqa: F401 — register ORM models with Base.metadata
+from src.base.auth import auth_core
 from src.base.config.database import close_db, init_db
 from src.base.config.logging_config import LoggingConfig
 from src.base.config.redis import close_redis, init_redis
 from src.base.config.redis_cache import RedisCache
 from src.domain.services.admin_service import AdminService
 from src.domain.services.agent_service import AgentService
+from src.domain.services.authorization_graph import (
+    AUTHZ_GRAPH_ENABLED,
+    AuthorizationGraph,
+)
 from src.domain.services.group_service import GroupService
 from src.domain.services.membership_service import MembershipService
 from src.domain.services.permission_service import PermissionService
@@ -28,6 +33,9 @@ async def lifespan(app: FastAPI):
         await LoggingConfig.splunk_handler.start()
         logger.info("Splunk HEC handler started.")
 
+    # Load JWKS signing keys and start background refresh
+    await auth_core.jwks_provider.start()
+
     # Initialize database
     engine, session_factory = await init_db()
     app.state.db_engine = engine
@@ -44,12 +52,35 @@ async def lifespan(app: FastAPI):
     app.state.agent_service = AgentService()
     app.state.group_service = GroupService()
     app.state.membership_service = MembershipService()
-    app.state.permission_service = PermissionService(cache)
+    graph = None
+    if AUTHZ_GRAPH_ENABLED and not cache.enabled:
+        # Other workers' changes only reach the graph via Redis pub/sub
+        logger.warning(
+            "AUTHZ_GRAPH_ENABLED is set but Redis is not configured; "
+            "the authorization graph is disabled"
+        )
+    elif AUTHZ_GRAPH_ENABLED:
+        graph = AuthorizationGraph(session_factory)
+        await graph.start()
+    app.state.authorization_graph = graph
+    app.state.permission_service = PermissionService(cache, graph=graph)
     app.state.user_service = UserService()
 
+    await app.state.permission_service.start()
+
     logger.info("Services initialized.")
     yield  # --- Application runs here ---
 
+    # Shutdown: stop JWKS background refresh and verification threads
+    await auth_core.jwks_provider.stop()
+    if auth_core.verification_pool:
+        auth_core.verification_pool.shutdown()
+
+    # Shutdown: stop cache invalidation listener and graph resync
+    await app.state.permission_service.stop()
+    if app.state.authorization_graph:
+        await app.state.authorization_graph.stop()
+
     # Shutdown: close Redis connection
     await close_redis(app.state.redis_client)
 
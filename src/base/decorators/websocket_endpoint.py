@@ -38,7 +38,7 @@ def websocket_endpoint(
             try:
                 # Public WS doesn't require auth
                 if not public:
-                    claims = authenticate_websocket(websocket)
+                    claims = await authenticate_websocket(websocket)
 
                     # Create user object consistent with HTTP middleware
                     user = User(
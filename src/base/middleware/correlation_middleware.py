@@ -1,8 +1,8 @@
 import logging
 import uuid
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.base.middleware.request_context import (
     reset_request_context,
@@ -10,15 +10,22 @@ from src.base.middleware.request_context import (
 )
 
 
-class CorrelationMiddleware(BaseHTTPMiddleware):
-    """Middleware to add correlation ID to each request for better log tracing."""
+class CorrelationMiddleware:
+    """Pure ASGI middleware to add correlation ID to each request for better log tracing."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # Reset context for this request
         reset_request_context()
 
         # Get correlation ID from header or generate new one
-        correlation_id_value = request.headers.get(
+        correlation_id_value = Headers(scope=scope).get(
             "x-correlation-id", str(uuid.uuid4())
         )
 
@@ -27,10 +34,12 @@ class CorrelationMiddleware(BaseHTTPMiddleware):
         logger = logging.getLogger(__name__)
         logger.info("Assigned correlation ID to request")
 
-        # Process request
-        response: Response = await call_next(request)
+        async def send_with_correlation_id(message: Message) -> None:
+            # Add correlation ID to response headers
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["x-correlation-id"] = correlation_id_value
+            await send(message)
 
-        # Add correlation ID to response headers
-        response.headers["x-correlation-id"] = correlation_id_value
-
-        return response
+        # Process request
+        await self.app(scope, receive, send_with_correlation_id)
@@ -3,27 +3,41 @@ import traceback
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
 
-class GlobalExceptionHandlerMiddleware(BaseHTTPMiddleware):
+class GlobalExceptionHandlerMiddleware:
     """
-    Middleware that globally handles exceptions and formats responses in ProblemDetails style.
+    Pure ASGI middleware that globally handles exceptions and formats responses in ProblemDetails style.
     """
 
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-    async def dispatch(self, request: Request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_tracking_start)
 
         except Exception as ex:
-            return await self._handle_exception(request, ex)
+            # Too late to replace the response once headers have been sent
+            if response_started:
+                raise
+            response = await self._handle_exception(Request(scope), ex)
+            await response(scope, receive, send)
 
     # ------------------------
     # Internal helpers
@@ -1,12 +1,14 @@
 import logging
+import os
 import re
 
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from jose import ExpiredSignatureError, JWTError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from src.base.auth.auth_core import validate_jwt_token
+from src.base.auth.auth_core import validate_jwt_token_async
+from src.base.auth.token_cache import token_cache
 from src.base.middleware.request_context import set_request_context
 from src.base.models.role import Role
 from src.base.models.user import User
@@ -26,19 +28,45 @@ WHITELIST = [
     r"^/api/health",
 ]
 
+# Extra public-path regexes from configuration, whitespace separated
+WHITELIST_EXTRA = os.getenv("AUTH_WHITELIST_EXTRA", "").split()
 
-class JWTMiddleware(BaseHTTPMiddleware):
+
+def compile_whitelist(patterns: list[str]) -> re.Pattern[str]:
+    """Combine whitelist regexes into a single precompiled alternation."""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+# Built once at import time; an invalid configured pattern fails startup
+WHITELIST_MATCHER = compile_whitelist(WHITELIST + WHITELIST_EXTRA)
+
+
+def is_whitelisted(path: str) -> bool:
+    """Return True if the path does not require authentication."""
+    return WHITELIST_MATCHER.match(path) is not None
+
+
+class JWTMiddleware:
     """
-    Middleware to validate JWT on every HTTP request.
+    Pure ASGI middleware to validate JWT on every HTTP request.
     """
 
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
         path = request.url.path
         method = request.method
 
-        if any(re.match(pattern, path) for pattern in WHITELIST):
+        if is_whitelisted(path):
             logger.debug(f"Skipping auth for whitelisted path: {method} {path}")
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         logger.info(f"Authenticating request: {method} {path}")
 
@@ -47,16 +75,23 @@ class JWTMiddleware(BaseHTTPMiddleware):
             logger.warning(
                 f"Missing or invalid Authorization header for: {method} {path}"
             )
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Missing or invalid Authorization header"},
             )
+            await response(scope, receive, send)
+            return
 
         token = auth_header[len("Bearer ") :]
         logger.debug("JWT token extracted from Authorization header")
 
         try:
-            claims = validate_jwt_token(token)
+            claims = token_cache.get(token)
+            if claims is None:
+                claims = await validate_jwt_token_async(token)
+                token_cache.put(token, claims)
+            else:
+                logger.debug("JWT claims served from verified-token cache")
 
             roles = claims.get("roles", [])
 
@@ -76,15 +111,19 @@ class JWTMiddleware(BaseHTTPMiddleware):
 
         except ExpiredSignatureError:
             logger.warning(f"JWT token expired for: {method} {path}")
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Token has expired"},
             )
+            await response(scope, receive, send)
+            return
         except JWTError as e:
             logger.error(f"JWT validation failed for {method} {path}: {e}")
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Invalid token"},
             )
+            await response(scope, receive, send)
+            return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
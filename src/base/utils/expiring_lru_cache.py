@@ -0,0 +1,99 @@
+"""
+Bounded in-process cache with per-entry expiry and LRU eviction
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class ExpiringLRUCache:
+    """Size-capped mapping where every entry carries its own expiry time.
+
+    Expired entries are dropped lazily on read; when the cache is full the
+    least recently used entry is evicted. Not thread-safe — intended to be
+    used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self._max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        *,
+        ttl: float | None = None,
+        expires_at: float | None = None,
+    ) -> None:
+        """Store a value until `expires_at` (absolute) or for `ttl` seconds."""
+        if expires_at is None:
+            if ttl is None:
+                raise ValueError("Either ttl or expires_at is required")
+            expires_at = self._clock() + ttl
+
+        if expires_at <= self._clock():
+            return
+
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """Remove a single entry if present."""
+        self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches the predicate. Returns the count."""
+        doomed = [key for key in self._entries if predicate(key)]
+        for key in doomed:
+            del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        """Remove all entries (counters are preserved)."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,40 @@
+"""
+Conditional GET with ETags (If-None-Match -> 304 Not Modified)
+"""
+
+from fastapi import Request, Response, status
+
+
+def etag_headers(etag: str | None) -> dict[str, str]:
+    """Headers for a response carrying `etag`.
+
+    The responses are per-user, so shared caches must not store them, and
+    clients must revalidate before each reuse.
+    """
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def etag_matches(request: Request, etag: str | None) -> bool:
+    """True if the request's If-None-Match lists `etag` or is "*".
+
+    Tags are compared weakly, as If-None-Match requires: a W/ prefix on
+    either side is ignored.
+    """
+    if etag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """An empty 304 response for a request whose If-None-Match matched."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag)
+    )
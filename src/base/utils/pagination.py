@@ -0,0 +1,64 @@
+"""
+Keyset (cursor) pagination over integer keys
+"""
+
+import base64
+import os
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from sqlalchemy import ColumnElement, Select
+
+# Page size when a request sends a cursor without a limit, and the largest
+# limit a request may ask for
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+
+
+@dataclass(frozen=True)
+class PageRequest:
+    """The `limit` rows following key `after` in ascending key order."""
+
+    limit: int
+    after: int = 0
+
+
+def encode_cursor(key: int) -> str:
+    """Return the opaque cursor for the page after `key`."""
+    return base64.urlsafe_b64encode(str(key).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the key encoded in `cursor`.
+
+    Raises ValueError("invalid_cursor") if it was not made by encode_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except ValueError:  # bad base64, not UTF-8, or not an integer
+        raise ValueError("invalid_cursor") from None
+
+
+def keyset(stmt: Select, key: ColumnElement[int], page: PageRequest) -> Select:
+    """Restrict `stmt` to the requested page, ordered by `key`.
+
+    Selects one row more than the limit so split_page can tell whether
+    another page follows. `key` should lead an index usable with the
+    statement's filters, so each page is an index range scan however deep
+    it is.
+    """
+    return stmt.where(key > page.after).order_by(key).limit(page.limit + 1)
+
+
+def split_page[T](
+    rows: Sequence[T], page: PageRequest, key: Callable[[T], int]
+) -> tuple[list[T], str | None]:
+    """Trim the rows of a keyset() statement to the page.
+
+    Returns the page and the cursor of the next one, None on the last page.
+    """
+    if len(rows) <= page.limit:
+        return list(rows), None
+    rows = list(rows[: page.limit])
+    return rows, encode_cursor(key(rows[-1]))
@@ -0,0 +1,62 @@
+"""
+Per-key coalescing of concurrent async computations
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time within the event loop.
+
+    The first caller for a key (the leader) runs the computation; callers that
+    arrive while it is in flight await the leader's result (or exception)
+    instead of starting their own. If the leader is cancelled, waiting callers
+    retry and one of them becomes the new leader.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do[T](self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return `await fn()`, sharing one in-flight call per key."""
+        while (future := self._calls.get(key)) is not None:
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this caller was cancelled, not the leader
+                continue
+            self.shared += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, int]:
+        """Return leader/shared counters and the number of calls in flight."""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "shared": self.shared,
+        }
@@ -1,7 +1,8 @@
 # Domain-level authorization dependencies: enforce business rules like
 # "user must be a superadmin" or "user must be an admin of this group".
 # Unlike base/auth/ (which only reads JWT claims), these guards may
-# query the database (e.g. group_memberships) to make access decisions.
+# query the database (e.g. group_memberships) to make access decisions;
+# group roles are read through PermissionService's caches.
 #
 # Token-level checks (Entra ID roles/scopes) live in
 # src/base/auth/rbac.py.
@@ -9,13 +10,12 @@
 import logging
 
 from fastapi import Depends, HTTPException, Request, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.base.core.dependencies import get_db_session
+from src.base.core.dependencies import get_db_session, get_permission_service
 from src.base.models.user import User
 from src.domain.models.entities.enums import GroupRole
-from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.services.permission_service import PermissionService
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +46,7 @@ def require_group_admin(group_id_param: str = "group_id"):
     async def dependency(
         request: Request,
         session: AsyncSession = Depends(get_db_session),
+        permission_service: PermissionService = Depends(get_permission_service),
     ) -> User:
         user: User | None = getattr(request.state, "user", None)
         if user is None:
@@ -64,16 +65,8 @@ def require_group_admin(group_id_param: str = "group_id"):
                 detail=f"Missing path parameter: {group_id_param}",
             )
 
-        result = await session.execute(
-            select(GroupMembership).where(
-                GroupMembership.entra_object_id == user.id,
-                GroupMembership.group_id == int(group_id),
-                GroupMembership.role == GroupRole.ADMIN,
-            )
-        )
-        membership = result.scalar_one_or_none()
-
-        if membership is None:
+        role = await permission_service.get_group_role(session, user.id, int(group_id))
+        if role != GroupRole.ADMIN:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Group admin access required",
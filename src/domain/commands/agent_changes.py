@@ -0,0 +1,48 @@
+"""
+Maintenance command for the agent_changes log behind delta sync.
+
+    uv run python -m src.domain.commands.agent_changes compact
+
+compact deletes entries older than AGENT_CHANGES_RETENTION_SECONDS; run it
+periodically (e.g. daily from cron). Clients holding an older sync token get
+a full resync. Uses DATABASE_URL.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from dotenv import load_dotenv
+
+import src.domain.models.entities  # noqa: F401 — register ORM models with Base.metadata
+from src.base.config.database import close_db, init_db
+from src.domain.services.agent_change_log_service import AgentChangeLogService
+
+
+async def _run(command: str) -> int:
+    engine, session_factory = await init_db()
+    try:
+        async with session_factory() as session:
+            count = await AgentChangeLogService().compact(session)
+    finally:
+        await close_db(engine)
+    print(f"agent_changes compacted: {count} entries deleted")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.domain.commands.agent_changes",
+        description="Compact the agent_changes log.",
+    )
+    parser.add_argument("command", choices=["compact"])
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_run(args.command)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Maintenance commands for the materialized user_agent_access table.
+
+    uv run python -m src.domain.commands.user_agent_access backfill
+    uv run python -m src.domain.commands.user_agent_access verify
+
+backfill rebuilds the table from group_memberships ⋈ group_agents; verify
+diffs the two and exits non-zero if they disagree. Both use DATABASE_URL.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from dotenv import load_dotenv
+
+import src.domain.models.entities  # noqa: F401 — register ORM models with Base.metadata
+from src.base.config.database import close_db, init_db
+from src.domain.services.user_agent_access_service import UserAgentAccessService
+
+# Differences printed by verify; the total is always reported
+MAX_REPORTED_DIFFERENCES = 50
+
+
+async def _run(command: str) -> int:
+    engine, session_factory = await init_db()
+    service = UserAgentAccessService()
+    try:
+        async with session_factory() as session:
+            if command == "backfill":
+                count = await service.backfill(session)
+                print(f"user_agent_access rebuilt: {count} rows")
+                return 0
+
+            differences = await service.diff(session)
+    finally:
+        await close_db(engine)
+
+    for difference in differences[:MAX_REPORTED_DIFFERENCES]:
+        print(difference)
+    if differences:
+        print(
+            f"user_agent_access differs from the live join on {len(differences)} rows"
+        )
+        return 1
+    print("user_agent_access matches the live join")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.domain.commands.user_agent_access",
+        description="Rebuild or verify the user_agent_access table.",
+    )
+    parser.add_argument("command", choices=["backfill", "verify"])
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_run(args.command)))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ class AdminAgentResponse(BaseModel):
 
 class AdminAgentListResponse(BaseModel):
     agents: list[AdminAgentResponse]
+    next_cursor: str | None = None
 
 
 class AdminGroupResponse(BaseModel):
@@ -33,6 +34,7 @@ class AdminGroupResponse(BaseModel):
 
 class AdminGroupListResponse(BaseModel):
     groups: list[AdminGroupResponse]
+    next_cursor: str | None = None
 
 
 class BulkUpdateAgentGroupsRequest(BaseModel):
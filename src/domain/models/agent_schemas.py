@@ -25,6 +25,7 @@ class AgentResponse(BaseModel):
 
 class AgentListResponse(BaseModel):
     agents: list[AgentResponse]
+    next_cursor: str | None = None
 
 
 class AgentGroupInfo(BaseModel):
@@ -47,3 +48,10 @@ class UserAgentResponse(BaseModel):
 
 class UserAgentListResponse(BaseModel):
     agents: list[UserAgentResponse]
+
+
+class UserAgentChangesResponse(BaseModel):
+    full_resync: bool
+    agents: list[UserAgentResponse]
+    removed: list[int]
+    next_token: str
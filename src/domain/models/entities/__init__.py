@@ -1,10 +1,21 @@
 # Import all ORM models here so Base.metadata registers them before create_all.
 # Add new models to this list as they are created.
 from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.agent_change import AgentChange
 from src.domain.models.entities.enums import GroupRole
 from src.domain.models.entities.group import Group
 from src.domain.models.entities.group_agent import GroupAgent
 from src.domain.models.entities.group_membership import GroupMembership
 from src.domain.models.entities.user import User
+from src.domain.models.entities.user_agent_access import UserAgentAccess
 
-__all__ = ["Agent", "Group", "GroupAgent", "GroupMembership", "GroupRole", "User"]
+__all__ = [
+    "Agent",
+    "AgentChange",
+    "Group",
+    "GroupAgent",
+    "GroupMembership",
+    "GroupRole",
+    "User",
+    "UserAgentAccess",
+]
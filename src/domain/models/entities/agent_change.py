@@ -0,0 +1,32 @@
+import datetime
+
+from sqlalchemy import Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.base.config.database import Base
+
+
+class AgentChange(Base):
+    """Change log behind delta sync of user agent lists: one row per agent
+    whose entry in a user's list may have changed (added, removed, or its
+    groups changed).
+
+    A NULL entra_object_id is the superadmin catalog instead of one user's
+    list; a NULL agent_id means the whole list changed (so clients resync).
+    Rows only mark what to re-read; the current state comes from the live
+    tables. Written by AgentChangeLogService in the same transaction as the change.
+    """
+
+    __tablename__ = "agent_changes"
+    __table_args__ = (
+        # A user's changes since a sync token
+        Index("ix_agent_changes_entra_object_id_id", "entra_object_id", "id"),
+        # Never reuse ids, even once compaction has emptied the table
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    entra_object_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    agent_id: Mapped[int | None] = mapped_column(nullable=True)
+    # Naive UTC, from the application clock: sync tokens are compared with it
+    created_at: Mapped[datetime.datetime] = mapped_column(index=True)
@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import Enum, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy import Enum, ForeignKey, Index, String, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.base.config.database import Base
@@ -9,7 +9,11 @@ from src.domain.models.entities.enums import GroupRole
 
 class GroupMembership(Base):
     __tablename__ = "group_memberships"
-    __table_args__ = (UniqueConstraint("entra_object_id", "group_id"),)
+    __table_args__ = (
+        UniqueConstraint("entra_object_id", "group_id"),
+        # Keyset pagination of a group's members
+        Index("ix_group_memberships_group_id_id", "group_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     entra_object_id: Mapped[str] = mapped_column(
@@ -0,0 +1,24 @@
+from sqlalchemy import Enum, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.base.config.database import Base
+from src.domain.models.entities.enums import GroupRole
+
+
+class UserAgentAccess(Base):
+    """Materialized group_memberships ⋈ group_agents: one row per agent a user
+    can reach, with their highest role across the groups that grant it.
+
+    Maintained by UserAgentAccessService in the same transaction as every
+    membership and assignment change.
+    """
+
+    __tablename__ = "user_agent_access"
+
+    entra_object_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.entra_object_id"), primary_key=True
+    )
+    agent_id: Mapped[int] = mapped_column(
+        ForeignKey("agents.id"), primary_key=True, index=True
+    )
+    best_role: Mapped[GroupRole] = mapped_column(Enum(GroupRole))
@@ -25,3 +25,4 @@ class GroupResponse(BaseModel):
 
 class GroupListResponse(BaseModel):
     groups: list[GroupResponse]
+    next_cursor: str | None = None
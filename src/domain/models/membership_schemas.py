@@ -26,3 +26,4 @@ class MemberResponse(BaseModel):
 
 class MemberListResponse(BaseModel):
     members: list[MemberResponse]
+    next_cursor: str | None = None
@@ -1,6 +1,8 @@
 from enum import Enum
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+MAX_BATCH_CHECKS = 500
 
 
 class PermissionAction(str, Enum):
@@ -11,3 +13,24 @@ class PermissionAction(str, Enum):
 class PermissionCheckResponse(BaseModel):
     allowed: bool
     role: str | None = None
+
+
+class PermissionCheckItem(BaseModel):
+    user_id: str = Field(..., min_length=1, max_length=36)
+    agent_id: int
+    action: PermissionAction
+
+
+class PermissionCheckBatchRequest(BaseModel):
+    checks: list[PermissionCheckItem] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_CHECKS
+    )
+
+
+class PermissionCheckBatchResult(PermissionCheckItem):
+    allowed: bool
+    role: str | None = None
+
+
+class PermissionCheckBatchResponse(BaseModel):
+    results: list[PermissionCheckBatchResult]
@@ -1,14 +1,20 @@
 import logging
+from collections.abc import AsyncIterator, Callable
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.base.core.dependencies import (
     get_admin_service,
     get_db_session,
+    get_db_session_factory,
+    get_page_request,
     get_permission_service,
 )
 from src.base.models.user import User
+from src.base.utils.pagination import PageRequest, split_page
 from src.domain.auth.authorization import require_superadmin
 from src.domain.models.admin_schemas import (
     AdminAgentListResponse,
@@ -24,27 +30,107 @@ from src.domain.services.permission_service import PermissionService
 router = APIRouter(prefix="/admin", tags=["Superadmin"])
 logger = logging.getLogger(__name__)
 
+NDJSON = "application/x-ndjson"
+NDJSON_RESPONSE = {200: {"content": {NDJSON: {}}}}
 
-@router.get("/agents", response_model=AdminAgentListResponse)
+
+def _ndjson_export(
+    request: Request,
+    page: PageRequest | None,
+    session_factory: async_sessionmaker[AsyncSession],
+    stream: Callable[[AsyncSession], AsyncIterator[dict]],
+    model: type[BaseModel],
+) -> StreamingResponse | None:
+    """Stream the listing as one JSON object per line if the client asked
+    for NDJSON; None otherwise."""
+    if NDJSON not in request.headers.get("accept", ""):
+        return None
+    if page is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit and cursor do not apply to NDJSON exports",
+        )
+
+    # The body is sent after the route returns, so the export reads
+    # through its own session rather than the request-scoped one
+    async def lines() -> AsyncIterator[str]:
+        async with session_factory() as session:
+            async for item in stream(session):
+                yield model(**item).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON)
+
+
+@router.get("/agents", response_model=AdminAgentListResponse, responses=NDJSON_RESPONSE)
 async def list_all_agents(
+    request: Request,
     user: User = Depends(require_superadmin),
     session: AsyncSession = Depends(get_db_session),
     service: AdminService = Depends(get_admin_service),
+    page: PageRequest | None = Depends(get_page_request),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
+    permission_service: PermissionService = Depends(get_permission_service),
 ):
-    """List all agents with their group assignments (superadmin only)."""
-    agents = await service.list_all_agents(session)
-    return AdminAgentListResponse(agents=[AdminAgentResponse(**a) for a in agents])
+    """List all agents with their group assignments (superadmin only).
+
+    Paginated by agent id when `limit` or `cursor` is given. With
+    `Accept: application/x-ndjson`, streams every agent as one line instead.
+    The full list is served from the agent catalog cache.
+    """
+    export = _ndjson_export(
+        request, page, session_factory, service.stream_all_agents, AdminAgentResponse
+    )
+    if export is not None:
+        return export
+
+    if page is None:
+        # The catalog may be rebuilt in the background, after this request's
+        # session is closed, so the loader opens its own
+        async def load() -> list[dict]:
+            async with session_factory() as load_session:
+                return await service.list_all_agents(load_session)
 
+        # Already rendered for the response (see cache_codec)
+        agents = await permission_service.get_agent_catalog(load)
+        return JSONResponse({"agents": agents, "next_cursor": None})
 
-@router.get("/groups", response_model=AdminGroupListResponse)
+    agents = await service.list_all_agents(session, page)
+    agents, next_cursor = split_page(agents, page, lambda a: a["id"])
+    return AdminAgentListResponse(
+        agents=[AdminAgentResponse(**a) for a in agents], next_cursor=next_cursor
+    )
+
+
+@router.get("/groups", response_model=AdminGroupListResponse, responses=NDJSON_RESPONSE)
 async def list_all_groups(
+    request: Request,
     user: User = Depends(require_superadmin),
     session: AsyncSession = Depends(get_db_session),
     service: AdminService = Depends(get_admin_service),
+    page: PageRequest | None = Depends(get_page_request),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
 ):
-    """List all groups with member counts (superadmin only)."""
-    groups = await service.list_all_groups_with_counts(session)
-    return AdminGroupListResponse(groups=[AdminGroupResponse(**g) for g in groups])
+    """List all groups with member counts (superadmin only).
+
+    Paginated by group id when `limit` or `cursor` is given. With
+    `Accept: application/x-ndjson`, streams every group as one line instead.
+    """
+    export = _ndjson_export(
+        request,
+        page,
+        session_factory,
+        service.stream_all_groups_with_counts,
+        AdminGroupResponse,
+    )
+    if export is not None:
+        return export
+    groups = await service.list_all_groups_with_counts(session, page)
+    next_cursor = None
+    if page is not None:
+        groups, next_cursor = split_page(groups, page, lambda g: g["id"])
+    return AdminGroupListResponse(
+        groups=[AdminGroupResponse(**g) for g in groups], next_cursor=next_cursor
+    )
 
 
 @router.put(
@@ -80,6 +166,10 @@ async def bulk_update_agent_groups(
             ) from None
         raise
 
-    await permission_service.invalidate_agent_permissions(agent_id)
+    # Only groups the agent joined or left change anyone's agent list
+    changed_group_ids = set(result.pop("previous_group_ids")) ^ set(body.group_ids)
+    await permission_service.invalidate_agent_assignment(
+        session, agent_id, changed_group_ids
+    )
 
     return BulkUpdateAgentGroupsResponse(agent=AdminAgentResponse(**result))
@@ -1,27 +1,30 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.base.core.dependencies import (
     get_agent_service,
     get_current_user,
     get_db_session,
+    get_db_session_factory,
+    get_page_request,
     get_permission_service,
 )
 from src.base.models.user import User
+from src.base.utils.http_cache import etag_headers, etag_matches, not_modified
+from src.base.utils.pagination import PageRequest, split_page
 from src.domain.auth.authorization import require_group_admin
 from src.domain.models.agent_schemas import (
     AgentListResponse,
     AgentResponse,
     AssignAgentToGroupRequest,
     RegisterAgentRequest,
+    UserAgentChangesResponse,
     UserAgentListResponse,
-    UserAgentResponse,
 )
 from src.domain.models.entities.enums import GroupRole
-from src.domain.models.entities.group_membership import GroupMembership
 from src.domain.models.group_schemas import GroupListResponse, GroupResponse
 from src.domain.services.agent_service import AgentService
 from src.domain.services.permission_service import PermissionService
@@ -45,6 +48,7 @@ ERROR_MAP = {
         status.HTTP_409_CONFLICT,
         "Agent is already assigned to this group",
     ),
+    "invalid_sync_token": (status.HTTP_400_BAD_REQUEST, "Invalid sync token"),
 }
 
 
@@ -65,6 +69,7 @@ async def register_agent(
     user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
     service: AgentService = Depends(get_agent_service),
+    permission_service: PermissionService = Depends(get_permission_service),
 ):
     """Register a new agent and assign it to a group.
 
@@ -72,14 +77,8 @@ async def register_agent(
     """
     # Authorize: user must be admin of the target group (or superadmin)
     if not user.is_superadmin:
-        result = await session.execute(
-            select(GroupMembership).where(
-                GroupMembership.entra_object_id == user.id,
-                GroupMembership.group_id == body.group_id,
-                GroupMembership.role == GroupRole.ADMIN,
-            )
-        )
-        if result.scalar_one_or_none() is None:
+        role = await permission_service.get_group_role(session, user.id, body.group_id)
+        if role != GroupRole.ADMIN:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Group admin access required",
@@ -96,6 +95,10 @@ async def register_agent(
     except ValueError as e:
         _handle_service_error(e)
 
+    await permission_service.invalidate_agent_assignment(
+        session, agent.id, [body.group_id]
+    )
+
     return AgentResponse.model_validate(agent)
 
 
@@ -123,7 +126,9 @@ async def assign_agent_to_group(
     except ValueError as e:
         _handle_service_error(e)
 
-    await permission_service.invalidate_agent_permissions(body.agent_id)
+    await permission_service.invalidate_agent_assignment(
+        session, body.agent_id, [group_id]
+    )
 
     # Return the agent details
     agents = await service.list_agents_in_group(session, group_id)
@@ -152,7 +157,7 @@ async def remove_agent_from_group(
     except ValueError as e:
         _handle_service_error(e)
 
-    await permission_service.invalidate_agent_permissions(agent_id)
+    await permission_service.invalidate_agent_assignment(session, agent_id, [group_id])
 
 
 @router.get("/groups/{group_id}/agents", response_model=AgentListResponse)
@@ -161,14 +166,24 @@ async def list_agents_in_group(
     user: User = Depends(require_group_admin()),
     session: AsyncSession = Depends(get_db_session),
     service: AgentService = Depends(get_agent_service),
+    page: PageRequest | None = Depends(get_page_request),
 ):
-    """List agents assigned to a group (group admin or superadmin)."""
+    """List agents assigned to a group (group admin or superadmin).
+
+    Paginated by agent id when `limit` or `cursor` is given.
+    """
     try:
-        agents = await service.list_agents_in_group(session, group_id)
+        agents = await service.list_agents_in_group(session, group_id, page)
     except ValueError as e:
         _handle_service_error(e)
 
-    return AgentListResponse(agents=[AgentResponse.model_validate(a) for a in agents])
+    next_cursor = None
+    if page is not None:
+        agents, next_cursor = split_page(agents, page, lambda a: a.id)
+    return AgentListResponse(
+        agents=[AgentResponse.model_validate(a) for a in agents],
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/users/{entra_object_id}/admin-groups", response_model=GroupListResponse)
@@ -196,8 +211,9 @@ async def get_admin_groups(
 @router.get("/users/{entra_object_id}/agents", response_model=UserAgentListResponse)
 async def get_user_agents(
     entra_object_id: str,
+    request: Request,
     user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db_session),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
     service: AgentService = Depends(get_agent_service),
     permission_service: PermissionService = Depends(get_permission_service),
 ):
@@ -205,30 +221,74 @@ async def get_user_agents(
 
     Used by the core platform to populate the agent selector.
     Users can query their own agents; superadmins can query any user's.
+    Supports If-None-Match: an unchanged list is answered with a 304.
     """
-    if not user.is_superadmin and user.id != entra_object_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Cannot view another user's agents",
+    full_catalog = _agents_view(user, entra_object_id)
+
+    etag = await permission_service.user_agents_etag(
+        entra_object_id, is_superadmin=full_catalog
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Stale lists are reloaded in the background, after this request's
+    # session is closed, so the loader opens its own
+    async def load() -> list[dict]:
+        async with session_factory() as load_session:
+            return await service.get_user_agents(
+                load_session, entra_object_id, is_superadmin=full_catalog
+            )
+
+    try:
+        agents = await permission_service.get_user_agents(
+            entra_object_id, load, is_superadmin=full_catalog
         )
+    except ValueError as e:
+        _handle_service_error(e)
 
-    # Check cache first
-    cached = await permission_service.get_cached_user_agents(entra_object_id)
-    if cached is not None:
-        return UserAgentListResponse(agents=[UserAgentResponse(**a) for a in cached])
+    # Agents come back already validated and rendered for the response (see
+    # cache_codec), so they are sent as is instead of through response_model
+    return JSONResponse({"agents": agents}, headers=etag_headers(etag))
 
-    # Only treat as superadmin when querying own agents
-    querying_self = user.id == entra_object_id
+
+@router.get(
+    "/users/{entra_object_id}/agents/changes",
+    response_model=UserAgentChangesResponse,
+)
+async def get_user_agent_changes(
+    entra_object_id: str,
+    since: str | None = Query(None, description="next_token of the last sync"),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+    service: AgentService = Depends(get_agent_service),
+):
+    """Return the changes to a user's agents since the last sync.
+
+    Pass the previous response's `next_token` as `since`. Without it, or
+    when the changes since are no longer known, `full_resync` is set and
+    `agents` is the whole list. Same access rules as /users/{id}/agents.
+    """
+    full_catalog = _agents_view(user, entra_object_id)
     try:
-        agents = await service.get_user_agents(
-            session,
-            entra_object_id,
-            is_superadmin=user.is_superadmin and querying_self,
+        changes = await service.get_user_agent_changes(
+            session, entra_object_id, since, is_superadmin=full_catalog
         )
     except ValueError as e:
         _handle_service_error(e)
+    return UserAgentChangesResponse(**changes)
+
 
-    # Cache the result
-    await permission_service.set_cached_user_agents(entra_object_id, agents)
+def _agents_view(user: User, entra_object_id: str) -> bool:
+    """Check the user may view `entra_object_id`'s agents; return whether
+    they see the full catalog.
 
-    return UserAgentListResponse(agents=[UserAgentResponse(**a) for a in agents])
+    Users can query their own agents; superadmins can query any user's.
+    """
+    if not user.is_superadmin and user.id != entra_object_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot view another user's agents",
+        )
+
+    # Only treat as superadmin when querying own agents
+    return user.is_superadmin and user.id == entra_object_id
@@ -1,17 +1,19 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.base.core.dependencies import (
     get_current_user,
     get_db_session,
     get_group_service,
+    get_page_request,
+    get_permission_service,
 )
 from src.base.models.user import User
+from src.base.utils.http_cache import etag_headers, etag_matches, not_modified
+from src.base.utils.pagination import PageRequest, split_page
 from src.domain.auth.authorization import require_group_admin, require_superadmin
-from src.domain.models.entities.group_membership import GroupMembership
 from src.domain.models.group_schemas import (
     GroupCreate,
     GroupListResponse,
@@ -19,6 +21,7 @@ from src.domain.models.group_schemas import (
     GroupUpdate,
 )
 from src.domain.services.group_service import GroupService
+from src.domain.services.permission_service import PermissionService
 
 router = APIRouter(prefix="/groups", tags=["Groups"])
 logger = logging.getLogger(__name__)
@@ -30,59 +33,102 @@ async def create_group(
     user: User = Depends(require_superadmin),
     session: AsyncSession = Depends(get_db_session),
     service: GroupService = Depends(get_group_service),
+    permission_service: PermissionService = Depends(get_permission_service),
 ):
     """Create a new group (superadmin only)."""
     group = await service.create_group(
         session, name=body.name, description=body.description
     )
+    await permission_service.invalidate_group(group.id, agent_lists=False)
     return GroupResponse.model_validate(group)
 
 
 @router.get("", response_model=GroupListResponse)
 async def list_groups(
+    request: Request,
+    response: Response,
     user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
     service: GroupService = Depends(get_group_service),
+    permission_service: PermissionService = Depends(get_permission_service),
+    page: PageRequest | None = Depends(get_page_request),
 ):
-    """List groups visible to the current user."""
+    """List groups visible to the current user.
+
+    Paginated by group id when `limit` or `cursor` is given. Supports
+    If-None-Match: an unchanged list is answered with a 304.
+    """
+    etag = await permission_service.groups_etag(
+        user.id, is_superadmin=user.is_superadmin, variant=request.url.query
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     groups = await service.list_groups_for_user(
         session,
         entra_object_id=user.id,
         is_superadmin=user.is_superadmin,
+        page=page,
+    )
+    next_cursor = None
+    if page is not None:
+        groups, next_cursor = split_page(groups, page, lambda g: g.id)
+    response.headers.update(etag_headers(etag))
+    return GroupListResponse(
+        groups=[GroupResponse.model_validate(g) for g in groups],
+        next_cursor=next_cursor,
     )
-    return GroupListResponse(groups=[GroupResponse.model_validate(g) for g in groups])
 
 
 @router.get("/{group_id}", response_model=GroupResponse)
 async def get_group(
     group_id: int,
+    request: Request,
+    response: Response,
     user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
     service: GroupService = Depends(get_group_service),
+    permission_service: PermissionService = Depends(get_permission_service),
 ):
-    """Get group details. Accessible by group members and superadmins."""
+    """Get group details. Accessible by group members and superadmins.
+
+    Supports If-None-Match: an unchanged group is answered with a 304, once
+    membership is checked.
+    """
+    etag = await permission_service.group_etag(group_id)
+    if etag_matches(request, etag):
+        # The ETag changes when the group is deleted, so it exists
+        await _check_member(session, user, group_id, permission_service)
+        return not_modified(etag)
+
     group = await service.get_group(session, group_id)
     if group is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
         )
 
-    if not user.is_superadmin:
-        result = await session.execute(
-            select(GroupMembership).where(
-                GroupMembership.entra_object_id == user.id,
-                GroupMembership.group_id == group_id,
-            )
-        )
-        if result.scalar_one_or_none() is None:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not a member of this group",
-            )
-
+    await _check_member(session, user, group_id, permission_service)
+    response.headers.update(etag_headers(etag))
     return GroupResponse.model_validate(group)
 
 
+async def _check_member(
+    session: AsyncSession,
+    user: User,
+    group_id: int,
+    permission_service: PermissionService,
+) -> None:
+    """Raise 403 unless the user is a superadmin or a member of the group."""
+    if user.is_superadmin:
+        return
+    role = await permission_service.get_group_role(session, user.id, group_id)
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this group",
+        )
+
+
 @router.put("/{group_id}", response_model=GroupResponse)
 async def update_group(
     group_id: int,
@@ -90,6 +136,7 @@ async def update_group(
     user: User = Depends(require_group_admin()),
     session: AsyncSession = Depends(get_db_session),
     service: GroupService = Depends(get_group_service),
+    permission_service: PermissionService = Depends(get_permission_service),
 ):
     """Update a group (group admin or superadmin)."""
     group = await service.update_group(
@@ -99,6 +146,9 @@ async def update_group(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
         )
+    await permission_service.invalidate_group(
+        group_id, agent_lists=body.name is not None
+    )
     return GroupResponse.model_validate(group)
 
 
@@ -108,6 +158,7 @@ async def delete_group(
     user: User = Depends(require_superadmin),
     session: AsyncSession = Depends(get_db_session),
     service: GroupService = Depends(get_group_service),
+    permission_service: PermissionService = Depends(get_permission_service),
 ):
     """Delete a group (superadmin only)."""
     deleted = await service.delete_group(session, group_id)
@@ -115,3 +166,4 @@ async def delete_group(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
         )
+    await permission_service.invalidate_group(group_id)
@@ -6,9 +6,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.base.core.dependencies import (
     get_db_session,
     get_membership_service,
+    get_page_request,
     get_permission_service,
 )
 from src.base.models.user import User
+from src.base.utils.pagination import PageRequest, split_page
 from src.domain.auth.authorization import require_group_admin
 from src.domain.models.membership_schemas import (
     AddMemberRequest,
@@ -87,15 +89,23 @@ async def list_members(
     user: User = Depends(require_group_admin()),
     session: AsyncSession = Depends(get_db_session),
     service: MembershipService = Depends(get_membership_service),
+    page: PageRequest | None = Depends(get_page_request),
 ):
-    """List members of a group (group admin or superadmin)."""
+    """List members of a group (group admin or superadmin).
+
+    Paginated by membership id when `limit` or `cursor` is given.
+    """
     try:
-        members = await service.list_members(session, group_id)
+        members = await service.list_members(session, group_id, page)
     except ValueError as e:
         _handle_service_error(e)
 
+    next_cursor = None
+    if page is not None:
+        members, next_cursor = split_page(members, page, lambda m: m.id)
     return MemberListResponse(
-        members=[MemberResponse.model_validate(m) for m in members]
+        members=[MemberResponse.model_validate(m) for m in members],
+        next_cursor=next_cursor,
     )
 
 
@@ -11,6 +11,9 @@ from src.base.core.dependencies import (
 from src.base.models.user import User
 from src.domain.models.permission_schemas import (
     PermissionAction,
+    PermissionCheckBatchRequest,
+    PermissionCheckBatchResponse,
+    PermissionCheckBatchResult,
     PermissionCheckResponse,
 )
 from src.domain.services.permission_service import PermissionService
@@ -40,3 +43,34 @@ async def check_permission(
         is_superadmin=user.is_superadmin,
     )
     return PermissionCheckResponse(allowed=allowed, role=role)
+
+
+@router.post("/check-batch", response_model=PermissionCheckBatchResponse)
+async def check_permissions_batch(
+    body: PermissionCheckBatchRequest,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+    service: PermissionService = Depends(get_permission_service),
+):
+    """Check many (user, agent, action) tuples in one call.
+
+    Used by the core platform when rendering dashboards. Results are
+    returned in the same order as the request.
+    """
+    verdicts = await service.check_permissions_batch(
+        session,
+        [(c.user_id, c.agent_id, c.action) for c in body.checks],
+        is_superadmin=user.is_superadmin,
+    )
+    return PermissionCheckBatchResponse(
+        results=[
+            PermissionCheckBatchResult(
+                user_id=c.user_id,
+                agent_id=c.agent_id,
+                action=c.action,
+                allowed=allowed,
+                role=role,
+            )
+            for c, (allowed, role) in zip(body.checks, verdicts, strict=True)
+        ]
+    )
@@ -1,55 +1,77 @@
 import logging
+import os
+from collections.abc import AsyncIterator
 
 from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.base.utils.pagination import PageRequest, keyset
 from src.domain.models.entities.agent import Agent
 from src.domain.models.entities.group import Group
 from src.domain.models.entities.group_agent import GroupAgent
 from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.services.agent_change_log_service import AgentChangeLogService
+from src.domain.services.agent_listing import list_agents_with_groups
+from src.domain.services.user_agent_access_service import UserAgentAccessService
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip by the streaming (NDJSON export) listings
+ADMIN_EXPORT_BATCH_SIZE = int(os.getenv("ADMIN_EXPORT_BATCH_SIZE", "1000"))
+
 
 class AdminService:
-    async def list_all_agents(self, session: AsyncSession) -> list[dict]:
-        """Return all agents with their group assignments."""
-        result = await session.execute(
-            select(Agent, Group.id, Group.name)
-            .join(GroupAgent, GroupAgent.agent_id == Agent.id)
-            .join(Group, Group.id == GroupAgent.group_id)
-            .order_by(Agent.id, Group.id)
-        )
-        rows = result.all()
+    def __init__(
+        self,
+        access: UserAgentAccessService | None = None,
+        changes: AgentChangeLogService | None = None,
+    ):
+        self._access = access or UserAgentAccessService()
+        self._changes = changes or AgentChangeLogService()
+
+    async def list_all_agents(
+        self, session: AsyncSession, page: PageRequest | None = None
+    ) -> list[dict]:
+        """Return all agents with their group assignments.
+
+        With `page`, only agents in that page of agent ids (see keyset()).
+        """
+        if page is None:
+            return await list_agents_with_groups(session)
+
+        # Pick the page's agents first: paging the join itself would cut an
+        # agent's groups across pages
+        agent_ids = (
+            await session.scalars(
+                keyset(
+                    select(GroupAgent.agent_id).distinct(),
+                    GroupAgent.agent_id,
+                    page,
+                )
+            )
+        ).all()
+        return await list_agents_with_groups(session, Agent.id.in_(agent_ids))
 
-        agents_map: dict[int, dict] = {}
-        for agent, group_id, group_name in rows:
-            if agent.id not in agents_map:
-                agents_map[agent.id] = {
-                    "id": agent.id,
-                    "agent_external_id": agent.agent_external_id,
-                    "name": agent.name,
-                    "created_by": agent.created_by,
-                    "created_at": agent.created_at,
-                    "groups": [],
-                }
-            group_entry = {"group_id": group_id, "group_name": group_name}
-            if group_entry not in agents_map[agent.id]["groups"]:
-                agents_map[agent.id]["groups"].append(group_entry)
-
-        return list(agents_map.values())
-
-    async def list_all_groups_with_counts(self, session: AsyncSession) -> list[dict]:
-        """Return all groups with their member counts."""
-        result = await session.execute(
+    async def list_all_groups_with_counts(
+        self, session: AsyncSession, page: PageRequest | None = None
+    ) -> list[dict]:
+        """Return all groups with their member counts.
+
+        With `page`, only that page of groups (see keyset()).
+        """
+        stmt = (
             select(
                 Group,
                 func.count(GroupMembership.id).label("member_count"),
             )
             .outerjoin(GroupMembership, GroupMembership.group_id == Group.id)
             .group_by(Group.id)
-            .order_by(Group.id)
         )
+        if page is None:
+            stmt = stmt.order_by(Group.id)
+        else:
+            stmt = keyset(stmt, Group.id, page)
+        result = await session.execute(stmt)
         rows = result.all()
 
         return [
@@ -64,6 +86,73 @@ class AdminService:
             for group, member_count in rows
         ]
 
+    async def stream_all_agents(self, session: AsyncSession) -> AsyncIterator[dict]:
+        """Yield the agents of list_all_agents one at a time.
+
+        Rows are read from a server-side cursor in agent order, so each agent
+        is yielded as soon as its last group row arrives and only one batch
+        of rows is held at a time.
+        """
+        result = await session.stream(
+            select(
+                Agent.id,
+                Agent.agent_external_id,
+                Agent.name,
+                Agent.created_by,
+                Agent.created_at,
+                Group.id.label("group_id"),
+                Group.name.label("group_name"),
+            )
+            .join(GroupAgent, GroupAgent.agent_id == Agent.id)
+            .join(Group, Group.id == GroupAgent.group_id)
+            .order_by(Agent.id, Group.id)
+            .execution_options(yield_per=ADMIN_EXPORT_BATCH_SIZE)
+        )
+        agent = None
+        # A batch per await: iterating rows would cross the async boundary
+        # once per row
+        async for rows in result.partitions():
+            for row in rows:
+                if agent is None or agent["id"] != row.id:
+                    if agent is not None:
+                        yield agent
+                    agent = {
+                        "id": row.id,
+                        "agent_external_id": row.agent_external_id,
+                        "name": row.name,
+                        "created_by": row.created_by,
+                        "created_at": row.created_at,
+                        "groups": [],
+                    }
+                agent["groups"].append(
+                    {"group_id": row.group_id, "group_name": row.group_name}
+                )
+        if agent is not None:
+            yield agent
+
+    async def stream_all_groups_with_counts(
+        self, session: AsyncSession
+    ) -> AsyncIterator[dict]:
+        """Yield the groups of list_all_groups_with_counts one at a time,
+        read from a server-side cursor."""
+        result = await session.stream(
+            select(
+                Group.id,
+                Group.name,
+                Group.description,
+                Group.created_at,
+                Group.updated_at,
+                func.count(GroupMembership.id).label("member_count"),
+            )
+            .outerjoin(GroupMembership, GroupMembership.group_id == Group.id)
+            .group_by(Group.id)
+            .order_by(Group.id)
+            .execution_options(yield_per=ADMIN_EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.mappings().partitions():
+            for row in rows:
+                yield dict(row)
+
     async def bulk_update_agent_groups(
         self,
         session: AsyncSession,
@@ -73,6 +162,9 @@ class AdminService:
     ) -> dict:
         """Replace an agent's group assignments atomically.
 
+        The returned dict also carries "previous_group_ids", the agent's
+        groups before the update, so callers can tell which groups changed.
+
         Raises ValueError("agent_not_found") if agent doesn't exist.
         Raises ValueError("group_not_found") if any group_id doesn't exist.
         """
@@ -89,6 +181,11 @@ class AdminService:
         if missing:
             raise ValueError("group_not_found")
 
+        result = await session.execute(
+            select(GroupAgent.group_id).where(GroupAgent.agent_id == agent_id)
+        )
+        previous_group_ids = [row[0] for row in result.all()]
+
         # Delete old assignments
         await session.execute(delete(GroupAgent).where(GroupAgent.agent_id == agent_id))
 
@@ -97,6 +194,9 @@ class AdminService:
             session.add(
                 GroupAgent(group_id=gid, agent_id=agent_id, added_by=updated_by)
             )
+        changed_group_ids = set(previous_group_ids) ^ set(group_ids)
+        await self._access.refresh_agents(session, [agent_id], changed_group_ids)
+        await self._changes.record_assignment(session, agent_id, changed_group_ids)
 
         await session.commit()
 
@@ -125,4 +225,5 @@ class AdminService:
             "created_by": agent.created_by,
             "created_at": agent.created_at,
             "groups": groups,
+            "previous_group_ids": previous_group_ids,
         }
@@ -0,0 +1,244 @@
+import base64
+import datetime
+import logging
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    Select,
+    String,
+    and_,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.models.entities.agent_change import AgentChange
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+
+logger = logging.getLogger(__name__)
+
+# Log entries are compacted away after this long; sync tokens issued before
+# that have lost their changes and are answered with a full resync.
+AGENT_CHANGES_RETENTION_SECONDS = int(
+    os.getenv("AGENT_CHANGES_RETENTION_SECONDS", str(7 * 24 * 3600))
+)
+
+# Longest a transaction writing the log may take to commit. Entries get ids
+# before they commit, so a token never passes entries younger than this:
+# ones committed late under a lower id are still read by the next sync.
+# Those entries are read again too, which only repeats their agents.
+AGENT_CHANGES_SETTLE_SECONDS = int(os.getenv("AGENT_CHANGES_SETTLE_SECONDS", "5"))
+
+# A change touching more (user, agent) pairs than this is logged as one
+# entry telling every client to resync, instead of one entry per pair.
+AGENT_CHANGES_MAX_FANOUT = int(os.getenv("AGENT_CHANGES_MAX_FANOUT", "10000"))
+
+# Above this many changed agents since a token, a full resync is cheaper
+AGENT_CHANGES_MAX_SYNC = int(os.getenv("AGENT_CHANGES_MAX_SYNC", "1000"))
+
+
+def _utc(timestamp: float) -> datetime.datetime:
+    """Naive UTC datetime, as stored in agent_changes.created_at."""
+    return datetime.datetime.fromtimestamp(timestamp, datetime.UTC).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class SyncToken:
+    """A position in the change log and when it was handed out."""
+
+    position: int
+    issued_at: int
+
+    def encode(self) -> str:
+        raw = f"{self.position}.{self.issued_at}".encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "SyncToken":
+        """Raises ValueError("invalid_sync_token") if not made by encode()."""
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            position, issued_at = (
+                base64.urlsafe_b64decode(padded.encode()).decode().split(".")
+            )
+            if not (position.isdecimal() and issued_at.isdecimal()):
+                raise ValueError
+            return cls(int(position), int(issued_at))
+        except ValueError:  # bad base64, not UTF-8, or not two integers
+            raise ValueError("invalid_sync_token") from None
+
+
+@dataclass(frozen=True)
+class AgentChanges:
+    """The agents whose entries changed in a list since a sync token.
+
+    With `full_resync` the changes are unknown (no token, a token past
+    retention, or too many changes) and the whole list must be reloaded.
+    """
+
+    full_resync: bool
+    agent_ids: frozenset[int]
+    next_token: str
+
+
+class AgentChangeLogService:
+    """Writes and reads the agent_changes log behind delta sync.
+
+    The record methods log which agents may have changed in which lists,
+    reading memberships and assignments as they are when called. They do
+    not commit: callers run them with their own change and before
+    committing, so both land in one transaction.
+    """
+
+    async def record_membership(
+        self, session: AsyncSession, entra_object_id: str, group_id: int
+    ) -> None:
+        """A user joined or left a group: each of its agents, in their list."""
+        await self._record(
+            session,
+            select(literal(entra_object_id, String), GroupAgent.agent_id).where(
+                GroupAgent.group_id == group_id
+            ),
+            overflow=entra_object_id,
+        )
+
+    async def record_assignment(
+        self, session: AsyncSession, agent_id: int, group_ids: Iterable[int]
+    ) -> None:
+        """An agent joined or left groups: the agent, in the catalog and in
+        the list of each of their members."""
+        group_ids = set(group_ids)
+        if not group_ids:
+            return
+        members = (
+            select(GroupMembership.entra_object_id, literal(agent_id, Integer))
+            .where(GroupMembership.group_id.in_(group_ids))
+            .distinct()
+        )
+        catalog = select(literal(None, String), literal(agent_id, Integer))
+        await self._record(session, union_all(members, catalog))
+
+    async def record_group(self, session: AsyncSession, group_id: int) -> None:
+        """A group was renamed or deleted: each of its agents, in the catalog
+        and in the list of each of its members."""
+        members = (
+            select(GroupMembership.entra_object_id, GroupAgent.agent_id)
+            .join(GroupAgent, GroupAgent.group_id == GroupMembership.group_id)
+            .where(GroupMembership.group_id == group_id)
+        )
+        catalog = select(literal(None, String), GroupAgent.agent_id).where(
+            GroupAgent.group_id == group_id
+        )
+        await self._record(session, union_all(members, catalog))
+
+    async def _record(
+        self,
+        session: AsyncSession,
+        pairs: Select,
+        overflow: str | None = None,
+    ) -> None:
+        """Log the (user, agent) pairs selected by `pairs`.
+
+        Above AGENT_CHANGES_MAX_FANOUT pairs, log instead that the whole list
+        of `overflow` changed, or with None every list.
+        """
+        await session.flush()
+        pairs = pairs.subquery()
+        count = await session.scalar(select(func.count()).select_from(pairs))
+        if not count:
+            return
+        if count > AGENT_CHANGES_MAX_FANOUT:
+            logger.info(
+                "Logged a full agent list change for %s instead of %s entries",
+                overflow or "every list",
+                count,
+            )
+            pairs = select(literal(overflow, String), literal(None, Integer)).subquery()
+        await session.execute(
+            insert(AgentChange).from_select(
+                ["entra_object_id", "agent_id", "created_at"],
+                select(*pairs.c, literal(_utc(time.time()), DateTime)),
+            )
+        )
+
+    async def changes_since(
+        self,
+        session: AsyncSession,
+        token: str | None,
+        entra_object_id: str,
+        *,
+        catalog: bool = False,
+    ) -> AgentChanges:
+        """Return the agents changed in a user's list since `token`, or in the
+        superadmin catalog with `catalog`, and the token to pass next time.
+
+        Raises ValueError("invalid_sync_token") for a malformed token.
+        """
+        since = SyncToken.decode(token) if token is not None else None
+        now = time.time()
+        # Taken before the changes are read: anything logged from here on
+        # lands past the next token
+        next_token = SyncToken(await self._position(session, now), int(now)).encode()
+
+        if since is None or since.issued_at < (
+            now - AGENT_CHANGES_RETENTION_SECONDS + AGENT_CHANGES_SETTLE_SECONDS
+        ):
+            return AgentChanges(True, frozenset(), next_token)
+
+        if catalog:
+            scope = AgentChange.entra_object_id.is_(None)
+        else:
+            scope = or_(
+                AgentChange.entra_object_id == entra_object_id,
+                and_(
+                    AgentChange.entra_object_id.is_(None),
+                    AgentChange.agent_id.is_(None),
+                ),
+            )
+        agent_ids = set(
+            await session.scalars(
+                select(AgentChange.agent_id)
+                .where(AgentChange.id > since.position, scope)
+                .distinct()
+                .limit(AGENT_CHANGES_MAX_SYNC + 1)
+            )
+        )
+        if None in agent_ids or len(agent_ids) > AGENT_CHANGES_MAX_SYNC:
+            return AgentChanges(True, frozenset(), next_token)
+        return AgentChanges(False, frozenset(agent_ids), next_token)
+
+    @staticmethod
+    async def _position(session: AsyncSession, now: float) -> int:
+        """The last log entry a token issued at `now` may pass: the newest one
+        older than AGENT_CHANGES_SETTLE_SECONDS, or 0."""
+        position = await session.scalar(
+            select(AgentChange.id)
+            .where(AgentChange.created_at <= _utc(now - AGENT_CHANGES_SETTLE_SECONDS))
+            .order_by(AgentChange.created_at.desc(), AgentChange.id.desc())
+            .limit(1)
+        )
+        return position or 0
+
+    async def compact(self, session: AsyncSession) -> int:
+        """Delete entries past AGENT_CHANGES_RETENTION_SECONDS and commit.
+
+        Returns the number of entries deleted.
+        """
+        cutoff = _utc(time.time() - AGENT_CHANGES_RETENTION_SECONDS)
+        result = await session.execute(
+            delete(AgentChange).where(AgentChange.created_at < cutoff)
+        )
+        await session.commit()
+        logger.info("Compacted %d agent_changes entries", result.rowcount)
+        return result.rowcount
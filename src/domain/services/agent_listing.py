@@ -0,0 +1,121 @@
+from operator import itemgetter
+
+from sqlalchemy import JSON, ColumnElement, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+
+_AGENT_COLUMNS = (
+    Agent.id,
+    Agent.agent_external_id,
+    Agent.name,
+    Agent.created_by,
+    Agent.created_at,
+)
+
+# Per-dialect aggregate of an agent's groups into a JSON array of
+# {"group_id", "group_name"} objects; other dialects group rows in Python
+_GROUP_AGGREGATES = {
+    "postgresql": lambda: func.json_agg(
+        func.json_build_object("group_id", Group.id, "group_name", Group.name),
+        type_=JSON,
+    ),
+    "sqlite": lambda: func.json_group_array(
+        func.json_object("group_id", Group.id, "group_name", Group.name),
+        type_=JSON,
+    ),
+}
+
+_AGENT_KEYS = (*(column.key for column in _AGENT_COLUMNS), "groups")
+_group_id = itemgetter("group_id")
+
+
+def _from_groups(stmt: Select, member: str | None) -> Select:
+    """Join `stmt` to the agents' groups, limited to groups of `member`."""
+    stmt = stmt.join(GroupAgent, GroupAgent.agent_id == Agent.id).join(
+        Group, Group.id == GroupAgent.group_id
+    )
+    if member is not None:
+        stmt = stmt.join(
+            GroupMembership, GroupMembership.group_id == GroupAgent.group_id
+        ).where(GroupMembership.entra_object_id == member)
+    return stmt
+
+
+async def list_agents_with_groups(
+    session: AsyncSession,
+    *criteria: ColumnElement[bool],
+    member: str | None = None,
+) -> list[dict]:
+    """Return agents with their groups, ordered by agent id.
+
+    Only agents matching `criteria` and assigned to at least one group are
+    returned; with `member`, only agents in that user's groups, with just
+    those groups. Each dict has the agent's fields plus a "groups" list
+    ordered by group id.
+
+    Groups are aggregated per agent in SQL where the dialect supports it,
+    so each agent is one row of plain columns.
+    """
+    aggregate = _GROUP_AGGREGATES.get(session.get_bind().dialect.name)
+    if aggregate is None:
+        return await _group_in_python(session, criteria, member)
+
+    stmt = (
+        _from_groups(select(*_AGENT_COLUMNS, aggregate().label("groups")), member)
+        .where(*criteria)
+        .group_by(Agent.id)
+        .order_by(Agent.id)
+    )
+    # Core execution: plain rows, nothing for the ORM to load
+    connection = await session.connection()
+    result = await connection.execute(stmt)
+    agents = [dict(zip(_AGENT_KEYS, row, strict=True)) for row in result]
+    for agent in agents:
+        # Neither SQLite before 3.44 nor json_agg without ORDER BY orders
+        # the aggregate; the lists are short
+        agent["groups"].sort(key=_group_id)
+    return agents
+
+
+async def _group_in_python(
+    session: AsyncSession,
+    criteria: tuple[ColumnElement[bool], ...],
+    member: str | None,
+) -> list[dict]:
+    """One row per (agent, group), folded into agents in order."""
+    stmt = (
+        _from_groups(
+            select(
+                *_AGENT_COLUMNS,
+                Group.id.label("group_id"),
+                Group.name.label("group_name"),
+            ),
+            member,
+        )
+        .where(*criteria)
+        .order_by(Agent.id, Group.id)
+    )
+    connection = await session.connection()
+    result = await connection.execute(stmt)
+
+    agents: list[dict] = []
+    for row in result:
+        if not agents or agents[-1]["id"] != row.id:
+            agents.append(
+                {
+                    "id": row.id,
+                    "agent_external_id": row.agent_external_id,
+                    "name": row.name,
+                    "created_by": row.created_by,
+                    "created_at": row.created_at,
+                    "groups": [],
+                }
+            )
+        agents[-1]["groups"].append(
+            {"group_id": row.group_id, "group_name": row.group_name}
+        )
+    return agents
@@ -4,17 +4,29 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.base.utils.pagination import PageRequest, keyset
 from src.domain.models.entities.agent import Agent
 from src.domain.models.entities.enums import GroupRole
 from src.domain.models.entities.group import Group
 from src.domain.models.entities.group_agent import GroupAgent
 from src.domain.models.entities.group_membership import GroupMembership
 from src.domain.models.entities.user import User
+from src.domain.services.agent_change_log_service import AgentChangeLogService
+from src.domain.services.agent_listing import list_agents_with_groups
+from src.domain.services.user_agent_access_service import UserAgentAccessService
 
 logger = logging.getLogger(__name__)
 
 
 class AgentService:
+    def __init__(
+        self,
+        access: UserAgentAccessService | None = None,
+        changes: AgentChangeLogService | None = None,
+    ):
+        self._access = access or UserAgentAccessService()
+        self._changes = changes or AgentChangeLogService()
+
     async def register_agent(
         self,
         session: AsyncSession,
@@ -48,6 +60,8 @@ class AgentService:
             added_by=created_by,
         )
         session.add(group_agent)
+        await self._access.refresh_agents(session, [agent.id], [group_id])
+        await self._changes.record_assignment(session, agent.id, [group_id])
         await session.commit()
         await session.refresh(agent)
 
@@ -84,10 +98,13 @@ class AgentService:
         )
         session.add(group_agent)
         try:
-            await session.commit()
+            await session.flush()
         except IntegrityError:
             await session.rollback()
             raise ValueError("duplicate_assignment") from None
+        await self._access.refresh_agents(session, [agent_id], [group_id])
+        await self._changes.record_assignment(session, agent_id, [group_id])
+        await session.commit()
 
         await session.refresh(group_agent)
         logger.info(
@@ -115,6 +132,8 @@ class AgentService:
             raise ValueError("assignment_not_found")
 
         await session.delete(group_agent)
+        await self._access.refresh_agents(session, [agent_id], [group_id])
+        await self._changes.record_assignment(session, agent_id, [group_id])
         await session.commit()
         logger.info("Removed agent_id=%s from group_id=%s", agent_id, group_id)
         return True
@@ -123,18 +142,26 @@ class AgentService:
         self,
         session: AsyncSession,
         group_id: int,
+        page: PageRequest | None = None,
     ) -> list[Agent]:
-        """List all agents assigned to a group."""
+        """List all agents assigned to a group.
+
+        With `page`, only that page of agents (see keyset()).
+        """
         # Verify group exists
         result = await session.execute(select(Group).where(Group.id == group_id))
         if result.scalar_one_or_none() is None:
             raise ValueError("group_not_found")
 
-        result = await session.execute(
+        stmt = (
             select(Agent)
             .join(GroupAgent, GroupAgent.agent_id == Agent.id)
             .where(GroupAgent.group_id == group_id)
         )
+        if page is not None:
+            # Served by the (group_id, agent_id) unique index
+            stmt = keyset(stmt, GroupAgent.agent_id, page)
+        result = await session.execute(stmt)
         return list(result.scalars().all())
 
     async def get_admin_groups(
@@ -169,49 +196,57 @@ class AgentService:
         """
         if is_superadmin:
             # Superadmins see all agents with all group assignments
-            result = await session.execute(
-                select(Agent, Group.id, Group.name)
-                .join(GroupAgent, GroupAgent.agent_id == Agent.id)
-                .join(Group, Group.id == GroupAgent.group_id)
-                .order_by(Agent.id, Group.id)
+            return await list_agents_with_groups(session)
+
+        # Verify user exists
+        user_result = await session.execute(
+            select(User).where(User.entra_object_id == entra_object_id)
+        )
+        if user_result.scalar_one_or_none() is None:
+            raise ValueError("user_not_found")
+
+        # Regular users see agents from their groups
+        return await list_agents_with_groups(session, member=entra_object_id)
+
+    async def get_user_agent_changes(
+        self,
+        session: AsyncSession,
+        entra_object_id: str,
+        since: str | None,
+        *,
+        is_superadmin: bool = False,
+    ) -> dict:
+        """Return the changes to a user's agents (see get_user_agents) since
+        the sync token `since`.
+
+        Returns a dict with "full_resync", "agents", "removed" (agent ids)
+        and "next_token". Normally "agents" holds the agents added or changed
+        since the token and "removed" those no longer accessible. With
+        "full_resync" (no token, a token too old, or too many changes),
+        "agents" is the whole list and "removed" is empty.
+
+        Raises ValueError("invalid_sync_token") for a malformed token.
+        """
+        changes = await self._changes.changes_since(
+            session, since, entra_object_id, catalog=is_superadmin
+        )
+        if changes.full_resync:
+            agents = await self.get_user_agents(
+                session, entra_object_id, is_superadmin=is_superadmin
             )
+            removed: list[int] = []
         else:
-            # Verify user exists
-            user_result = await session.execute(
-                select(User).where(User.entra_object_id == entra_object_id)
-            )
-            if user_result.scalar_one_or_none() is None:
-                raise ValueError("user_not_found")
-
-            # Regular users see agents from their groups
-            result = await session.execute(
-                select(Agent, Group.id, Group.name)
-                .join(GroupAgent, GroupAgent.agent_id == Agent.id)
-                .join(Group, Group.id == GroupAgent.group_id)
-                .join(
-                    GroupMembership,
-                    GroupMembership.group_id == GroupAgent.group_id,
+            agents = []
+            if changes.agent_ids:
+                agents = await list_agents_with_groups(
+                    session,
+                    Agent.id.in_(changes.agent_ids),
+                    member=None if is_superadmin else entra_object_id,
                 )
-                .where(GroupMembership.entra_object_id == entra_object_id)
-                .order_by(Agent.id, Group.id)
-            )
-
-        rows = result.all()
-
-        # Deduplicate agents and collect their groups
-        agents_map: dict[int, dict] = {}
-        for agent, group_id, group_name in rows:
-            if agent.id not in agents_map:
-                agents_map[agent.id] = {
-                    "id": agent.id,
-                    "agent_external_id": agent.agent_external_id,
-                    "name": agent.name,
-                    "created_by": agent.created_by,
-                    "created_at": agent.created_at,
-                    "groups": [],
-                }
-            group_entry = {"group_id": group_id, "group_name": group_name}
-            if group_entry not in agents_map[agent.id]["groups"]:
-                agents_map[agent.id]["groups"].append(group_entry)
-
-        return list(agents_map.values())
+            removed = sorted(changes.agent_ids - {agent["id"] for agent in agents})
+        return {
+            "full_resync": changes.full_resync,
+            "agents": agents,
+            "removed": removed,
+            "next_token": changes.next_token,
+        }
@@ -0,0 +1,411 @@
+"""
+In-memory authorization graph: user -> (group, role) and group -> agent indexes
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.services.cache_codec import render_user_agents
+
+logger = logging.getLogger(__name__)
+
+# Serve permission checks and user agent lists from the in-memory graph.
+# Needs Redis: other workers' changes arrive over its pub/sub channel.
+AUTHZ_GRAPH_ENABLED = os.getenv("AUTHZ_GRAPH_ENABLED", "false").lower() == "true"
+
+# How often the whole graph is rebuilt from SQL. Changes the graph was not
+# told about (direct DB edits, a lost pub/sub message) are logged and fixed
+# at the next resync; 0 disables it.
+AUTHZ_GRAPH_RESYNC_SECONDS = float(os.getenv("AUTHZ_GRAPH_RESYNC_SECONDS", "300"))
+
+# Entities that can be reloaded one at a time: "user" (their memberships),
+# "agent" (its record and groups) and "group" (its name)
+Target = tuple[str, Any]
+Fetcher = Callable[[AsyncSession, Any], Awaitable[Callable[["_GraphState"], None]]]
+
+
+class _GraphState:
+    """One consistent set of indexes, built at load and patched per entity.
+
+    User IDs are interned to list positions; group and agent IDs are already
+    integers. Agent records are stored rendered for the response, without
+    their groups.
+    """
+
+    __slots__ = (
+        "user_index",
+        "user_groups",
+        "group_agents",
+        "agent_groups",
+        "agents",
+        "group_names",
+    )
+
+    def __init__(self):
+        self.user_index: dict[str, int] = {}
+        self.user_groups: list[dict[int, GroupRole]] = []
+        self.group_agents: dict[int, set[int]] = {}
+        self.agent_groups: dict[int, set[int]] = {}
+        self.agents: dict[int, dict[str, Any]] = {}
+        self.group_names: dict[int, str] = {}
+
+    def groups_of(self, user_id: str) -> dict[int, GroupRole]:
+        index = self.user_index.get(user_id)
+        return self.user_groups[index] if index is not None else {}
+
+    def set_user(
+        self, user_id: str, memberships: Iterable[tuple[int, GroupRole]]
+    ) -> None:
+        index = self.user_index.get(user_id)
+        if index is None:
+            index = self.user_index[user_id] = len(self.user_groups)
+            self.user_groups.append({})
+        self.user_groups[index] = dict(memberships)
+
+    def set_agent(
+        self, agent_id: int, record: dict[str, Any] | None, group_ids: Iterable[int]
+    ) -> None:
+        for group_id in self.agent_groups.pop(agent_id, set()):
+            self.group_agents.get(group_id, set()).discard(agent_id)
+        self.agents.pop(agent_id, None)
+        if record is None:
+            return
+        self.agents[agent_id] = record
+        self.agent_groups[agent_id] = set(group_ids)
+        for group_id in self.agent_groups[agent_id]:
+            self.group_agents.setdefault(group_id, set()).add(agent_id)
+
+    def set_group(self, group_id: int, name: str | None) -> None:
+        # Memberships and assignments are kept, as in SQL: a group can only
+        # be deleted once nothing references it
+        if name is None:
+            self.group_names.pop(group_id, None)
+        else:
+            self.group_names[group_id] = name
+
+    def diff(self, other: "_GraphState") -> list[str]:
+        """Describe every entity on which the two states disagree."""
+        differences = []
+        for user_id in sorted(self.user_index.keys() | other.user_index.keys()):
+            mine, theirs = self.groups_of(user_id), other.groups_of(user_id)
+            if mine != theirs:
+                differences.append(f"user {user_id}: {mine} != {theirs}")
+        for agent_id in sorted(self.agents.keys() | other.agents.keys()):
+            mine = (self.agents.get(agent_id), self.agent_groups.get(agent_id))
+            theirs = (other.agents.get(agent_id), other.agent_groups.get(agent_id))
+            if mine != theirs:
+                differences.append(f"agent {agent_id}: {mine} != {theirs}")
+        for group_id in sorted(self.group_names.keys() | other.group_names.keys()):
+            mine, theirs = (
+                self.group_names.get(group_id),
+                other.group_names.get(group_id),
+            )
+            if mine != theirs:
+                differences.append(f"group {group_id}: {mine!r} != {theirs!r}")
+        return differences
+
+
+def _render_agents(rows: Iterable[tuple]) -> dict[int, dict[str, Any]]:
+    """Render (id, external_id, name, created_by, created_at) rows for responses."""
+    rendered = render_user_agents(
+        [
+            {
+                "id": agent_id,
+                "agent_external_id": external_id,
+                "name": name,
+                "created_by": created_by,
+                "created_at": created_at,
+                "groups": [],
+            }
+            for agent_id, external_id, name, created_by, created_at in rows
+        ]
+    )
+    for record in rendered:
+        del record["groups"]
+    return {record["id"]: record for record in rendered}
+
+
+_AGENT_COLUMNS = (
+    Agent.id,
+    Agent.agent_external_id,
+    Agent.name,
+    Agent.created_by,
+    Agent.created_at,
+)
+
+
+class AuthorizationGraph:
+    """Answers permission checks and agent listings from memory.
+
+    The graph is loaded from SQL once at start and then patched one entity
+    at a time via reload(), which re-reads that entity's rows. Callers
+    reload after every write; PermissionService does so from its
+    invalidation calls and from the invalidation messages other workers
+    publish. A periodic full resync bounds drift from anything missed.
+
+    Not thread-safe — intended to be used from the event loop only.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self._session_factory = session_factory
+        self._state: _GraphState | None = None
+        # Entities reloaded while a full load is running; replayed after it,
+        # since the load's snapshot may predate them
+        self._dirty: set[Target] | None = None
+        # Sequence number of the newest reload in flight per entity
+        self._reload_seq = itertools.count()
+        self._latest_reload: dict[Target, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._resync_task: asyncio.Task | None = None
+        self._fetchers: dict[str, Fetcher] = {
+            "user": self._fetch_user,
+            "agent": self._fetch_agent,
+            "group": self._fetch_group,
+        }
+
+    @property
+    def ready(self) -> bool:
+        """True once the initial load has completed."""
+        return self._state is not None
+
+    async def start(self) -> None:
+        """Load the graph and start the periodic resync."""
+        await self.load()
+        if AUTHZ_GRAPH_RESYNC_SECONDS > 0:
+            self._resync_task = asyncio.create_task(self._resync_loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic resync and any scheduled reloads."""
+        tasks = list(self._tasks)
+        if self._resync_task:
+            tasks.append(self._resync_task)
+            self._resync_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def roles(self, user_id: str, agent_id: int) -> set[GroupRole]:
+        """The user's roles in the groups the agent is assigned to."""
+        state = self._state
+        groups = state.groups_of(user_id)
+        agent_groups = state.agent_groups.get(agent_id)
+        if not groups or not agent_groups:
+            return set()
+        if len(agent_groups) < len(groups):
+            return {groups[g] for g in agent_groups if g in groups}
+        return {role for g, role in groups.items() if g in agent_groups}
+
+    def group_role(self, user_id: str, group_id: int) -> GroupRole | None:
+        """The user's role in a group, or None if they are not a member."""
+        return self._state.groups_of(user_id).get(group_id)
+
+    def user_agents(
+        self, user_id: str, *, is_superadmin: bool = False
+    ) -> list[dict[str, Any]] | None:
+        """Agents a user can access, shaped like AgentService.get_user_agents.
+
+        Agents come rendered for the response, as from the cache. Returns None
+        for a user without memberships: the graph does not track users, so
+        the caller must tell "no groups" from "no such user" itself.
+        """
+        state = self._state
+        if is_superadmin:
+            visible = None
+            agent_ids = sorted(a for a, groups in state.agent_groups.items() if groups)
+        else:
+            visible = state.groups_of(user_id)
+            if not visible:
+                return None
+            agent_ids = sorted(
+                {a for g in visible for a in state.group_agents.get(g, ())}
+            )
+        agents = []
+        for agent_id in agent_ids:
+            group_ids = state.agent_groups[agent_id]
+            if visible is not None:
+                group_ids = group_ids & visible.keys()
+            groups = [
+                {"group_id": g, "group_name": state.group_names[g]}
+                for g in sorted(group_ids)
+                if g in state.group_names
+            ]
+            if groups:
+                agents.append({**state.agents[agent_id], "groups": groups})
+        return agents
+
+    # ------------------------
+    # Loading and updates
+    # ------------------------
+    async def load(self) -> None:
+        """(Re)build the whole graph from SQL and swap it in."""
+        self._dirty = set()
+        try:
+            async with self._session_factory() as session:
+                state = await self._fetch_all(session)
+            if self._state is not None:
+                differences = self._state.diff(state)
+                if differences:
+                    logger.warning(
+                        "Authorization graph drifted from SQL on %d entities: %s",
+                        len(differences),
+                        "; ".join(differences[:10]),
+                    )
+            self._state = state
+            dirty, self._dirty = self._dirty, None
+        except BaseException:
+            self._dirty = None
+            raise
+        for kind, target in dirty:
+            await self.reload(kind, target)
+        logger.info(
+            "Authorization graph loaded: %d users, %d groups, %d agents",
+            len(state.user_index),
+            len(state.group_names),
+            len(state.agents),
+        )
+
+    async def check_consistency(self) -> list[str]:
+        """Compare the live graph with SQL without changing it.
+
+        Returns one description per disagreeing user, agent or group.
+        """
+        async with self._session_factory() as session:
+            fresh = await self._fetch_all(session)
+        return self._state.diff(fresh) if self._state else ["graph not loaded"]
+
+    async def reload(self, kind: str, target: Any) -> None:
+        """Re-read one user's memberships, agent's groups or group's name."""
+        key = (kind, target)
+        if self._dirty is not None:
+            self._dirty.add(key)
+        while self._state is not None:
+            state = self._state
+            seq = self._latest_reload[key] = next(self._reload_seq)
+            try:
+                async with self._session_factory() as session:
+                    apply = await self._fetchers[kind](session, target)
+            finally:
+                newest = self._latest_reload.get(key) == seq
+                if newest:
+                    del self._latest_reload[key]
+            if not newest:
+                return  # a later reload read newer rows and applies them
+            if self._state is state:
+                apply(state)
+                return
+            # A full load was swapped in meanwhile and may predate these rows
+
+    def schedule_reload(self, kind: str, target: Any) -> None:
+        """Reload an entity in the background (for synchronous callers)."""
+        task = asyncio.create_task(self._reload_logged(kind, target))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reload_logged(self, kind: str, target: Any) -> None:
+        try:
+            await self.reload(kind, target)
+        except Exception:
+            logger.warning(
+                "Authorization graph reload failed for %s %s",
+                kind,
+                target,
+                exc_info=True,
+            )
+
+    async def _resync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(AUTHZ_GRAPH_RESYNC_SECONDS)
+            try:
+                await self.load()
+            except Exception:
+                logger.warning("Authorization graph resync failed", exc_info=True)
+
+    # ------------------------
+    # SQL
+    # ------------------------
+    @staticmethod
+    async def _fetch_all(session: AsyncSession) -> _GraphState:
+        state = _GraphState()
+        memberships: dict[str, list[tuple[int, GroupRole]]] = {}
+        result = await session.execute(
+            select(
+                GroupMembership.entra_object_id,
+                GroupMembership.group_id,
+                GroupMembership.role,
+            )
+        )
+        for user_id, group_id, role in result:
+            memberships.setdefault(user_id, []).append((group_id, role))
+        for user_id, groups in memberships.items():
+            state.set_user(user_id, groups)
+
+        result = await session.execute(select(Group.id, Group.name))
+        state.group_names = dict(result.all())
+
+        agent_groups: dict[int, list[int]] = {}
+        result = await session.execute(select(GroupAgent.agent_id, GroupAgent.group_id))
+        for agent_id, group_id in result:
+            agent_groups.setdefault(agent_id, []).append(group_id)
+
+        result = await session.execute(select(*_AGENT_COLUMNS))
+        for agent_id, record in _render_agents(result.all()).items():
+            state.set_agent(agent_id, record, agent_groups.get(agent_id, ()))
+        return state
+
+    @staticmethod
+    async def _fetch_user(
+        session: AsyncSession, user_id: str
+    ) -> Callable[[_GraphState], None]:
+        result = await session.execute(
+            select(GroupMembership.group_id, GroupMembership.role).where(
+                GroupMembership.entra_object_id == user_id
+            )
+        )
+        memberships = result.all()
+        return lambda state: state.set_user(user_id, memberships)
+
+    @staticmethod
+    async def _fetch_agent(
+        session: AsyncSession, agent_id: int
+    ) -> Callable[[_GraphState], None]:
+        result = await session.execute(
+            select(*_AGENT_COLUMNS).where(Agent.id == agent_id)
+        )
+        record = _render_agents(result.all()).get(agent_id)
+        # Group names come along: the agent may be the first in a new group
+        result = await session.execute(
+            select(Group.id, Group.name)
+            .join(GroupAgent, GroupAgent.group_id == Group.id)
+            .where(GroupAgent.agent_id == agent_id)
+        )
+        groups = dict(result.all())
+
+        def apply(state: _GraphState) -> None:
+            for group_id, name in groups.items():
+                state.set_group(group_id, name)
+            state.set_agent(agent_id, record, groups)
+
+        return apply
+
+    @staticmethod
+    async def _fetch_group(
+        session: AsyncSession, group_id: int
+    ) -> Callable[[_GraphState], None]:
+        result = await session.execute(select(Group.name).where(Group.id == group_id))
+        name = result.scalar_one_or_none()
+        return lambda state: state.set_group(group_id, name)
@@ -0,0 +1,191 @@
+"""
+Encodings for the permission verdicts, user agents lists and agent catalog
+entries kept in Redis
+"""
+
+import json
+import os
+from typing import Any, Protocol
+
+from pydantic import TypeAdapter
+
+from src.domain.models.agent_schemas import UserAgentResponse
+
+# Agent lists are validated and rendered to JSON-ready dicts once, when they
+# are cached, so hits can be returned without going through pydantic again.
+_USER_AGENTS = TypeAdapter(list[UserAgentResponse])
+
+Verdict = tuple[bool, str | None]
+UserAgentsEntry = tuple[float, list[dict[str, Any]]]
+
+
+def render_user_agents(agents: list[dict]) -> list[dict[str, Any]]:
+    """Validate an agents list and render it as the response would serialize it."""
+    return _USER_AGENTS.dump_python(_USER_AGENTS.validate_python(agents), mode="json")
+
+
+class CacheCodec(Protocol):
+    """Encodes values for Redis and decodes them back.
+
+    Decoders return None for a value in another codec's format (e.g. written
+    by a worker still on the previous codec); callers treat that as a miss.
+    """
+
+    name: str
+
+    def encode_verdict(self, allowed: bool, role: str | None) -> str: ...
+
+    def decode_verdict(self, value: str) -> Verdict | None: ...
+
+    def encode_user_agents(self, soft_expires_at: float, agents: list[dict]) -> str: ...
+
+    def decode_user_agents(self, value: str) -> UserAgentsEntry | None: ...
+
+    def encode_agent(self, agent: dict[str, Any]) -> str:
+        """Encode one agent as render_user_agents returns it."""
+        ...
+
+    def decode_agent(self, value: str) -> dict[str, Any] | None: ...
+
+
+class JsonCacheCodec:
+    """The original self-describing JSON documents."""
+
+    name = "json"
+
+    def encode_verdict(self, allowed: bool, role: str | None) -> str:
+        return json.dumps({"allowed": allowed, "role": role})
+
+    def decode_verdict(self, value: str) -> Verdict | None:
+        try:
+            data = json.loads(value)
+            return data["allowed"], data.get("role")
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    def encode_user_agents(self, soft_expires_at: float, agents: list[dict]) -> str:
+        return json.dumps(
+            {
+                "soft_expires_at": soft_expires_at,
+                "agents": render_user_agents(agents),
+            }
+        )
+
+    def decode_user_agents(self, value: str) -> UserAgentsEntry | None:
+        try:
+            data = json.loads(value)
+            return data["soft_expires_at"], data["agents"]
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    def encode_agent(self, agent: dict[str, Any]) -> str:
+        return json.dumps(agent)
+
+    def decode_agent(self, value: str) -> dict[str, Any] | None:
+        try:
+            agent = json.loads(value)
+        except ValueError:
+            return None
+        return agent if isinstance(agent, dict) else None
+
+
+class CompactCacheCodec:
+    """One character per verdict; agent lists as positional rows.
+
+    A list is "<soft_expires_at>\\n" followed by a JSON array with one
+    [id, agent_external_id, name, created_by, created_at, [group_id,
+    group_name, ...]] row per agent, created_at already rendered. Field
+    names are not repeated per agent and nothing is parsed beyond json.loads.
+    A single agent is one such row.
+    """
+
+    name = "compact"
+
+    _VERDICT_CODES = {(False, None): "-", (True, "user"): "u", (True, "admin"): "a"}
+    _VERDICTS = {code: verdict for verdict, code in _VERDICT_CODES.items()}
+
+    def encode_verdict(self, allowed: bool, role: str | None) -> str:
+        return self._VERDICT_CODES[(allowed, role if allowed else None)]
+
+    def decode_verdict(self, value: str) -> Verdict | None:
+        return self._VERDICTS.get(value)
+
+    def encode_user_agents(self, soft_expires_at: float, agents: list[dict]) -> str:
+        rows = [self._row(agent) for agent in render_user_agents(agents)]
+        body = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+        return f"{soft_expires_at:.3f}\n{body}"
+
+    def decode_user_agents(self, value: str) -> UserAgentsEntry | None:
+        header, sep, body = value.partition("\n")
+        try:
+            soft_expires_at = float(header)
+            rows = json.loads(body) if sep else None
+        except ValueError:
+            return None
+        if not isinstance(rows, list):
+            return None
+        return soft_expires_at, [self._agent(*row) for row in rows]
+
+    def encode_agent(self, agent: dict[str, Any]) -> str:
+        return json.dumps(self._row(agent), ensure_ascii=False, separators=(",", ":"))
+
+    def decode_agent(self, value: str) -> dict[str, Any] | None:
+        try:
+            row = json.loads(value)
+        except ValueError:
+            return None
+        if not isinstance(row, list):
+            return None
+        return self._agent(*row)
+
+    @staticmethod
+    def _row(agent: dict[str, Any]) -> list:
+        return [
+            agent["id"],
+            agent["agent_external_id"],
+            agent["name"],
+            agent["created_by"],
+            agent["created_at"],
+            [
+                field
+                for group in agent["groups"]
+                for field in (group["group_id"], group["group_name"])
+            ],
+        ]
+
+    @staticmethod
+    def _agent(
+        agent_id: int,
+        external_id: str,
+        name: str,
+        created_by: str,
+        created_at: str,
+        groups: list,
+    ) -> dict[str, Any]:
+        return {
+            "id": agent_id,
+            "agent_external_id": external_id,
+            "name": name,
+            "created_by": created_by,
+            "created_at": created_at,
+            "groups": [
+                {"group_id": groups[i], "group_name": groups[i + 1]}
+                for i in range(0, len(groups), 2)
+            ],
+        }
+
+
+CODECS: dict[str, type[CacheCodec]] = {
+    JsonCacheCodec.name: JsonCacheCodec,
+    CompactCacheCodec.name: CompactCacheCodec,
+}
+
+
+def get_cache_codec(name: str | None = None) -> CacheCodec:
+    """Return the codec named by `name`, or by PERMISSION_CACHE_CODEC."""
+    name = (name or os.getenv("PERMISSION_CACHE_CODEC", "compact")).lower()
+    if name not in CODECS:
+        raise ValueError(
+            f"Unknown cache codec {name!r}; expected one of {list(CODECS)}"
+        )
+    return CODECS[name]()
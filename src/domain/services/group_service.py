@@ -3,13 +3,18 @@ import logging
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.base.utils.pagination import PageRequest, keyset
 from src.domain.models.entities.group import Group
 from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.services.agent_change_log_service import AgentChangeLogService
 
 logger = logging.getLogger(__name__)
 
 
 class GroupService:
+    def __init__(self, changes: AgentChangeLogService | None = None):
+        self._changes = changes or AgentChangeLogService()
+
     async def create_group(
         self,
         session: AsyncSession,
@@ -38,19 +43,27 @@ class GroupService:
         session: AsyncSession,
         entra_object_id: str,
         is_superadmin: bool,
+        page: PageRequest | None = None,
     ) -> list[Group]:
         """Return groups visible to the user.
 
         Superadmins see all groups; others see only groups they belong to.
+        With `page`, only that page of groups (see keyset()).
         """
         if is_superadmin:
-            result = await session.execute(select(Group))
+            stmt = select(Group)
+            key = Group.id
         else:
-            result = await session.execute(
+            stmt = (
                 select(Group)
                 .join(GroupMembership, GroupMembership.group_id == Group.id)
                 .where(GroupMembership.entra_object_id == entra_object_id)
             )
+            # Served by the (entra_object_id, group_id) unique index
+            key = GroupMembership.group_id
+        if page is not None:
+            stmt = keyset(stmt, key, page)
+        result = await session.execute(stmt)
         return list(result.scalars().all())
 
     async def update_group(
@@ -65,8 +78,10 @@ class GroupService:
         if group is None:
             return None
 
-        if name is not None:
+        if name is not None and name != group.name:
             group.name = name
+            # Agent lists show group names
+            await self._changes.record_group(session, group_id)
         if description is not None:
             group.description = description
 
@@ -85,6 +100,7 @@ class GroupService:
         if group is None:
             return False
 
+        await self._changes.record_group(session, group_id)
         await session.delete(group)
         await session.commit()
         logger.info("Deleted group id=%s", group_id)
@@ -4,15 +4,26 @@ from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.base.utils.pagination import PageRequest, keyset
 from src.domain.models.entities.enums import GroupRole
 from src.domain.models.entities.group import Group
 from src.domain.models.entities.group_membership import GroupMembership
 from src.domain.models.entities.user import User
+from src.domain.services.agent_change_log_service import AgentChangeLogService
+from src.domain.services.user_agent_access_service import UserAgentAccessService
 
 logger = logging.getLogger(__name__)
 
 
 class MembershipService:
+    def __init__(
+        self,
+        access: UserAgentAccessService | None = None,
+        changes: AgentChangeLogService | None = None,
+    ):
+        self._access = access or UserAgentAccessService()
+        self._changes = changes or AgentChangeLogService()
+
     async def add_member(
         self,
         session: AsyncSession,
@@ -40,10 +51,13 @@ class MembershipService:
         )
         session.add(membership)
         try:
-            await session.commit()
+            await session.flush()
         except IntegrityError:
             await session.rollback()
             raise ValueError("duplicate_membership") from None
+        await self._access.refresh_users(session, [entra_object_id], [group_id])
+        await self._changes.record_membership(session, entra_object_id, group_id)
+        await session.commit()
 
         await session.refresh(membership)
         logger.info(
@@ -83,6 +97,8 @@ class MembershipService:
                 raise ValueError("last_admin")
 
         await session.delete(membership)
+        await self._access.refresh_users(session, [entra_object_id], [group_id])
+        await self._changes.record_membership(session, entra_object_id, group_id)
         await session.commit()
         logger.info(
             "Removed member entra_object_id=%s from group_id=%s",
@@ -121,6 +137,8 @@ class MembershipService:
                 raise ValueError("last_admin")
 
         membership.role = new_role
+        await self._access.refresh_users(session, [entra_object_id], [group_id])
+        # Agent lists do not show roles, so there is no change to log
         await session.commit()
         await session.refresh(membership)
         logger.info(
@@ -135,15 +153,21 @@ class MembershipService:
         self,
         session: AsyncSession,
         group_id: int,
+        page: PageRequest | None = None,
     ) -> list:
-        """List members of a group with user details."""
+        """List members of a group with user details.
+
+        Rows also carry the membership `id`. With `page`, only that page of
+        memberships (see keyset()).
+        """
         # Verify group exists
         result = await session.execute(select(Group).where(Group.id == group_id))
         if result.scalar_one_or_none() is None:
             raise ValueError("group_not_found")
 
-        result = await session.execute(
+        stmt = (
             select(
+                GroupMembership.id,
                 GroupMembership.entra_object_id,
                 User.display_name,
                 User.email,
@@ -153,6 +177,10 @@ class MembershipService:
             .join(User, User.entra_object_id == GroupMembership.entra_object_id)
             .where(GroupMembership.group_id == group_id)
         )
+        if page is not None:
+            # Served by the (group_id, id) index
+            stmt = keyset(stmt, GroupMembership.id, page)
+        result = await session.execute(stmt)
         return list(result.all())
 
     async def _count_admins(self, session: AsyncSession, group_id: int) -> int:
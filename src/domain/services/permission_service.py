@@ -1,29 +1,225 @@
-import json
+import asyncio
+import hashlib
 import logging
+import os
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.base.config.redis_cache import RedisCache
+from src.base.utils.expiring_lru_cache import ExpiringLRUCache
+from src.base.utils.single_flight import SingleFlight
+from src.domain.models.entities.agent import Agent
 from src.domain.models.entities.enums import GroupRole
 from src.domain.models.entities.group_agent import GroupAgent
 from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user_agent_access import UserAgentAccess
 from src.domain.models.permission_schemas import PermissionAction
+from src.domain.services.agent_listing import list_agents_with_groups
+from src.domain.services.authorization_graph import AuthorizationGraph
+from src.domain.services.cache_codec import (
+    CacheCodec,
+    get_cache_codec,
+    render_user_agents,
+)
 
 logger = logging.getLogger(__name__)
 
 CACHE_TTL_SECONDS = 60
 
+# In-process L1 tier for permission verdicts, in front of Redis. Its TTL is
+# kept well below CACHE_TTL_SECONDS; invalidations reach other workers and
+# pods through Redis pub/sub, the TTL bounds staleness if a message is lost.
+PERMISSION_L1_MAX_SIZE = int(os.getenv("PERMISSION_L1_MAX_SIZE", "10000"))
+PERMISSION_L1_TTL_SECONDS = float(os.getenv("PERMISSION_L1_TTL_SECONDS", "5"))
+INVALIDATION_CHANNEL = "perm-invalidate"
+
+# Cache keys embed generation counters instead of being deleted on change:
+# bumping a user's or agent's counter (one INCR) makes every key built from
+# the old value unreachable, and those entries age out by CACHE_TTL_SECONDS.
+# Counters carry no TTL. A regular user's agent list is versioned by their
+# user counter, their own list counter and USER_AGENTS_GEN_KEY (which
+# versions every list at once); a superadmin's own list shows the whole
+# catalog and is versioned by AGENT_CATALOG_GEN_KEY alone.
+USER_AGENTS_GEN_KEY = "gen:user_agents"
+AGENT_CATALOG_GEN_KEY = "gen:agent_catalog"
+
+# The agent catalog (every agent with all its groups, as superadmins and the
+# admin listing see it) is one hash shared by all of them, with a field per
+# agent. Assignment changes patch the changed agent's field in place and
+# bump AGENT_CATALOG_GEN_KEY; other changes delete the hash, and the next
+# read rebuilds it whole. A catalog older than AGENT_CATALOG_REFRESH_SECONDS
+# is still served but rebuilt in the background, which bounds how long a
+# lost patch can linger; it expires after twice that.
+AGENT_CATALOG_KEY = "agent_catalog"
+AGENT_CATALOG_REFRESH_SECONDS = int(os.getenv("AGENT_CATALOG_REFRESH_SECONDS", "3600"))
+# Field of the catalog hash holding when it was built, so an empty catalog
+# is still a hit
+AGENT_CATALOG_BUILT_FIELD = "built_at"
+# Fields written per round trip when a rebuilt catalog is stored
+AGENT_CATALOG_WRITE_BATCH = 1000
+# Lock TTL for background rebuilds: one worker rebuilds, the others keep
+# serving the current catalog
+AGENT_CATALOG_REBUILD_LOCK_MS = 60_000
+
+# Group reads are versioned by one counter per group and GROUPS_GEN_KEY,
+# bumped whenever any group is created, updated or deleted.
+GROUPS_GEN_KEY = "gen:groups"
+
+# ETags hash the generations versioning a response plus ETAG_EPOCH_KEY, a
+# random token set once: should Redis lose its data, counters restart from
+# 0 under a new epoch and never reproduce an ETag issued before.
+ETAG_EPOCH_KEY = "gen:etag_epoch"
+
+# Agent-assignment changes bump the list counter of every member of the
+# changed groups; above this many members, the global counter is bumped instead.
+USER_AGENTS_INVALIDATION_MAX_FANOUT = int(
+    os.getenv("USER_AGENTS_INVALIDATION_MAX_FANOUT", "1000")
+)
+
+# User agents lists are served stale-while-revalidate: past the soft expiry
+# the cached list is still returned while one background task reloads it;
+# past the hard expiry (the Redis TTL) it is gone and callers load it inline.
+# Invalidation bumps the key's generation, so it still takes effect at once.
+USER_AGENTS_SOFT_TTL_SECONDS = int(
+    os.getenv("USER_AGENTS_SOFT_TTL_SECONDS", str(CACHE_TTL_SECONDS))
+)
+USER_AGENTS_HARD_TTL_SECONDS = int(os.getenv("USER_AGENTS_HARD_TTL_SECONDS", "600"))
+
+# Cross-worker miss coalescing: the worker that takes a short Redis lock on a
+# missing key computes it, others poll Redis for the value for up to the lock
+# TTL before computing it themselves. 0 disables the lock (misses are then
+# only coalesced within each worker).
+PERMISSION_MISS_LOCK_MS = int(os.getenv("PERMISSION_MISS_LOCK_MS", "0"))
+PERMISSION_MISS_LOCK_POLL_SECONDS = 0.02
+
+# Verdict layout in Redis: "keys" stores one string key per (user, agent,
+# action); "hash" keeps all of a user's verdicts in one hash, perm:{user},
+# with one field per (agent, action), so a user invalidation is one DEL and
+# a batch for one user one HMGET. Both are versioned by the same generation
+# counters, so during a rollout workers on either layout stay correct and
+# merely miss each other's entries. A user's hash expires CACHE_TTL_SECONDS
+# after its first write; later writes do not extend it.
+PERMISSION_CACHE_LAYOUT = os.getenv("PERMISSION_CACHE_LAYOUT", "keys").lower()
+
+# Resolve cache misses from the materialized user_agent_access table (one
+# primary-key lookup) instead of joining group_memberships and group_agents.
+# Off by default: turn it on once `user_agent_access verify` reports the table
+# in step with the join, and off again while the table is rebuilt.
+PERMISSION_ACCESS_TABLE = (
+    os.getenv("PERMISSION_ACCESS_TABLE", "false").lower() == "true"
+)
+
+LocalKey = tuple[str, int, str]
+# Third element of the L1 key for a (user, group) role, in place of an action
+GROUP_ROLE_KEY = "group"
+# A cached value's location: a key, or a (hash key, field) pair
+Location = tuple[str, str | None]
+
 
 class PermissionService:
-    def __init__(self, cache: RedisCache):
+    def __init__(
+        self,
+        cache: RedisCache,
+        local_cache: ExpiringLRUCache | None = None,
+        codec: CacheCodec | None = None,
+        graph: AuthorizationGraph | None = None,
+    ):
         self._cache = cache
+        self._codec = codec or get_cache_codec()
+        # While the graph is ready, permission checks and group roles are
+        # answered from memory and bypass the caches below entirely; so are
+        # agent lists, except for users it has no groups for (the graph does
+        # not tell those from unknown users), which go through the cache.
+        self._graph = graph
+        # The L1 tier is only coherent across workers via pub/sub, so it is
+        # enabled only when Redis is configured.
+        if local_cache is None and cache.enabled and PERMISSION_L1_MAX_SIZE > 0:
+            local_cache = ExpiringLRUCache(PERMISSION_L1_MAX_SIZE)
+        self._local = local_cache
+        self._flights = SingleFlight()
+        self._refreshes: dict[str, asyncio.Task] = {}
+        self._listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start listening for invalidations published by other workers."""
+        if (self._local is None and self._graph is None) or not self._cache.enabled:
+            return
+        self._listener = asyncio.create_task(
+            self._cache.listen(
+                INVALIDATION_CHANNEL,
+                self._on_invalidation_message,
+                # Messages may have been missed while disconnected; the graph
+                # catches up at its next periodic resync
+                on_subscribe=self._local.clear if self._local else None,
+            )
+        )
+
+    @property
+    def _graph_ready(self) -> bool:
+        return self._graph is not None and self._graph.ready
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener and any background refreshes."""
+        tasks = list(self._refreshes.values())
+        if self._listener:
+            tasks.append(self._listener)
+            self._listener = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _user_gen_key(user_id: str) -> str:
+        return f"gen:user:{user_id}"
+
+    @staticmethod
+    def _agent_gen_key(agent_id: int) -> str:
+        return f"gen:agent:{agent_id}"
 
-    def _cache_key(self, user_id: str, agent_id: int, action: str) -> str:
-        return f"perm:{user_id}:{agent_id}:{action}"
+    @staticmethod
+    def _user_agents_gen_key(user_id: str) -> str:
+        return f"gen:user_agents:{user_id}"
 
-    def _user_agents_key(self, user_id: str) -> str:
-        return f"user_agents:{user_id}"
+    @staticmethod
+    def _group_gen_key(group_id: int) -> str:
+        return f"gen:group:{group_id}"
+
+    def _cache_key(
+        self, user_id: str, agent_id: int, action: str, user_gen: int, agent_gen: int
+    ) -> Location:
+        if PERMISSION_CACHE_LAYOUT == "hash":
+            field = f"{agent_id}:{action}:g{user_gen}.{agent_gen}"
+            return self._user_hash_key(user_id), field
+        return f"perm:{user_id}:{agent_id}:{action}:g{user_gen}.{agent_gen}", None
+
+    def _group_role_key(self, user_id: str, group_id: int, user_gen: int) -> Location:
+        if PERMISSION_CACHE_LAYOUT == "hash":
+            return self._user_hash_key(user_id), f"group:{group_id}:g{user_gen}"
+        return f"perm:{user_id}:group:{group_id}:g{user_gen}", None
+
+    @staticmethod
+    def _user_hash_key(user_id: str) -> str:
+        return f"perm:{user_id}"
+
+    def _user_agents_key(self, user_id: str, *gens: int) -> str:
+        return f"user_agents:{user_id}:g{'.'.join(map(str, gens))}"
+
+    async def _generations(self, keys: list[str]) -> dict[str, int] | None:
+        """Read generation counters in one MGET. Unset counters read as 0.
+
+        None when Redis cannot be read: callers then neither read nor write
+        the cache, since entries versioned by counters that only read as 0
+        could be served again once Redis is back, after the real counters
+        (and so any invalidation made meanwhile) have moved on.
+        """
+        values = await self._cache.mget_counters(keys)
+        if values is None:
+            return None
+        return dict(zip(keys, values, strict=True))
 
     async def check_permission(
         self,
@@ -41,60 +237,740 @@ class PermissionService:
         if is_superadmin:
             return True, "superadmin"
 
-        key = self._cache_key(user_id, agent_id, action.value)
-        cached = await self._cache.get(key)
-        if cached is not None:
-            data = json.loads(cached)
-            return data["allowed"], data.get("role")
+        if self._graph_ready:
+            return self._resolve(self._graph.roles(user_id, agent_id), action)
+
+        local_key = (user_id, agent_id, action.value)
+        verdict = self._local_get(local_key)
+        if verdict is not None:
+            return verdict
 
-        # Query DB: join group_memberships with group_agents on group_id
-        stmt = (
-            select(GroupMembership.role)
+        async def compute() -> str:
+            result = await session.execute(self._roles_statement([user_id], [agent_id]))
+            roles = {role for _, _, role in result.all()}
+            return self._codec.encode_verdict(*self._resolve(roles, action))
+
+        # Generations are read before the DB query and the verdict is written
+        # back under them, so a concurrent invalidation can never be masked.
+        user_gen_key = self._user_gen_key(user_id)
+        agent_gen_key = self._agent_gen_key(agent_id)
+        gens = await self._generations([user_gen_key, agent_gen_key])
+        if gens is None:
+            return self._codec.decode_verdict(await compute())
+        key = self._cache_key(
+            user_id, agent_id, action.value, gens[user_gen_key], gens[agent_gen_key]
+        )
+        cached = await self._read(key)
+        verdict = self._codec.decode_verdict(cached) if cached is not None else None
+        if verdict is not None:
+            self._local_set(local_key, verdict)
+            return verdict
+
+        verdict = await self._load(key, compute, self._codec.decode_verdict)
+        self._local_set(local_key, verdict)
+        return verdict
+
+    async def check_permissions_batch(
+        self,
+        session: AsyncSession,
+        checks: list[tuple[str, int, PermissionAction]],
+        *,
+        is_superadmin: bool = False,
+    ) -> list[tuple[bool, str | None]]:
+        """Check many (user_id, agent_id, action) tuples at once.
+
+        Same semantics as check_permission, but generations and Redis hits
+        are each resolved with one MGET and all misses with one set-based
+        query. Results are returned in input order.
+        """
+        if is_superadmin:
+            return [(True, "superadmin")] * len(checks)
+
+        if self._graph_ready:
+            return [
+                self._resolve(self._graph.roles(user_id, agent_id), action)
+                for user_id, agent_id, action in checks
+            ]
+
+        keys: list[LocalKey] = [
+            (user_id, agent_id, action.value) for user_id, agent_id, action in checks
+        ]
+        unique = dict(zip(keys, checks, strict=True))
+        unique_keys = list(unique)
+
+        verdicts: dict[LocalKey, tuple[bool, str | None]] = {}
+        for key in unique_keys:
+            verdict = self._local_get(key)
+            if verdict is not None:
+                verdicts[key] = verdict
+
+        remote_keys = [key for key in unique_keys if key not in verdicts]
+        gen_keys = list(
+            dict.fromkeys(
+                gen_key
+                for user_id, agent_id, _ in remote_keys
+                for gen_key in (
+                    self._user_gen_key(user_id),
+                    self._agent_gen_key(agent_id),
+                )
+            )
+        )
+        gens = await self._generations(gen_keys)
+        # With unknown generations, every remote key is computed uncached
+        redis_keys = {
+            key: self._cache_key(
+                *key,
+                gens[self._user_gen_key(key[0])],
+                gens[self._agent_gen_key(key[1])],
+            )
+            for key in (remote_keys if gens is not None else [])
+        }
+
+        cached_values = await self._read_many(list(redis_keys.values()))
+        for key, cached in zip(redis_keys, cached_values, strict=True):
+            verdict = self._codec.decode_verdict(cached) if cached is not None else None
+            if verdict is not None:
+                verdicts[key] = verdict
+                self._local_set(key, verdict)
+
+        misses = [key for key in unique_keys if key not in verdicts]
+        if misses:
+            user_ids = {unique[key][0] for key in misses}
+            agent_ids = {unique[key][1] for key in misses}
+
+            # One query for every miss: roles per (user, agent) pair
+            result = await session.execute(self._roles_statement(user_ids, agent_ids))
+            roles_by_pair: dict[tuple[str, int], set[GroupRole]] = {}
+            for user_id, agent_id, role in result.all():
+                roles_by_pair.setdefault((user_id, agent_id), set()).add(role)
+
+            to_cache: dict[Location, str] = {}
+            for key in misses:
+                user_id, agent_id, action = unique[key]
+                roles = roles_by_pair.get((user_id, agent_id), set())
+                verdicts[key] = self._resolve(roles, action)
+                if key in redis_keys:
+                    to_cache[redis_keys[key]] = self._codec.encode_verdict(
+                        *verdicts[key]
+                    )
+                    self._local_set(key, verdicts[key])
+            await self._write_many(to_cache, CACHE_TTL_SECONDS)
+
+        return [verdicts[key] for key in keys]
+
+    async def get_group_role(
+        self, session: AsyncSession, user_id: str, group_id: int
+    ) -> GroupRole | None:
+        """Return the user's role in a group, or None if they are not a member.
+
+        Read through the same tiers as permission checks and versioned by the
+        user's generation counter, so membership invalidations cover it.
+        """
+        if self._graph_ready:
+            return self._graph.group_role(user_id, group_id)
+
+        local_key = (user_id, group_id, GROUP_ROLE_KEY)
+        verdict = self._local_get(local_key)
+        if verdict is None:
+
+            async def compute() -> str:
+                result = await session.execute(
+                    select(GroupMembership.role).where(
+                        GroupMembership.entra_object_id == user_id,
+                        GroupMembership.group_id == group_id,
+                    )
+                )
+                role = result.scalar_one_or_none()
+                return self._codec.encode_verdict(
+                    role is not None, role.value if role else None
+                )
+
+            user_gen_key = self._user_gen_key(user_id)
+            gens = await self._generations([user_gen_key])
+            if gens is None:
+                verdict = self._codec.decode_verdict(await compute())
+            else:
+                key = self._group_role_key(user_id, group_id, gens[user_gen_key])
+                cached = await self._read(key)
+                verdict = (
+                    self._codec.decode_verdict(cached) if cached is not None else None
+                )
+                if verdict is None:
+                    verdict = await self._load(key, compute, self._codec.decode_verdict)
+                self._local_set(local_key, verdict)
+
+        allowed, role = verdict
+        return GroupRole(role) if allowed else None
+
+    @staticmethod
+    def _roles_statement(user_ids: Iterable[str], agent_ids: Iterable[int]):
+        """(user, agent, role) rows for every pair of the given users and agents."""
+        if PERMISSION_ACCESS_TABLE:
+            return select(
+                UserAgentAccess.entra_object_id,
+                UserAgentAccess.agent_id,
+                UserAgentAccess.best_role,
+            ).where(
+                UserAgentAccess.entra_object_id.in_(user_ids),
+                UserAgentAccess.agent_id.in_(agent_ids),
+            )
+        return (
+            select(
+                GroupMembership.entra_object_id,
+                GroupAgent.agent_id,
+                GroupMembership.role,
+            )
             .join(GroupAgent, GroupMembership.group_id == GroupAgent.group_id)
             .where(
-                GroupMembership.entra_object_id == user_id,
-                GroupAgent.agent_id == agent_id,
+                GroupMembership.entra_object_id.in_(user_ids),
+                GroupAgent.agent_id.in_(agent_ids),
             )
         )
 
-        if action == PermissionAction.CREATE:
-            stmt = stmt.where(GroupMembership.role == GroupRole.ADMIN)
-
-        result = await session.execute(stmt)
-        roles = [row[0] for row in result.all()]
+    @staticmethod
+    def _resolve(
+        roles: set[GroupRole], action: PermissionAction
+    ) -> tuple[bool, str | None]:
+        """Turn the user's roles in the agent's groups into (allowed, role).
 
+        CREATE requires admin; the highest role wins (admin > user).
+        """
+        if action == PermissionAction.CREATE:
+            roles = roles & {GroupRole.ADMIN}
         if not roles:
-            value = json.dumps({"allowed": False, "role": None})
-            await self._cache.set(key, value, CACHE_TTL_SECONDS)
             return False, None
+        return True, "admin" if GroupRole.ADMIN in roles else "user"
 
-        # Determine highest role: admin > user
-        highest = "admin" if GroupRole.ADMIN in roles else "user"
+    # ------------------------
+    # Redis reads and writes by location
+    # ------------------------
+    async def _read(self, location: Location) -> str | None:
+        key, field = location
+        if field is None:
+            return await self._cache.get(key)
+        return await self._cache.hget(key, field)
 
-        value = json.dumps({"allowed": True, "role": highest})
-        await self._cache.set(key, value, CACHE_TTL_SECONDS)
-        return True, highest
+    async def _write(self, location: Location, value: str, ttl: int) -> None:
+        key, field = location
+        if field is None:
+            await self._cache.set(key, value, ttl)
+        else:
+            await self._cache.hset_with_ttl(key, {field: value}, ttl)
 
-    async def get_cached_user_agents(self, user_id: str) -> list[dict] | None:
-        """Return cached user agents list, or None if not cached."""
-        value = await self._cache.get(self._user_agents_key(user_id))
-        if value is not None:
-            return json.loads(value)
-        return None
+    async def _read_many(self, locations: list[Location]) -> list[str | None]:
+        """Read many locations in one round-trip: one MGET, or one HMGET per hash."""
+        if not locations or locations[0][1] is None:
+            return await self._cache.mget([key for key, _ in locations])
+        fields_by_hash: dict[str, list[str]] = {}
+        for key, field in locations:
+            fields_by_hash.setdefault(key, []).append(field)
+        if len(fields_by_hash) == 1:
+            ((key, fields),) = fields_by_hash.items()
+            hash_values = await self._cache.hmget(key, fields)
+            values = dict(zip(fields, hash_values, strict=True))
+            return [values[field] for _, field in locations]
+        async with self._cache.pipeline() as pipe:
+            for key, fields in fields_by_hash.items():
+                pipe.hmget(key, fields)
+        if not pipe.results:
+            return [None] * len(locations)
+        values = {
+            (key, field): value
+            for (key, fields), hash_values in zip(
+                fields_by_hash.items(), pipe.results, strict=True
+            )
+            for field, value in zip(fields, hash_values, strict=True)
+        }
+        return [values[location] for location in locations]
+
+    async def _write_many(self, values: dict[Location, str], ttl: int) -> None:
+        """Write many locations with the same TTL in one pipelined round-trip."""
+        if not values:
+            return
+        if next(iter(values))[1] is None:
+            await self._cache.mset_with_ttl(
+                {key: value for (key, _), value in values.items()}, ttl
+            )
+            return
+        fields_by_hash: dict[str, dict[str, str]] = {}
+        async with self._cache.pipeline() as pipe:
+            for (key, field), value in values.items():
+                if field is None:
+                    pipe.set(key, value, ttl)
+                else:
+                    fields_by_hash.setdefault(key, {})[field] = value
+            for key, fields in fields_by_hash.items():
+                pipe.hset_with_ttl(key, fields, ttl)
+
+    def _user_agents_gen_keys(self, user_id: str, is_superadmin: bool) -> list[str]:
+        if is_superadmin:
+            return [AGENT_CATALOG_GEN_KEY]
+        return [
+            self._user_gen_key(user_id),
+            self._user_agents_gen_key(user_id),
+            USER_AGENTS_GEN_KEY,
+        ]
 
-    async def set_cached_user_agents(self, user_id: str, agents: list[dict]) -> None:
-        """Cache the user agents list."""
-        value = json.dumps(agents, default=str)
-        await self._cache.set(self._user_agents_key(user_id), value, CACHE_TTL_SECONDS)
+    async def _user_agents_cache_key(self, user_id: str) -> str | None:
+        """The key of a user's cached list, or None if its generations are
+        unknown."""
+        gen_keys = self._user_agents_gen_keys(user_id, is_superadmin=False)
+        gens = await self._generations(gen_keys)
+        if gens is None:
+            return None
+        return self._user_agents_key(user_id, *(gens[key] for key in gen_keys))
+
+    async def get_user_agents(
+        self,
+        user_id: str,
+        load: Callable[[], Awaitable[list[dict]]],
+        *,
+        is_superadmin: bool = False,
+    ) -> list[dict]:
+        """Return the user agents list from cache, calling `load` on a miss.
+
+        A list past its soft expiry is returned as is and reloaded in the
+        background, so `load` must not depend on the caller's request scope
+        (e.g. it should open its own DB session).
+
+        Agents are returned as the response serializes them (created_at
+        already a string), whether they came from the cache or from `load`.
+
+        `is_superadmin` selects the full-catalog list a superadmin sees for
+        themselves, served from the shared agent catalog (see
+        get_agent_catalog) rather than cached per user.
+        """
+        if self._graph_ready:
+            agents = self._graph.user_agents(user_id, is_superadmin=is_superadmin)
+            if agents is not None:
+                return agents
+        if is_superadmin:
+            return await self.get_agent_catalog(load)
+
+        # The key is versioned before loading: a reload racing with an
+        # invalidation lands under the old generation, which nobody reads.
+        key = await self._user_agents_cache_key(user_id)
+        if key is None:
+            return render_user_agents(await load())
+
+        async def compute() -> str:
+            return self._codec.encode_user_agents(
+                time.time() + USER_AGENTS_SOFT_TTL_SECONDS, await load()
+            )
+
+        value = await self._cache.get(key)
+        entry = self._codec.decode_user_agents(value) if value is not None else None
+        if entry is None:
+            _, agents = await self._load(
+                (key, None),
+                compute,
+                self._codec.decode_user_agents,
+                USER_AGENTS_HARD_TTL_SECONDS,
+            )
+            return agents
+
+        soft_expires_at, agents = entry
+        if soft_expires_at <= time.time():
+            self._schedule_refresh(key, value, compute, USER_AGENTS_HARD_TTL_SECONDS)
+        return agents
+
+    # ------------------------
+    # Agent catalog
+    # ------------------------
+    async def get_agent_catalog(
+        self, load: Callable[[], Awaitable[list[dict]]]
+    ) -> list[dict]:
+        """Return every agent with all its groups from the shared catalog,
+        calling `load` to rebuild it when it is missing.
+
+        As with get_user_agents, agents come back rendered for the response,
+        and `load` must open its own DB session: a catalog past
+        AGENT_CATALOG_REFRESH_SECONDS is rebuilt in the background.
+        """
+        if not self._cache.enabled:
+            return render_user_agents(await load())
+
+        fields = await self._cache.hgetall(AGENT_CATALOG_KEY)
+        built_at = fields.get(AGENT_CATALOG_BUILT_FIELD)
+        agents = self._decode_catalog(fields) if built_at is not None else None
+        if agents is None:
+            return await self._flights.do(
+                AGENT_CATALOG_KEY, lambda: self._build_catalog(load)
+            )
+        if float(built_at) + AGENT_CATALOG_REFRESH_SECONDS <= time.time():
+            self._in_background(AGENT_CATALOG_KEY, lambda: self._rebuild_catalog(load))
+        return agents
+
+    def _decode_catalog(self, fields: dict[str, str]) -> list[dict] | None:
+        """The agents of a catalog hash in id order, or None if any is in
+        another codec's format."""
+        agents = []
+        for field, value in fields.items():
+            if not field.isdigit():
+                continue  # built_at and patch versions
+            agent = self._codec.decode_agent(value)
+            if agent is None:
+                return None
+            agents.append(agent)
+        agents.sort(key=lambda agent: agent["id"])
+        return agents
+
+    async def _build_catalog(
+        self, load: Callable[[], Awaitable[list[dict]]]
+    ) -> list[dict]:
+        """Load the catalog and store it, unless it changed meanwhile.
+
+        It is written under a staging key and renamed over the catalog only
+        if AGENT_CATALOG_GEN_KEY has not moved since before loading: a patch
+        applied during the load may be missing from it.
+        """
+        gens = await self._generations([AGENT_CATALOG_GEN_KEY])
+        agents = render_user_agents(await load())
+        if gens is None:
+            return agents
+        gen = gens[AGENT_CATALOG_GEN_KEY]
+
+        fields = {str(agent["id"]): self._codec.encode_agent(agent) for agent in agents}
+        fields[AGENT_CATALOG_BUILT_FIELD] = f"{time.time():.3f}"
+        items = list(fields.items())
+        ttl = 2 * AGENT_CATALOG_REFRESH_SECONDS
+        staging = f"{AGENT_CATALOG_KEY}:build:{uuid.uuid4().hex}"
+        async with self._cache.pipeline() as pipe:
+            for start in range(0, len(items), AGENT_CATALOG_WRITE_BATCH):
+                batch = dict(items[start : start + AGENT_CATALOG_WRITE_BATCH])
+                pipe.hset_with_ttl(staging, batch, ttl)
+        if await self._cache.rename_if_unchanged(
+            staging, AGENT_CATALOG_KEY, ttl, AGENT_CATALOG_GEN_KEY, gen
+        ):
+            logger.info("Rebuilt the agent catalog (%d agents)", len(agents))
+        else:
+            logger.info("Agent catalog changed while rebuilding; not stored")
+        return agents
+
+    async def _rebuild_catalog(self, load: Callable[[], Awaitable[list[dict]]]) -> None:
+        lock_key = f"lock:{AGENT_CATALOG_KEY}"
+        token = await self._cache.acquire_lock(lock_key, AGENT_CATALOG_REBUILD_LOCK_MS)
+        if token is None:
+            return  # another worker is already rebuilding it
+        try:
+            await self._build_catalog(load)
+        except Exception:
+            logger.warning("Background agent catalog rebuild failed", exc_info=True)
+        finally:
+            await self._cache.release_lock(lock_key, token)
+
+    async def _patch_catalog(
+        self, session: AsyncSession, agent_id: int, version: int
+    ) -> None:
+        """Re-read one agent into the catalog, or drop it if it is in no group.
+
+        `version` is the agent's generation, bumped before the read: should
+        two patches of the agent land out of order, the older one is ignored.
+        """
+        agents = await list_agents_with_groups(session, Agent.id == agent_id)
+        value = (
+            self._codec.encode_agent(render_user_agents(agents)[0]) if agents else None
+        )
+        await self._cache.hash_patch(
+            AGENT_CATALOG_KEY, version, {str(agent_id): value}, AGENT_CATALOG_GEN_KEY
+        )
+
+    # ------------------------
+    # ETags
+    # ------------------------
+    async def user_agents_etag(
+        self, user_id: str, *, is_superadmin: bool = False
+    ) -> str | None:
+        """Return the ETag of the user agents list, or None if there is none.
+
+        It changes with the generations versioning the list's cache key, so
+        it changes whenever the cached list is invalidated. Read it before
+        the list: a change in between pairs the old ETag with the new list,
+        which only costs the client one extra full response.
+
+        There is none while the graph serves lists: other workers apply
+        invalidations to their graph asynchronously and could pair a new
+        ETag with an old list.
+        """
+        if self._graph_ready:
+            return None
+        return await self._etag(
+            ("user_agents", user_id, is_superadmin),
+            self._user_agents_gen_keys(user_id, is_superadmin),
+        )
+
+    async def groups_etag(
+        self, user_id: str, *, is_superadmin: bool = False, variant: str = ""
+    ) -> str | None:
+        """Return the ETag of the groups visible to a user, or None.
+
+        A superadmin sees every group; anyone else sees their groups, which
+        change with their memberships (their user generation). `variant`
+        tells apart differing responses for the same user, e.g. pages.
+        """
+        gen_keys = [GROUPS_GEN_KEY]
+        if not is_superadmin:
+            gen_keys.append(self._user_gen_key(user_id))
+        return await self._etag(("groups", user_id, is_superadmin, variant), gen_keys)
+
+    async def group_etag(self, group_id: int) -> str | None:
+        """Return the ETag of a group, or None."""
+        return await self._etag(("group", group_id), [self._group_gen_key(group_id)])
+
+    async def _etag(self, scope: tuple, gen_keys: list[str]) -> str | None:
+        """Hash `scope` with the epoch and the generations of `gen_keys`.
+
+        None without Redis (there are no shared generations) or when the
+        epoch cannot be read, since counters read as 0 on errors.
+        """
+        if not self._cache.enabled:
+            return None
+        keys = [ETAG_EPOCH_KEY, *gen_keys]
+        values = await self._cache.mget(keys)
+        if values[0] is None:
+            await self._cache.set_if_absent(ETAG_EPOCH_KEY, uuid.uuid4().hex)
+            values = await self._cache.mget(keys)
+            if values[0] is None:
+                return None
+        epoch, *gens = values
+        parts = (*scope, epoch, *(int(gen or 0) for gen in gens))
+        digest = hashlib.blake2b(
+            repr(parts).encode(), digest_size=16, usedforsecurity=False
+        )
+        return f'"{digest.hexdigest()}"'
+
+    async def _load[T](
+        self,
+        location: Location,
+        compute: Callable[[], Awaitable[str]],
+        decode: Callable[[str], T | None],
+        ttl: int = CACHE_TTL_SECONDS,
+    ) -> T:
+        """Compute, cache and decode the value of a missing key.
+
+        Concurrent misses for the same key in this worker share one
+        computation. With PERMISSION_MISS_LOCK_MS set, other workers also
+        wait briefly for the lock holder's value instead of recomputing it.
+        """
+        key, field = location
+        name = key if field is None else f"{key}:{field}"
+        return await self._flights.do(
+            name, lambda: self._load_locked(location, name, compute, decode, ttl)
+        )
+
+    async def _load_locked[T](
+        self,
+        location: Location,
+        name: str,
+        compute: Callable[[], Awaitable[str]],
+        decode: Callable[[str], T | None],
+        ttl: int,
+    ) -> T:
+        lock_key = f"lock:{name}"
+        token = None
+        if PERMISSION_MISS_LOCK_MS > 0 and self._cache.enabled:
+            token = await self._cache.acquire_lock(lock_key, PERMISSION_MISS_LOCK_MS)
+            if token is None:
+                value = await self._wait_for_value(location)
+                decoded = decode(value) if value is not None else None
+                if decoded is not None:
+                    return decoded
+        try:
+            value = await compute()
+            await self._write(location, value, ttl)
+            return decode(value)
+        finally:
+            if token is not None:
+                await self._cache.release_lock(lock_key, token)
+
+    def _schedule_refresh(
+        self, key: str, stale: str, compute: Callable[[], Awaitable[str]], ttl: int
+    ) -> None:
+        """Reload a stale key in the background, at most once at a time per key."""
+        self._in_background(key, lambda: self._refresh(key, stale, compute, ttl))
+
+    def _in_background(self, name: str, run: Callable[[], Awaitable[None]]) -> None:
+        """Start `run()` as a task unless the one started under `name` is running."""
+        if name in self._refreshes:
+            return
+        task = asyncio.create_task(run())
+        self._refreshes[name] = task
+        task.add_done_callback(lambda _: self._refreshes.pop(name, None))
+
+    async def _refresh(
+        self, key: str, stale: str, compute: Callable[[], Awaitable[str]], ttl: int
+    ) -> None:
+        """Replace the stale value of `key` with a recomputed one.
+
+        The write is a compare-and-set against `stale`: a value stored while
+        this one was computed (an inline reload after the key expired, or
+        another worker's refresh) is newer and is kept.
+        """
+        lock_key = f"lock:{key}"
+        token = None
+        if PERMISSION_MISS_LOCK_MS > 0:
+            token = await self._cache.acquire_lock(lock_key, PERMISSION_MISS_LOCK_MS)
+            if token is None:
+                return  # another worker is already refreshing it
+        try:
+            await self._cache.compare_and_set(key, stale, await compute(), ttl)
+        except Exception:
+            logger.warning("Background refresh failed for %s", key, exc_info=True)
+        finally:
+            if token is not None:
+                await self._cache.release_lock(lock_key, token)
+
+    async def _wait_for_value(self, location: Location) -> str | None:
+        """Poll Redis for a value another worker is computing under the lock."""
+        deadline = time.monotonic() + PERMISSION_MISS_LOCK_MS / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(PERMISSION_MISS_LOCK_POLL_SECONDS)
+            value = await self._read(location)
+            if value is not None:
+                return value
+        return None
 
     async def invalidate_user_permissions(self, user_id: str) -> None:
-        """Delete all cached permissions and user agents list for a user."""
-        await self._cache.delete_pattern(f"perm:{user_id}:*")
-        await self._cache.delete(self._user_agents_key(user_id))
+        """Invalidate cached permissions and the user agents list for a user."""
+        self._drop_local_user(user_id)
+        if self._graph is not None:
+            await self._graph.reload("user", user_id)
+        async with self._cache.pipeline() as pipe:
+            pipe.incr(self._user_gen_key(user_id))
+            if PERMISSION_CACHE_LAYOUT == "hash":
+                # The INCR already hides them; this frees the memory now
+                pipe.delete(self._user_hash_key(user_id))
+            pipe.publish(INVALIDATION_CHANNEL, f"user:{user_id}")
         logger.info("Invalidated permission cache for user_id=%s", user_id)
 
     async def invalidate_agent_permissions(self, agent_id: int) -> None:
-        """Delete all cached permissions for an agent and affected user agent lists."""
-        await self._cache.delete_pattern(f"perm:*:{agent_id}:*")
-        await self._cache.delete_pattern("user_agents:*")
+        """Invalidate cached permissions for an agent, all user agent lists
+        and the agent catalog."""
+        self._drop_local_agent(agent_id)
+        if self._graph is not None:
+            await self._graph.reload("agent", agent_id)
+        async with self._cache.pipeline() as pipe:
+            pipe.incr(self._agent_gen_key(agent_id))
+            pipe.incr(USER_AGENTS_GEN_KEY)
+            # Bumped first: a rebuild already loading is then not stored
+            pipe.incr(AGENT_CATALOG_GEN_KEY)
+            pipe.delete(AGENT_CATALOG_KEY)
+            pipe.publish(INVALIDATION_CHANNEL, f"agent:{agent_id}")
         logger.info("Invalidated permission cache for agent_id=%s", agent_id)
+
+    async def invalidate_agent_assignment(
+        self, session: AsyncSession, agent_id: int, group_ids: Iterable[int]
+    ) -> None:
+        """Invalidate caches after an agent was added to or removed from groups.
+
+        Only the agent lists of members of the changed groups are invalidated.
+        Above USER_AGENTS_INVALIDATION_MAX_FANOUT members every list is
+        invalidated instead, which is cheaper than a huge pipeline. The
+        agent's entry in the agent catalog is re-read and patched in place.
+        """
+        self._drop_local_agent(agent_id)
+        if self._graph is not None:
+            await self._graph.reload("agent", agent_id)
+        if not self._cache.enabled:
+            return
+
+        group_ids = set(group_ids)
+        user_ids: list[str] = []
+        if group_ids:
+            result = await session.execute(
+                select(GroupMembership.entra_object_id)
+                .where(GroupMembership.group_id.in_(group_ids))
+                .distinct()
+                .limit(USER_AGENTS_INVALIDATION_MAX_FANOUT + 1)
+            )
+            user_ids = list(result.scalars().all())
+
+        # AGENT_CATALOG_GEN_KEY is bumped by the catalog patch, so it never
+        # moves (and no ETag changes) before the catalog does
+        keys = [self._agent_gen_key(agent_id)]
+        if len(user_ids) > USER_AGENTS_INVALIDATION_MAX_FANOUT:
+            keys.append(USER_AGENTS_GEN_KEY)
+        else:
+            keys.extend(self._user_agents_gen_key(user_id) for user_id in user_ids)
+        async with self._cache.pipeline() as pipe:
+            for key in keys:
+                pipe.incr(key)
+            pipe.publish(INVALIDATION_CHANNEL, f"agent:{agent_id}")
+        if pipe.results:
+            await self._patch_catalog(session, agent_id, version=pipe.results[0])
+        logger.info(
+            "Invalidated permission cache for agent_id=%s group_ids=%s (%s users%s)",
+            agent_id,
+            sorted(group_ids),
+            len(user_ids),
+            ", global" if USER_AGENTS_GEN_KEY in keys else "",
+        )
+
+    async def invalidate_group(
+        self, group_id: int, *, agent_lists: bool = True
+    ) -> None:
+        """Invalidate caches after a group was created, updated or deleted.
+
+        Permissions do not change. The group's ETags always do; with
+        `agent_lists` (a rename or a delete) so does every agent list showing
+        the group's name. Renames are rare, so all lists are invalidated at
+        once and the agent catalog is rebuilt.
+        """
+        if agent_lists and self._graph is not None:
+            await self._graph.reload("group", group_id)
+        async with self._cache.pipeline() as pipe:
+            pipe.incr(self._group_gen_key(group_id))
+            pipe.incr(GROUPS_GEN_KEY)
+            if agent_lists:
+                pipe.incr(USER_AGENTS_GEN_KEY)
+                pipe.incr(AGENT_CATALOG_GEN_KEY)
+                pipe.delete(AGENT_CATALOG_KEY)
+                pipe.publish(INVALIDATION_CHANNEL, f"group:{group_id}")
+        logger.info(
+            "Invalidated group caches for group_id=%s%s",
+            group_id,
+            " and all user agent lists" if agent_lists else "",
+        )
+
+    # ------------------------
+    # L1 (in-process) tier
+    # ------------------------
+    def _local_get(self, key: LocalKey) -> tuple[bool, str | None] | None:
+        if self._local is None:
+            return None
+        return self._local.get(key)
+
+    def _local_set(self, key: LocalKey, verdict: tuple[bool, str | None]) -> None:
+        if self._local is not None:
+            self._local.set(key, verdict, ttl=PERMISSION_L1_TTL_SECONDS)
+
+    def _drop_local_user(self, user_id: str) -> None:
+        if self._local is not None:
+            self._local.discard_where(lambda key: key[0] == user_id)
+
+    def _drop_local_agent(self, agent_id: int) -> None:
+        if self._local is not None:
+            self._local.discard_where(
+                lambda key: key[1] == agent_id and key[2] != GROUP_ROLE_KEY
+            )
+
+    def _on_invalidation_message(self, message: str) -> None:
+        """Apply an invalidation published by any worker (including this one).
+
+        The publishing worker has already reloaded the graph entity; doing it
+        again on its own message costs one small query.
+        """
+        kind, _, target = message.partition(":")
+        if kind == "user":
+            self._drop_local_user(target)
+            graph_target = target
+        elif kind == "agent" and target.isdigit():
+            self._drop_local_agent(int(target))
+            graph_target = int(target)
+        elif kind == "group" and target.isdigit():
+            graph_target = int(target)
+        else:
+            logger.warning("Ignoring malformed invalidation message %r", message)
+            return
+        if self._graph is not None:
+            self._graph.schedule_reload(kind, graph_target)
@@ -0,0 +1,202 @@
+import logging
+import zlib
+from collections.abc import Iterable
+
+from sqlalchemy import ColumnElement, delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user_agent_access import UserAgentAccess
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# First key of the two-key advisory locks, one namespace per kind of id
+_LOCK_USERS, _LOCK_AGENTS, _LOCK_GROUPS = 1, 2, 3
+
+_ADVISORY_LOCKS = text(
+    "SELECT pg_advisory_xact_lock(:space, key) "
+    "FROM unnest(CAST(:keys AS integer[])) AS key"
+)
+
+
+def _live_access(*where: ColumnElement[bool]):
+    """(user, agent, best role) from the live join, filtered by `where`.
+
+    MIN picks ADMIN over USER: roles are stored by name, and ADMIN sorts
+    first both as text and in the grouprole enum's declaration order.
+    """
+    return (
+        select(
+            GroupMembership.entra_object_id,
+            GroupAgent.agent_id,
+            func.min(GroupMembership.role),
+        )
+        .join(GroupAgent, GroupAgent.group_id == GroupMembership.group_id)
+        .where(*where)
+        .group_by(GroupMembership.entra_object_id, GroupAgent.agent_id)
+    )
+
+
+class UserAgentAccessService:
+    """Keeps user_agent_access in step with memberships and assignments.
+
+    The refresh methods recompute the rows of the given users or agents from
+    the live join. They do not commit: callers run them after their own
+    change and before committing, so both land in one transaction.
+
+    Under READ COMMITTED a refresh does not see a concurrent, uncommitted
+    change, so two refreshes touching the same (user, agent) pair would each
+    write it from half the picture. On PostgreSQL they are serialized with
+    transaction-scoped advisory locks: a membership refresh locks the user,
+    then every group the user is in or just left; an assignment refresh
+    locks the agent, then its groups. Any two changes that can affect the
+    same pair then share a lock, and the later refresh waits for the earlier
+    commit before reading the join. SQLite already serializes writers.
+    """
+
+    async def refresh_users(
+        self,
+        session: AsyncSession,
+        user_ids: Iterable[str],
+        group_ids: Iterable[int] = (),
+    ) -> None:
+        """Recompute the access rows of users whose memberships changed.
+
+        `group_ids` are the groups the change touched; they are locked too,
+        since a removed membership no longer leads from the user to them.
+        """
+        user_ids = list(user_ids)
+        await session.flush()
+        if self._serializes(session):
+            await self._lock(session, _LOCK_USERS, [_user_key(u) for u in user_ids])
+            result = await session.execute(
+                select(GroupMembership.group_id).where(
+                    GroupMembership.entra_object_id.in_(user_ids)
+                )
+            )
+            await self._lock(session, _LOCK_GROUPS, {*result.scalars(), *group_ids})
+        await self._replace(
+            session,
+            UserAgentAccess.entra_object_id.in_(user_ids),
+            GroupMembership.entra_object_id.in_(user_ids),
+        )
+
+    async def refresh_agents(
+        self,
+        session: AsyncSession,
+        agent_ids: Iterable[int],
+        group_ids: Iterable[int] = (),
+    ) -> None:
+        """Recompute the access rows of agents whose group assignments changed.
+
+        `group_ids` are the groups the change touched, locked as in
+        refresh_users.
+        """
+        agent_ids = list(agent_ids)
+        await session.flush()
+        if self._serializes(session):
+            await self._lock(session, _LOCK_AGENTS, agent_ids)
+            result = await session.execute(
+                select(GroupAgent.group_id).where(GroupAgent.agent_id.in_(agent_ids))
+            )
+            await self._lock(session, _LOCK_GROUPS, {*result.scalars(), *group_ids})
+        await self._replace(
+            session,
+            UserAgentAccess.agent_id.in_(agent_ids),
+            GroupAgent.agent_id.in_(agent_ids),
+        )
+
+    async def backfill(self, session: AsyncSession) -> int:
+        """Rebuild the whole table from the live join and commit.
+
+        Returns the number of rows written.
+        """
+        await self._replace(session)
+        await session.commit()
+        count = await session.scalar(select(func.count()).select_from(UserAgentAccess))
+        logger.info("Backfilled user_agent_access with %d rows", count)
+        return count
+
+    async def diff(self, session: AsyncSession) -> list[str]:
+        """Compare the table with the live join.
+
+        Returns one description per (user, agent) pair on which they disagree.
+        """
+        stored = select(
+            UserAgentAccess.entra_object_id,
+            UserAgentAccess.agent_id,
+            UserAgentAccess.best_role,
+        )
+        live = _live_access()
+        # Only disagreeing rows leave the database
+        result = await session.execute(stored.except_(live))
+        stale = {(user, agent): role for user, agent, role in result}
+        result = await session.execute(live.except_(stored))
+        missing = {(user, agent): role for user, agent, role in result}
+
+        differences = []
+        for user_id, agent_id in sorted(stale.keys() | missing.keys()):
+            mine = stale.get((user_id, agent_id))
+            theirs = missing.get((user_id, agent_id))
+            differences.append(
+                f"user {user_id} agent {agent_id}: "
+                f"table={mine and mine.name} live={theirs and theirs.name}"
+            )
+        return differences
+
+    @staticmethod
+    def _serializes(session: AsyncSession) -> bool:
+        return session.get_bind().dialect.name == "postgresql"
+
+    @staticmethod
+    async def _lock(session: AsyncSession, space: int, keys: Iterable[int]) -> None:
+        """Take the advisory locks on `keys`, in ascending order so that two
+        refreshes never wait on each other crosswise.
+        """
+        keys = sorted(set(keys))
+        if keys:
+            await session.execute(_ADVISORY_LOCKS, {"space": space, "keys": keys})
+
+    @staticmethod
+    async def _replace(
+        session: AsyncSession,
+        table_filter: ColumnElement[bool] | None = None,
+        join_filter: ColumnElement[bool] | None = None,
+    ) -> None:
+        """Delete the table rows matching `table_filter` and re-insert them
+        from the join rows matching `join_filter`; without filters, rebuild
+        the whole table.
+        """
+        await session.flush()
+        stmt = delete(UserAgentAccess)
+        if table_filter is not None:
+            stmt = stmt.where(table_filter)
+        await session.execute(stmt)
+
+        live = _live_access(*([join_filter] if join_filter is not None else []))
+        upsert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+        if upsert is None:
+            stmt = insert(UserAgentAccess).from_select(
+                ["entra_object_id", "agent_id", "best_role"], live
+            )
+        else:
+            # Should a refresh this one did not wait for have written a row
+            # meanwhile, overwrite it rather than fail the caller's change on
+            # the primary key.
+            stmt = upsert(UserAgentAccess).from_select(
+                ["entra_object_id", "agent_id", "best_role"], live
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["entra_object_id", "agent_id"],
+                set_={"best_role": stmt.excluded.best_role},
+            )
+        await session.execute(stmt)
+
+
+def _user_key(user_id: str) -> int:
+    """Advisory lock key for a user id: its CRC-32 as a signed 32-bit int."""
+    return zlib.crc32(user_id.encode()) - 2**31
@@ -1,22 +1,100 @@
 import logging
+import os
 
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.base.utils.expiring_lru_cache import ExpiringLRUCache
 from src.domain.models.entities.user import User
 
 logger = logging.getLogger(__name__)
 
+# Claims last written per user, so requests from a user whose name and email
+# have not changed skip the database entirely. Entries expire after the TTL,
+# which bounds how long a row changed or deleted outside this worker stays
+# unsynced; 0 disables the record and every request upserts.
+USER_SYNC_MAX_SIZE = int(os.getenv("USER_SYNC_MAX_SIZE", "10000"))
+USER_SYNC_TTL_SECONDS = float(os.getenv("USER_SYNC_TTL_SECONDS", "300"))
+
+# Dialects with INSERT ... ON CONFLICT; others fall back to SELECT first
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
 
 class UserService:
+    def __init__(self, synced: ExpiringLRUCache | None = None):
+        if synced is None and USER_SYNC_MAX_SIZE > 0 and USER_SYNC_TTL_SECONDS > 0:
+            synced = ExpiringLRUCache(USER_SYNC_MAX_SIZE)
+        self._synced = synced
+
+    async def sync_user(
+        self,
+        session: AsyncSession,
+        entra_object_id: str,
+        display_name: str,
+        email: str,
+    ) -> None:
+        """Sync user from JWT claims, writing only when they changed.
+
+        Claims already written by this worker within USER_SYNC_TTL_SECONDS
+        are not written again.
+        """
+        claims = (display_name, email)
+        if self._synced is not None and self._synced.get(entra_object_id) == claims:
+            return
+
+        await self.upsert_user(session, entra_object_id, display_name, email)
+        if self._synced is not None:
+            self._synced.set(entra_object_id, claims, ttl=USER_SYNC_TTL_SECONDS)
+
     async def upsert_user(
         self,
         session: AsyncSession,
         entra_object_id: str,
         display_name: str,
         email: str,
-    ) -> User:
-        """Sync user from JWT claims into the local users table (insert or update)."""
+    ) -> None:
+        """Sync user from JWT claims into the local users table (insert or update).
+
+        One INSERT ... ON CONFLICT DO UPDATE statement whose update only
+        applies (and bumps updated_at) when the name or email differ.
+        """
+        insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+        if insert is None:
+            await self._upsert_select_first(
+                session, entra_object_id, display_name, email
+            )
+            return
+
+        stmt = insert(User).values(
+            entra_object_id=entra_object_id,
+            display_name=display_name,
+            email=email,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.entra_object_id],
+            set_={
+                "display_name": stmt.excluded.display_name,
+                "email": stmt.excluded.email,
+                "updated_at": func.now(),
+            },
+            where=or_(
+                User.display_name != stmt.excluded.display_name,
+                User.email != stmt.excluded.email,
+            ),
+        )
+        result = await session.execute(stmt)
+        await session.commit()
+        if result.rowcount:
+            logger.info("Synced local user entra_object_id=%s", entra_object_id)
+
+    async def _upsert_select_first(
+        self,
+        session: AsyncSession,
+        entra_object_id: str,
+        display_name: str,
+        email: str,
+    ) -> None:
         result = await session.execute(
             select(User).where(User.entra_object_id == entra_object_id)
         )
@@ -37,4 +115,3 @@ class UserService:
             user.email = email
 
         await session.commit()
-        return user
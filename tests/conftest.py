@@ -1,4 +1,5 @@
 import json
+from unittest.mock import AsyncMock
 
 import pytest
 from fastapi import Depends, FastAPI, Request
@@ -7,9 +8,12 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from starlette.middleware.base import BaseHTTPMiddleware
 
 import src.domain.models.entities  # noqa: F401
+from src.base.config import redis_cache
 from src.base.config.database import Base
+from src.base.config.redis_cache import RedisCache
 from src.base.models.user import User
 from src.domain.auth.authorization import require_group_admin, require_superadmin
+from src.domain.services.permission_service import PermissionService
 
 
 class FakeAuthMiddleware(BaseHTTPMiddleware):
@@ -24,6 +28,123 @@ class FakeAuthMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
+class DictRedis:
+    """The few Redis commands the permission caches use, over a dict.
+
+    Hashes are dicts in `data`; the scripts RedisCache sends with EVAL are
+    run by Python equivalents (test_redis_scripts runs the scripts
+    themselves). Expiry is ignored.
+    """
+
+    def __init__(self):
+        self.data: dict[str, str | dict[str, str]] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def incr(self, key):
+        return self._incr(key)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    async def publish(self, channel, message):
+        return 0
+
+    async def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], [str(arg) for arg in args[numkeys:]]
+        return self._SCRIPTS[script](self, keys, argv)
+
+    def _hset_with_ttl(self, keys, argv):
+        self.data.setdefault(keys[0], {}).update(
+            zip(argv[1::2], argv[2::2], strict=True)
+        )
+        return 1
+
+    def _hash_patch(self, keys, argv):
+        fields = self.data.get(keys[0])
+        if fields is not None:
+            version = int(argv[0])
+            for field, value in zip(argv[1::2], argv[2::2], strict=True):
+                if int(fields.get(f"v:{field}", 0)) < version:
+                    if value:
+                        fields[field] = value
+                    else:
+                        fields.pop(field, None)
+                    fields[f"v:{field}"] = str(version)
+        return self._incr(keys[1])
+
+    def _rename_if_unchanged(self, keys, argv):
+        source, key, counter = keys
+        if source not in self.data:
+            return 0
+        if self.data.get(counter, "0") != argv[0]:
+            del self.data[source]
+            return 0
+        self.data[key] = self.data.pop(source)
+        return 1
+
+    def _compare_and_set(self, keys, argv):
+        current = self.data.get(keys[0])
+        if current != (None if argv[0] == "1" else argv[1]):
+            return 0
+        self.data[keys[0]] = argv[2]
+        return 1
+
+    def _release_lock(self, keys, argv):
+        if self.data.get(keys[0]) != argv[0]:
+            return 0
+        del self.data[keys[0]]
+        return 1
+
+    def _incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    _SCRIPTS = {
+        redis_cache._HSET_WITH_TTL_SCRIPT: _hset_with_ttl,
+        redis_cache._HASH_PATCH_SCRIPT: _hash_patch,
+        redis_cache._RENAME_IF_UNCHANGED_SCRIPT: _rename_if_unchanged,
+        redis_cache._RELEASE_LOCK_SCRIPT: _release_lock,
+        redis_cache._COMPARE_AND_SET_SCRIPT: _compare_and_set,
+    }
+
+    def pipeline(self, transaction=False):
+        return DictPipeline(self)
+
+
+class DictPipeline:
+    def __init__(self, redis: DictRedis):
+        self._redis = redis
+        self._commands = []
+        self.reset = AsyncMock()
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self):
+        return [
+            await getattr(self._redis, name)(*args, **kwargs)
+            for name, args, kwargs in self._commands
+        ]
+
+
 @pytest.fixture
 async def db_engine():
     engine = create_async_engine(
@@ -50,6 +171,7 @@ async def db_session(db_session_factory):
 def app(db_session_factory):
     test_app = FastAPI()
     test_app.state.db_session_factory = db_session_factory
+    test_app.state.permission_service = PermissionService(cache=RedisCache())
     test_app.add_middleware(FakeAuthMiddleware)
 
     @test_app.get("/superadmin-only")
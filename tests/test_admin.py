@@ -176,6 +176,50 @@ class TestListAllGroups:
         assert resp.status_code == 403
 
 
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+class TestNdjsonExport:
+    @pytest.mark.parametrize("path,key", [("agents", "agents"), ("groups", "groups")])
+    async def test_lines_match_json_listing(self, client, db_session, path, key):
+        await _seed_data(db_session)
+        url = f"/api/admin/{path}"
+
+        listing = await client.get(url, headers=_user_header(SUPERADMIN))
+        export = await client.get(url, headers={**_user_header(SUPERADMIN), **NDJSON})
+
+        assert export.status_code == 200
+        assert export.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in export.text.splitlines()]
+        assert lines == listing.json()[key]
+
+    async def test_agent_line_carries_all_groups(self, client, db_session):
+        data = await _seed_data(db_session)
+
+        export = await client.get(
+            "/api/admin/agents", headers={**_user_header(SUPERADMIN), **NDJSON}
+        )
+        lines = {a["id"]: a for a in map(json.loads, export.text.splitlines())}
+        assert [g["group_id"] for g in lines[data["agent2"].id]["groups"]] == [
+            data["group_a"].id,
+            data["group_b"].id,
+        ]
+
+    async def test_pagination_rejected(self, client, db_session):
+        resp = await client.get(
+            "/api/admin/groups",
+            params={"limit": 10},
+            headers={**_user_header(SUPERADMIN), **NDJSON},
+        )
+        assert resp.status_code == 400
+
+    async def test_non_superadmin_gets_403(self, client, db_session):
+        resp = await client.get(
+            "/api/admin/agents", headers={**_user_header(REGULAR_USER), **NDJSON}
+        )
+        assert resp.status_code == 403
+
+
 class TestBulkUpdateAgentGroups:
     async def test_superadmin_bulk_updates_groups(self, client, db_session):
         data = await _seed_data(db_session)
@@ -234,3 +278,17 @@ class TestBulkUpdateAgentGroups:
             headers=_user_header(SUPERADMIN),
         )
         assert resp.status_code == 422
+
+    async def test_service_reports_previous_groups(self, db_session):
+        data = await _seed_data(db_session)
+
+        result = await AdminService().bulk_update_agent_groups(
+            db_session,
+            agent_id=data["agent2"].id,
+            group_ids=[data["group_c"].id],
+            updated_by="sa-001",
+        )
+
+        assert sorted(result["previous_group_ids"]) == sorted(
+            [data["group_a"].id, data["group_b"].id]
+        )
@@ -0,0 +1,304 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.base.config.redis_cache import RedisCache
+from src.base.models.user import User
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.routes import admin_routes
+from src.domain.services import permission_service
+from src.domain.services.admin_service import AdminService
+from src.domain.services.agent_listing import list_agents_with_groups
+from src.domain.services.agent_service import AgentService
+from src.domain.services.cache_codec import JsonCacheCodec, render_user_agents
+from src.domain.services.permission_service import (
+    AGENT_CATALOG_BUILT_FIELD,
+    AGENT_CATALOG_GEN_KEY,
+    AGENT_CATALOG_KEY,
+    PermissionService,
+)
+from tests.conftest import DictRedis, FakeAuthMiddleware
+
+SUPERADMIN = User(
+    id="sa-001", email="admin@test.com", name="Super Admin", is_superadmin=True
+)
+
+
+async def _seed(session: AsyncSession) -> dict:
+    """Group A: agent-1; Group B: agent-2; agent-3 in no group."""
+    ga, gb = Group(name="Group A"), Group(name="Group B")
+    session.add_all([ga, gb])
+    await session.flush()
+    agents = [
+        Agent(agent_external_id=f"ext-{i}", name=f"Agent {i}", created_by="u")
+        for i in (1, 2, 3)
+    ]
+    session.add_all(agents)
+    await session.flush()
+    session.add_all(
+        [
+            GroupAgent(group_id=ga.id, agent_id=agents[0].id, added_by="u"),
+            GroupAgent(group_id=gb.id, agent_id=agents[1].id, added_by="u"),
+        ]
+    )
+    await session.commit()
+    return {"ga": ga, "gb": gb, "a1": agents[0], "a2": agents[1], "a3": agents[2]}
+
+
+@pytest.fixture
+def redis():
+    return DictRedis()
+
+
+@pytest.fixture
+def service(redis):
+    service = PermissionService(cache=RedisCache(redis_client=redis))
+    service._local = None
+    return service
+
+
+@pytest.fixture
+def load(db_session_factory):
+    """The superadmin catalog loader, counting its calls."""
+
+    async def load() -> list[dict]:
+        async with db_session_factory() as session:
+            return await list_agents_with_groups(session)
+
+    return AsyncMock(side_effect=load)
+
+
+def _ids(agents: list[dict]) -> list[int]:
+    return [agent["id"] for agent in agents]
+
+
+class TestSharedCatalog:
+    async def test_superadmins_and_admin_listing_share_one_entry(
+        self, db_session, service, redis, load
+    ):
+        data = await _seed(db_session)
+
+        for user_id in ("sa-001", "sa-002"):
+            agents = await service.get_user_agents(user_id, load, is_superadmin=True)
+            assert _ids(agents) == [data["a1"].id, data["a2"].id]
+        assert _ids(await service.get_agent_catalog(load)) == _ids(agents)
+
+        load.assert_awaited_once()
+        assert not any(key.startswith("user_agents:") for key in redis.data)
+        assert AGENT_CATALOG_BUILT_FIELD in redis.data[AGENT_CATALOG_KEY]
+
+    async def test_entries_rendered_for_the_response(self, db_session, service, load):
+        await _seed(db_session)
+        built = await service.get_agent_catalog(load)
+        cached = await service.get_agent_catalog(load)
+        assert cached == built
+        assert isinstance(cached[0]["created_at"], str)
+        assert cached[0]["groups"] == [{"group_id": 1, "group_name": "Group A"}]
+
+    async def test_empty_catalog_is_cached(self, service, load):
+        assert await service.get_agent_catalog(load) == []
+        assert await service.get_agent_catalog(load) == []
+        load.assert_awaited_once()
+
+    async def test_without_redis_loads_every_time(self, db_session, load):
+        await _seed(db_session)
+        service = PermissionService(cache=RedisCache())
+        await service.get_agent_catalog(load)
+        await service.get_agent_catalog(load)
+        assert load.await_count == 2
+
+    async def test_other_codec_entries_are_rebuilt(
+        self, db_session, service, redis, load
+    ):
+        data = await _seed(db_session)
+        await service.get_agent_catalog(load)
+        redis.data[AGENT_CATALOG_KEY][str(data["a1"].id)] = (
+            JsonCacheCodec().encode_agent({"id": data["a1"].id})
+        )
+
+        await service.get_agent_catalog(load)
+
+        assert load.await_count == 2
+
+
+class TestIncrementalUpdates:
+    async def _assign(self, session, service, group_id, agent_id):
+        await AgentService().assign_agent_to_group(session, group_id, agent_id, "u")
+        await service.invalidate_agent_assignment(session, agent_id, [group_id])
+
+    async def test_assignment_patches_the_agent(self, db_session, service, load):
+        data = await _seed(db_session)
+        await service.get_agent_catalog(load)
+
+        await self._assign(db_session, service, data["ga"].id, data["a2"].id)
+        await self._assign(db_session, service, data["ga"].id, data["a3"].id)
+
+        agents = await service.get_agent_catalog(load)
+        load.assert_awaited_once()
+        assert _ids(agents) == [data["a1"].id, data["a2"].id, data["a3"].id]
+        assert [g["group_id"] for g in agents[1]["groups"]] == [
+            data["ga"].id,
+            data["gb"].id,
+        ]
+        assert agents == render_user_agents(await list_agents_with_groups(db_session))
+
+    async def test_agent_leaving_its_last_group_is_dropped(
+        self, db_session, service, load
+    ):
+        data = await _seed(db_session)
+        await service.get_agent_catalog(load)
+
+        await AgentService().remove_agent_from_group(
+            db_session, data["gb"].id, data["a2"].id
+        )
+        await service.invalidate_agent_assignment(
+            db_session, data["a2"].id, [data["gb"].id]
+        )
+
+        assert _ids(await service.get_agent_catalog(load)) == [data["a1"].id]
+        load.assert_awaited_once()
+
+    async def test_bulk_update_patches_the_agent(self, db_session, service, load):
+        data = await _seed(db_session)
+        await service.get_agent_catalog(load)
+
+        result = await AdminService().bulk_update_agent_groups(
+            db_session, data["a1"].id, [data["gb"].id], "sa-001"
+        )
+        await service.invalidate_agent_assignment(
+            db_session,
+            data["a1"].id,
+            set(result["previous_group_ids"]) ^ {data["gb"].id},
+        )
+
+        agents = await service.get_agent_catalog(load)
+        assert agents[0]["groups"] == [
+            {"group_id": data["gb"].id, "group_name": "Group B"}
+        ]
+
+    async def test_patch_bumps_catalog_generation(self, db_session, service, redis):
+        data = await _seed(db_session)
+        await self._assign(db_session, service, data["ga"].id, data["a3"].id)
+        # Nothing cached yet: the patch only moves the generation
+        assert AGENT_CATALOG_KEY not in redis.data
+        assert redis.data[AGENT_CATALOG_GEN_KEY] == "1"
+
+    async def test_patches_versioned_by_agent_generation(
+        self, db_session, service, redis, load
+    ):
+        data = await _seed(db_session)
+        await service.get_agent_catalog(load)
+        a2 = data["a2"].id
+
+        await self._assign(db_session, service, data["ga"].id, a2)
+        await AgentService().remove_agent_from_group(db_session, data["ga"].id, a2)
+        await service.invalidate_agent_assignment(db_session, a2, [data["ga"].id])
+
+        # Out-of-order patches of the agent are told apart by this version
+        catalog = redis.data[AGENT_CATALOG_KEY]
+        assert catalog[f"v:{a2}"] == redis.data[f"gen:agent:{a2}"] == "2"
+        assert _ids(await service.get_agent_catalog(load)) == [data["a1"].id, a2]
+
+    async def test_build_racing_a_patch_is_not_stored(self, db_session, service, redis):
+        data = await _seed(db_session)
+
+        async def load_then_change() -> list[dict]:
+            agents = await list_agents_with_groups(db_session)
+            await self._assign(db_session, service, data["ga"].id, data["a3"].id)
+            return agents
+
+        agents = await service.get_agent_catalog(load_then_change)
+
+        # The caller still gets its list, but it is not cached
+        assert _ids(agents) == [data["a1"].id, data["a2"].id]
+        assert AGENT_CATALOG_KEY not in redis.data
+        assert not any(key.startswith(f"{AGENT_CATALOG_KEY}:") for key in redis.data)
+
+    async def test_group_rename_rebuilds(self, db_session, service, load):
+        data = await _seed(db_session)
+        await service.get_agent_catalog(load)
+
+        data["ga"].name = "Renamed"
+        await db_session.commit()
+        await service.invalidate_group(data["ga"].id)
+
+        agents = await service.get_agent_catalog(load)
+        assert agents[0]["groups"][0]["group_name"] == "Renamed"
+        assert load.await_count == 2
+
+    async def test_old_catalog_served_and_rebuilt_in_background(
+        self, db_session, service, redis, load
+    ):
+        data = await _seed(db_session)
+        await service.get_agent_catalog(load)
+        redis.data[AGENT_CATALOG_KEY][AGENT_CATALOG_BUILT_FIELD] = str(
+            time.time() - permission_service.AGENT_CATALOG_REFRESH_SECONDS
+        )
+        # A change the patch missed, e.g. lost with a crashed worker
+        db_session.add(
+            GroupAgent(group_id=data["ga"].id, agent_id=data["a3"].id, added_by="u")
+        )
+        await db_session.commit()
+
+        stale = await service.get_agent_catalog(load)
+        assert _ids(stale) == [data["a1"].id, data["a2"].id]
+        await asyncio.gather(*service._refreshes.values())
+        assert load.await_count == 2
+
+        fresh = await service.get_agent_catalog(load)
+        assert _ids(fresh) == [data["a1"].id, data["a2"].id, data["a3"].id]
+
+
+class TestAdminListing:
+    @pytest.fixture
+    async def client(self, db_session_factory, redis):
+        app = FastAPI()
+        app.state.db_session_factory = db_session_factory
+        app.state.permission_service = PermissionService(
+            cache=RedisCache(redis_client=redis)
+        )
+        app.state.admin_service = AdminService()
+        app.add_middleware(FakeAuthMiddleware)
+        app.include_router(admin_routes.router, prefix="/api")
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+
+    async def test_full_listing_served_from_catalog(self, client, db_session, redis):
+        data = await _seed(db_session)
+        headers = {"X-Test-User": json.dumps(SUPERADMIN.model_dump())}
+
+        resp = await client.get("/api/admin/agents", headers=headers)
+        assert resp.status_code == 200
+        assert AGENT_CATALOG_KEY in redis.data
+
+        resp = await client.put(
+            f"/api/admin/agents/{data['a3'].id}/groups",
+            headers=headers,
+            json={"group_ids": [data["gb"].id]},
+        )
+        assert resp.status_code == 200
+
+        resp = await client.get("/api/admin/agents", headers=headers)
+        body = resp.json()
+        assert body["next_cursor"] is None
+        assert _ids(body["agents"]) == [data["a1"].id, data["a2"].id, data["a3"].id]
+        assert body["agents"][2]["groups"] == [
+            {"group_id": data["gb"].id, "group_name": "Group B"}
+        ]
+
+    async def test_pages_still_read_from_the_database(self, client, db_session, redis):
+        data = await _seed(db_session)
+        headers = {"X-Test-User": json.dumps(SUPERADMIN.model_dump())}
+        resp = await client.get("/api/admin/agents?limit=1", headers=headers)
+        assert _ids(resp.json()["agents"]) == [data["a1"].id]
+        assert AGENT_CATALOG_KEY not in redis.data
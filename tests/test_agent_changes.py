@@ -0,0 +1,369 @@
+import datetime
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.base.config.redis_cache import RedisCache
+from src.base.models.user import User
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.agent_change import AgentChange
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User as UserEntity
+from src.domain.routes import (
+    admin_routes,
+    agent_routes,
+    group_routes,
+    membership_routes,
+)
+from src.domain.services import agent_change_log_service
+from src.domain.services.admin_service import AdminService
+from src.domain.services.agent_change_log_service import (
+    AgentChangeLogService,
+    SyncToken,
+)
+from src.domain.services.agent_service import AgentService
+from src.domain.services.group_service import GroupService
+from src.domain.services.membership_service import MembershipService
+from src.domain.services.permission_service import PermissionService
+from src.domain.services.user_service import UserService
+from tests.conftest import FakeAuthMiddleware
+
+
+def _user_header(user: User) -> dict[str, str]:
+    return {"X-Test-User": json.dumps(user.model_dump())}
+
+
+SUPERADMIN = User(
+    id="sa-001", email="admin@test.com", name="Super Admin", is_superadmin=True
+)
+MEMBER = User(id="user-001", email="user@test.com", name="User", is_superadmin=False)
+OTHER = User(id="user-002", email="other@test.com", name="Other", is_superadmin=False)
+
+
+@pytest.fixture(autouse=True)
+def no_settle(monkeypatch):
+    """Let tokens pass entries at once; TestSettle covers the delay."""
+    monkeypatch.setattr(agent_change_log_service, "AGENT_CHANGES_SETTLE_SECONDS", 0)
+
+
+@pytest.fixture
+def app(db_session_factory):
+    test_app = FastAPI()
+    test_app.state.db_session_factory = db_session_factory
+    test_app.state.admin_service = AdminService()
+    test_app.state.agent_service = AgentService()
+    test_app.state.group_service = GroupService()
+    test_app.state.membership_service = MembershipService()
+    test_app.state.permission_service = PermissionService(cache=RedisCache())
+    test_app.state.user_service = UserService()
+    test_app.add_middleware(FakeAuthMiddleware)
+    for module in (admin_routes, agent_routes, group_routes, membership_routes):
+        test_app.include_router(module.router, prefix="/api")
+    return test_app
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as c:
+        yield c
+
+
+async def _seed_data(session: AsyncSession):
+    """Layout:
+    - Group 1: user-001 (admin), agents 1 and 2
+    - Group 2: user-001 and user-002, agents 2 and 3
+    - Agent 4: no groups
+    """
+    session.add_all(
+        UserEntity(entra_object_id=user.id, display_name=user.name, email=user.email)
+        for user in (SUPERADMIN, MEMBER, OTHER)
+    )
+    session.add_all([Group(name="Group 1"), Group(name="Group 2")])
+    session.add_all(
+        Agent(agent_external_id=f"agent-{i}", name=f"Agent {i}", created_by="sa")
+        for i in range(1, 5)
+    )
+    await session.flush()
+    session.add_all(
+        [
+            GroupMembership(
+                entra_object_id=MEMBER.id, group_id=1, role=GroupRole.ADMIN
+            ),
+            GroupMembership(entra_object_id=MEMBER.id, group_id=2, role=GroupRole.USER),
+            GroupMembership(entra_object_id=OTHER.id, group_id=2, role=GroupRole.USER),
+            GroupAgent(group_id=1, agent_id=1, added_by="sa"),
+            GroupAgent(group_id=1, agent_id=2, added_by="sa"),
+            GroupAgent(group_id=2, agent_id=2, added_by="sa"),
+            GroupAgent(group_id=2, agent_id=3, added_by="sa"),
+        ]
+    )
+    await session.commit()
+
+
+async def _sync(client, user: User, since: str | None = None, owner=None) -> dict:
+    params = {"since": since} if since is not None else {}
+    resp = await client.get(
+        f"/api/users/{(owner or user).id}/agents/changes",
+        params=params,
+        headers=_user_header(user),
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _summary(body: dict) -> tuple[dict[int, list[int]], list[int]]:
+    """(changed agent id -> its group ids, removed agent ids)"""
+    changed = {a["id"]: [g["group_id"] for g in a["groups"]] for a in body["agents"]}
+    return changed, body["removed"]
+
+
+class TestSync:
+    async def test_first_sync_is_full(self, client, db_session):
+        await _seed_data(db_session)
+        body = await _sync(client, MEMBER)
+        assert body["full_resync"] is True
+        assert _summary(body) == ({1: [1], 2: [1, 2], 3: [2]}, [])
+        assert body["next_token"]
+
+    async def test_no_changes(self, client, db_session):
+        await _seed_data(db_session)
+        token = (await _sync(client, MEMBER))["next_token"]
+        body = await _sync(client, MEMBER, token)
+        assert body["full_resync"] is False
+        assert _summary(body) == ({}, [])
+
+    async def test_add_member(self, client, db_session):
+        await _seed_data(db_session)
+        token = (await _sync(client, OTHER))["next_token"]
+
+        resp = await client.post(
+            "/api/groups/1/members",
+            json={"entra_object_id": OTHER.id},
+            headers=_user_header(MEMBER),
+        )
+        assert resp.status_code == 201
+
+        body = await _sync(client, OTHER, token)
+        assert body["full_resync"] is False
+        # Agent 1 is new; agent 2 gained group 1
+        assert _summary(body) == ({1: [1], 2: [1, 2]}, [])
+
+    async def test_remove_member(self, client, db_session):
+        await _seed_data(db_session)
+        token = (await _sync(client, MEMBER))["next_token"]
+
+        # Make someone else admin, so user-001 is not the last one
+        await client.post(
+            "/api/groups/1/members",
+            json={"entra_object_id": OTHER.id, "role": "admin"},
+            headers=_user_header(MEMBER),
+        )
+        resp = await client.delete(
+            "/api/groups/1/members/user-001", headers=_user_header(OTHER)
+        )
+        assert resp.status_code == 204
+
+        body = await _sync(client, MEMBER, token)
+        # Agent 2 is still reachable through group 2
+        assert _summary(body) == ({2: [2]}, [1])
+
+    async def test_role_change_logs_nothing(self, client, db_session):
+        await _seed_data(db_session)
+        token = (await _sync(client, OTHER))["next_token"]
+        resp = await client.put(
+            "/api/groups/2/members/user-002",
+            json={"role": "admin"},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert resp.status_code == 200
+        assert _summary(await _sync(client, OTHER, token)) == ({}, [])
+
+    async def test_remove_agent_from_group(self, client, db_session):
+        await _seed_data(db_session)
+        member_token = (await _sync(client, MEMBER))["next_token"]
+        other_token = (await _sync(client, OTHER))["next_token"]
+
+        resp = await client.delete(
+            "/api/groups/2/agents/3", headers=_user_header(SUPERADMIN)
+        )
+        assert resp.status_code == 204
+
+        assert _summary(await _sync(client, MEMBER, member_token)) == ({}, [3])
+        assert _summary(await _sync(client, OTHER, other_token)) == ({}, [3])
+
+    async def test_register_and_assign_agent(self, client, db_session):
+        await _seed_data(db_session)
+        token = (await _sync(client, OTHER))["next_token"]
+
+        resp = await client.post(
+            "/api/groups/2/agents",
+            json={"agent_id": 4},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert resp.status_code == 201
+        resp = await client.post(
+            "/api/agents",
+            json={"agent_external_id": "agent-5", "name": "Agent 5", "group_id": 2},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert resp.status_code == 201
+
+        assert _summary(await _sync(client, OTHER, token)) == ({4: [2], 5: [2]}, [])
+
+    async def test_bulk_update_agent_groups(self, client, db_session):
+        await _seed_data(db_session)
+        member_token = (await _sync(client, MEMBER))["next_token"]
+        other_token = (await _sync(client, OTHER))["next_token"]
+
+        # Agent 3 moves from group 2 to group 1
+        resp = await client.put(
+            "/api/admin/agents/3/groups",
+            json={"group_ids": [1]},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert resp.status_code == 200
+
+        assert _summary(await _sync(client, MEMBER, member_token)) == ({3: [1]}, [])
+        assert _summary(await _sync(client, OTHER, other_token)) == ({}, [3])
+
+    async def test_group_rename(self, client, db_session):
+        await _seed_data(db_session)
+        token = (await _sync(client, OTHER))["next_token"]
+
+        await client.put(
+            "/api/groups/2",
+            json={"description": "Only the description"},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert _summary(await _sync(client, OTHER, token)) == ({}, [])
+
+        await client.put(
+            "/api/groups/2", json={"name": "Renamed"}, headers=_user_header(SUPERADMIN)
+        )
+        body = await _sync(client, OTHER, token)
+        assert _summary(body) == ({2: [2], 3: [2]}, [])
+        assert body["agents"][0]["groups"][0]["group_name"] == "Renamed"
+
+    async def test_superadmin_catalog(self, client, db_session):
+        await _seed_data(db_session)
+        body = await _sync(client, SUPERADMIN)
+        assert _summary(body) == ({1: [1], 2: [1, 2], 3: [2]}, [])
+
+        # Membership changes do not touch the catalog
+        await client.post(
+            "/api/groups/1/members",
+            json={"entra_object_id": OTHER.id},
+            headers=_user_header(MEMBER),
+        )
+        body = await _sync(client, SUPERADMIN, body["next_token"])
+        assert _summary(body) == ({}, [])
+
+        await client.put(
+            "/api/admin/agents/1/groups",
+            json={"group_ids": [2]},
+            headers=_user_header(SUPERADMIN),
+        )
+        body = await _sync(client, SUPERADMIN, body["next_token"])
+        assert _summary(body) == ({1: [2]}, [])
+
+    async def test_superadmin_views_another_users_changes(self, client, db_session):
+        await _seed_data(db_session)
+        body = await _sync(client, SUPERADMIN, owner=OTHER)
+        assert _summary(body) == ({2: [2], 3: [2]}, [])
+
+    async def test_other_user_gets_403(self, client, db_session):
+        await _seed_data(db_session)
+        resp = await client.get(
+            "/api/users/user-001/agents/changes", headers=_user_header(OTHER)
+        )
+        assert resp.status_code == 403
+
+    @pytest.mark.parametrize("token", ["!!", "bm90LWEtdG9rZW4", "MS4y LjM"])
+    async def test_invalid_token_returns_400(self, client, db_session, token):
+        await _seed_data(db_session)
+        resp = await client.get(
+            "/api/users/user-001/agents/changes",
+            params={"since": token},
+            headers=_user_header(MEMBER),
+        )
+        assert resp.status_code == 400
+
+
+class TestFullResync:
+    async def test_token_past_retention(self, client, db_session):
+        await _seed_data(db_session)
+        day_old = SyncToken(0, int(datetime.datetime.now().timestamp()) - 86400)
+        assert (await _sync(client, MEMBER, day_old.encode()))["full_resync"] is False
+
+        week_old = SyncToken(0, day_old.issued_at - 7 * 86400)
+        body = await _sync(client, MEMBER, week_old.encode())
+        assert body["full_resync"] is True
+        assert _summary(body) == ({1: [1], 2: [1, 2], 3: [2]}, [])
+
+    async def test_fanout_above_limit(self, client, db_session, monkeypatch):
+        await _seed_data(db_session)
+        token = (await _sync(client, OTHER))["next_token"]
+        monkeypatch.setattr(agent_change_log_service, "AGENT_CHANGES_MAX_FANOUT", 1)
+
+        await client.delete("/api/groups/2/agents/3", headers=_user_header(SUPERADMIN))
+        marker = (
+            await db_session.execute(
+                select(AgentChange.entra_object_id, AgentChange.agent_id)
+            )
+        ).all()
+        assert marker == [(None, None)]
+        assert (await _sync(client, OTHER, token))["full_resync"] is True
+
+    async def test_too_many_changes(self, client, db_session, monkeypatch):
+        await _seed_data(db_session)
+        token = (await _sync(client, OTHER))["next_token"]
+        monkeypatch.setattr(agent_change_log_service, "AGENT_CHANGES_MAX_SYNC", 1)
+
+        await client.put(
+            "/api/groups/2", json={"name": "Renamed"}, headers=_user_header(SUPERADMIN)
+        )
+        assert (await _sync(client, OTHER, token))["full_resync"] is True
+
+
+class TestSettle:
+    async def test_token_stops_before_young_entries(
+        self, client, db_session, monkeypatch
+    ):
+        monkeypatch.setattr(
+            agent_change_log_service, "AGENT_CHANGES_SETTLE_SECONDS", 60
+        )
+        await _seed_data(db_session)
+        token = (await _sync(client, OTHER))["next_token"]
+        await client.delete("/api/groups/2/agents/3", headers=_user_header(SUPERADMIN))
+
+        first = await _sync(client, OTHER, token)
+        assert _summary(first) == ({}, [3])
+        # Entries this young may still be joined by ones committing late
+        # under lower ids, so the next sync reads it again
+        assert _summary(await _sync(client, OTHER, first["next_token"])) == ({}, [3])
+
+
+class TestCompact:
+    async def test_deletes_entries_past_retention(self, db_session):
+        now = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        db_session.add_all(
+            [
+                AgentChange(agent_id=1, created_at=now - datetime.timedelta(days=8)),
+                AgentChange(agent_id=2, created_at=now - datetime.timedelta(days=6)),
+            ]
+        )
+        await db_session.commit()
+
+        assert await AgentChangeLogService().compact(db_session) == 1
+        remaining = await db_session.scalars(select(AgentChange.agent_id))
+        assert list(remaining) == [2]
+        assert await db_session.scalar(select(func.max(AgentChange.id))) == 2
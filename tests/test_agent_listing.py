@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User
+from src.domain.services import agent_listing
+from src.domain.services.agent_listing import list_agents_with_groups
+
+
+async def _seed(session: AsyncSession):
+    """Layout:
+    - Groups 1-3, created in order, so ids 1-3
+    - Agent 1: groups 3, 1 (assigned in that order); agent 2: group 2;
+      agent 3: no groups
+    - user-001 is a member of groups 1 and 2
+    """
+    session.add(User(entra_object_id="user-001", display_name="A", email="a@x"))
+    session.add_all(Group(name=f"Group {i}") for i in range(1, 4))
+    session.add_all(
+        Agent(agent_external_id=f"ext-{i}", name=f"Agent {i}", created_by="x")
+        for i in range(1, 4)
+    )
+    await session.flush()
+    session.add_all(
+        [
+            GroupAgent(group_id=3, agent_id=1, added_by="x"),
+            GroupAgent(group_id=1, agent_id=1, added_by="x"),
+            GroupAgent(group_id=2, agent_id=2, added_by="x"),
+            GroupMembership(
+                entra_object_id="user-001", group_id=1, role=GroupRole.USER
+            ),
+            GroupMembership(
+                entra_object_id="user-001", group_id=2, role=GroupRole.ADMIN
+            ),
+        ]
+    )
+    await session.commit()
+
+
+def _groups(agents: list[dict]) -> dict[int, list[int]]:
+    return {a["id"]: [g["group_id"] for g in a["groups"]] for a in agents}
+
+
+@pytest.fixture(params=["sql", "python"])
+def path(request, monkeypatch):
+    """Run each test on the SQL aggregate and on the Python fallback."""
+    if request.param == "python":
+        monkeypatch.setattr(agent_listing, "_GROUP_AGGREGATES", {})
+    return request.param
+
+
+class TestListAgentsWithGroups:
+    async def test_all_agents_with_sorted_groups(self, db_session, path):
+        await _seed(db_session)
+        agents = await list_agents_with_groups(db_session)
+
+        assert _groups(agents) == {1: [1, 3], 2: [2]}
+        assert agents[0] == {
+            "id": 1,
+            "agent_external_id": "ext-1",
+            "name": "Agent 1",
+            "created_by": "x",
+            "created_at": agents[0]["created_at"],
+            "groups": [
+                {"group_id": 1, "group_name": "Group 1"},
+                {"group_id": 3, "group_name": "Group 3"},
+            ],
+        }
+        assert agents[0]["created_at"] is not None
+
+    async def test_member_sees_only_their_groups(self, db_session, path):
+        await _seed(db_session)
+        agents = await list_agents_with_groups(db_session, member="user-001")
+        assert _groups(agents) == {1: [1], 2: [2]}
+
+    async def test_criteria(self, db_session, path):
+        await _seed(db_session)
+        agents = await list_agents_with_groups(db_session, Agent.id.in_([2, 3]))
+        assert _groups(agents) == {2: [2]}
+
+    async def test_unknown_member(self, db_session, path):
+        await _seed(db_session)
+        assert await list_agents_with_groups(db_session, member="nobody") == []
+
+
+def test_postgresql_aggregates_with_json_agg():
+    stmt = agent_listing._GROUP_AGGREGATES["postgresql"]()
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("json_agg(json_build_object(")
@@ -0,0 +1,243 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.base.config.redis_cache import RedisCache
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User
+from src.domain.models.permission_schemas import PermissionAction
+from src.domain.services.agent_service import AgentService
+from src.domain.services.authorization_graph import AuthorizationGraph
+from src.domain.services.cache_codec import render_user_agents
+from src.domain.services.permission_service import PermissionService
+from src.domain.services.user_agent_access_service import UserAgentAccessService
+
+USERS = ["user-001", "user-002", "user-003"]
+
+
+async def _seed(session: AsyncSession):
+    """Create users, groups, agents, and assignments.
+
+    Layout:
+    - Group A: user-001 (admin), user-002 (user), agent-1, agent-2
+    - Group B: user-001 (user), agent-2, agent-3
+    - Group C: no members, agent-4
+    - user-003 has no memberships
+    """
+    session.add_all(
+        User(entra_object_id=user_id, display_name=user_id, email=f"{user_id}@test")
+        for user_id in USERS
+    )
+    ga, gb, gc = Group(name="Group A"), Group(name="Group B"), Group(name="Group C")
+    agents = [
+        Agent(agent_external_id=f"ext-{i}", name=f"Agent {i}", created_by="user-001")
+        for i in range(1, 5)
+    ]
+    session.add_all([ga, gb, gc, *agents])
+    await session.flush()
+
+    session.add_all(
+        [
+            GroupMembership(
+                entra_object_id="user-001", group_id=ga.id, role=GroupRole.ADMIN
+            ),
+            GroupMembership(
+                entra_object_id="user-002", group_id=ga.id, role=GroupRole.USER
+            ),
+            GroupMembership(
+                entra_object_id="user-001", group_id=gb.id, role=GroupRole.USER
+            ),
+            GroupAgent(group_id=ga.id, agent_id=agents[0].id, added_by="x"),
+            GroupAgent(group_id=ga.id, agent_id=agents[1].id, added_by="x"),
+            GroupAgent(group_id=gb.id, agent_id=agents[1].id, added_by="x"),
+            GroupAgent(group_id=gb.id, agent_id=agents[2].id, added_by="x"),
+            GroupAgent(group_id=gc.id, agent_id=agents[3].id, added_by="x"),
+        ]
+    )
+    await session.commit()
+    # Seeded directly, so the access table is built here rather than by services
+    await UserAgentAccessService().backfill(session)
+    return {"ga": ga, "gb": gb, "gc": gc, "agents": agents}
+
+
+@pytest.fixture
+async def graph(db_session_factory):
+    graph = AuthorizationGraph(db_session_factory)
+    yield graph
+    await graph.stop()
+
+
+class TestMatchesSql:
+    async def test_every_check_matches_sql(self, db_session, graph):
+        data = await _seed(db_session)
+        await graph.load()
+        sql = PermissionService(cache=RedisCache())
+        engine = PermissionService(cache=RedisCache(), graph=graph)
+
+        for user_id in USERS:
+            for agent in [*data["agents"], None]:
+                agent_id = agent.id if agent else 9999
+                for action in PermissionAction:
+                    expected = await sql.check_permission(
+                        db_session, user_id, agent_id, action
+                    )
+                    assert (
+                        await engine.check_permission(None, user_id, agent_id, action)
+                        == expected
+                    ), (user_id, agent_id, action)
+
+    @pytest.mark.parametrize(
+        ("user_id", "is_superadmin"),
+        [("user-001", False), ("user-002", False), ("user-001", True)],
+    )
+    async def test_user_agents_match_agent_service(
+        self, db_session, graph, user_id, is_superadmin
+    ):
+        await _seed(db_session)
+        await graph.load()
+
+        expected = await AgentService().get_user_agents(
+            db_session, user_id, is_superadmin=is_superadmin
+        )
+        assert graph.user_agents(
+            user_id, is_superadmin=is_superadmin
+        ) == render_user_agents(expected)
+
+    async def test_group_roles_match_sql(self, db_session, graph):
+        data = await _seed(db_session)
+        await graph.load()
+        sql = PermissionService(cache=RedisCache())
+        engine = PermissionService(cache=RedisCache(), graph=graph)
+
+        for user_id in USERS:
+            for group in (data["ga"], data["gb"], data["gc"]):
+                assert await engine.get_group_role(
+                    None, user_id, group.id
+                ) == await sql.get_group_role(db_session, user_id, group.id)
+
+    async def test_user_without_groups_falls_back(self, db_session, graph):
+        await _seed(db_session)
+        await graph.load()
+        assert graph.user_agents("user-003") is None
+
+        service = PermissionService(cache=RedisCache(), graph=graph)
+
+        async def load():
+            return []
+
+        assert await service.get_user_agents("user-003", load) == []
+
+    async def test_consistent_after_load(self, db_session, graph):
+        await _seed(db_session)
+        await graph.load()
+        assert await graph.check_consistency() == []
+
+    async def test_drift_reported_and_fixed_by_load(self, db_session, graph):
+        data = await _seed(db_session)
+        await graph.load()
+
+        # A write the graph is not told about
+        db_session.add(
+            GroupMembership(
+                entra_object_id="user-003", group_id=data["gb"].id, role=GroupRole.USER
+            )
+        )
+        await db_session.commit()
+
+        assert await graph.check_consistency() == [
+            f"user user-003: {{}} != {{{data['gb'].id}: <GroupRole.USER: 'user'>}}"
+        ]
+        await graph.load()
+        assert await graph.check_consistency() == []
+
+
+class TestIncrementalUpdates:
+    async def test_membership_change_applied_on_invalidation(self, db_session, graph):
+        data = await _seed(db_session)
+        await graph.load()
+        service = PermissionService(cache=RedisCache(), graph=graph)
+        agent_id = data["agents"][2].id
+
+        db_session.add(
+            GroupMembership(
+                entra_object_id="user-002", group_id=data["gb"].id, role=GroupRole.ADMIN
+            )
+        )
+        await db_session.commit()
+        await service.invalidate_user_permissions("user-002")
+
+        assert await service.check_permission(
+            None, "user-002", agent_id, PermissionAction.CREATE
+        ) == (True, "admin")
+        assert await graph.check_consistency() == []
+
+    async def test_assignment_to_new_group_applied(self, db_session, graph):
+        data = await _seed(db_session)
+        await graph.load()
+        service = PermissionService(cache=RedisCache(), graph=graph)
+
+        group = Group(name="Group D")
+        db_session.add(group)
+        await db_session.flush()
+        agent_id = data["agents"][3].id
+        db_session.add_all(
+            [
+                GroupMembership(
+                    entra_object_id="user-003", group_id=group.id, role=GroupRole.USER
+                ),
+                GroupAgent(group_id=group.id, agent_id=agent_id, added_by="x"),
+            ]
+        )
+        await db_session.commit()
+        await service.invalidate_user_permissions("user-003")
+        await service.invalidate_agent_assignment(db_session, agent_id, [group.id])
+
+        agents = graph.user_agents("user-003")
+        assert [a["id"] for a in agents] == [agent_id]
+        assert agents[0]["groups"] == [{"group_id": group.id, "group_name": "Group D"}]
+        assert await graph.check_consistency() == []
+
+    async def test_group_rename_applied(self, db_session, graph):
+        data = await _seed(db_session)
+        await graph.load()
+        service = PermissionService(cache=RedisCache(), graph=graph)
+
+        await db_session.execute(
+            update(Group).where(Group.id == data["gc"].id).values(name="Renamed")
+        )
+        await db_session.commit()
+        await service.invalidate_group(data["gc"].id)
+
+        (agent,) = [
+            a
+            for a in graph.user_agents("sa", is_superadmin=True)
+            if a["id"] == data["agents"][3].id
+        ]
+        assert agent["groups"][0]["group_name"] == "Renamed"
+
+    async def test_message_from_other_worker_schedules_reload(self, db_session, graph):
+        data = await _seed(db_session)
+        await graph.load()
+        service = PermissionService(cache=RedisCache(), graph=graph)
+
+        await db_session.execute(
+            update(Group).where(Group.id == data["gc"].id).values(name="Renamed")
+        )
+        await db_session.commit()
+        service._on_invalidation_message(f"group:{data['gc'].id}")
+        (task,) = graph._tasks
+        await task
+
+        assert await graph.check_consistency() == []
+
+    async def test_reloads_during_load_are_replayed(self, db_session, graph):
+        await _seed(db_session)
+        graph._dirty = set()  # as if a full load were in progress
+
+        await graph.reload("user", "user-003")
+
+        assert graph._dirty == {("user", "user-003")}
@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from src.domain.services.cache_codec import (
+    CompactCacheCodec,
+    JsonCacheCodec,
+    get_cache_codec,
+    render_user_agents,
+)
+
+VERDICTS = [(False, None), (True, "user"), (True, "admin")]
+
+
+def _agent(agent_id: int, groups: list[tuple[int, str]]) -> dict:
+    return {
+        "id": agent_id,
+        "agent_external_id": f"ext-{agent_id}",
+        "name": f"Agent {agent_id} — ü",
+        "created_by": "user-001",
+        "created_at": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.UTC),
+        "groups": [
+            {"group_id": group_id, "group_name": name} for group_id, name in groups
+        ],
+    }
+
+
+AGENTS = [_agent(1, [(1, "Group A"), (2, "Group B")]), _agent(2, [])]
+
+
+@pytest.fixture(params=[CompactCacheCodec, JsonCacheCodec])
+def codec(request):
+    return request.param()
+
+
+class TestRoundTrip:
+    @pytest.mark.parametrize("verdict", VERDICTS)
+    def test_verdict(self, codec, verdict):
+        assert codec.decode_verdict(codec.encode_verdict(*verdict)) == verdict
+
+    def test_user_agents_rendered_for_response(self, codec):
+        soft_expires_at, agents = codec.decode_user_agents(
+            codec.encode_user_agents(1700000000.5, AGENTS)
+        )
+        assert soft_expires_at == 1700000000.5
+        assert agents[0]["created_at"] == "2024-05-01T12:30:00Z"
+        assert agents[0]["groups"] == [
+            {"group_id": 1, "group_name": "Group A"},
+            {"group_id": 2, "group_name": "Group B"},
+        ]
+        assert agents[1]["groups"] == []
+        assert [a["name"] for a in agents] == [a["name"] for a in AGENTS]
+
+    def test_empty_list(self, codec):
+        assert codec.decode_user_agents(codec.encode_user_agents(1.0, [])) == (1.0, [])
+
+    def test_agent(self, codec):
+        (rendered,) = render_user_agents(AGENTS[:1])
+        assert codec.decode_agent(codec.encode_agent(rendered)) == rendered
+
+
+class TestCompactCodec:
+    def test_verdict_is_one_byte(self):
+        codec = CompactCacheCodec()
+        for verdict in VERDICTS:
+            assert len(codec.encode_verdict(*verdict).encode()) == 1
+
+    def test_smaller_than_json(self):
+        compact, plain = CompactCacheCodec(), JsonCacheCodec()
+        assert len(compact.encode_user_agents(1.0, AGENTS)) < len(
+            plain.encode_user_agents(1.0, AGENTS)
+        )
+
+    def test_json_values_are_not_decoded(self):
+        compact, plain = CompactCacheCodec(), JsonCacheCodec()
+        assert compact.decode_verdict(plain.encode_verdict(True, "admin")) is None
+        assert compact.decode_user_agents(plain.encode_user_agents(1.0, AGENTS)) is None
+        (rendered,) = render_user_agents(AGENTS[:1])
+        assert compact.decode_agent(plain.encode_agent(rendered)) is None
+
+    def test_compact_values_are_not_decoded_as_json(self):
+        compact, plain = CompactCacheCodec(), JsonCacheCodec()
+        assert plain.decode_verdict(compact.encode_verdict(True, "admin")) is None
+        assert plain.decode_user_agents(compact.encode_user_agents(1.0, AGENTS)) is None
+        (rendered,) = render_user_agents(AGENTS[:1])
+        assert plain.decode_agent(compact.encode_agent(rendered)) is None
+
+
+class TestGetCacheCodec:
+    def test_default_is_compact(self, monkeypatch):
+        monkeypatch.delenv("PERMISSION_CACHE_CODEC", raising=False)
+        assert isinstance(get_cache_codec(), CompactCacheCodec)
+
+    def test_selected_by_env(self, monkeypatch):
+        monkeypatch.setenv("PERMISSION_CACHE_CODEC", "JSON")
+        assert isinstance(get_cache_codec(), JsonCacheCodec)
+
+    def test_unknown_name_rejected(self):
+        with pytest.raises(ValueError):
+            get_cache_codec("pickle")
@@ -0,0 +1,325 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.base.config.redis_cache import RedisCache
+from src.base.models.user import User
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User as UserEntity
+from src.domain.routes import (
+    admin_routes,
+    agent_routes,
+    group_routes,
+    membership_routes,
+)
+from src.domain.services.admin_service import AdminService
+from src.domain.services.agent_service import AgentService
+from src.domain.services.group_service import GroupService
+from src.domain.services.membership_service import MembershipService
+from src.domain.services.permission_service import ETAG_EPOCH_KEY, PermissionService
+from src.domain.services.user_service import UserService
+from tests.conftest import DictRedis, FakeAuthMiddleware
+
+
+def _user_header(user: User) -> dict[str, str]:
+    return {"X-Test-User": json.dumps(user.model_dump())}
+
+
+SUPERADMIN = User(
+    id="sa-001", email="admin@test.com", name="Super Admin", is_superadmin=True
+)
+MEMBER = User(id="user-001", email="user@test.com", name="User", is_superadmin=False)
+OTHER = User(id="user-002", email="other@test.com", name="Other", is_superadmin=False)
+
+
+@pytest.fixture
+def redis():
+    return DictRedis()
+
+
+@pytest.fixture
+def app(db_session_factory, redis):
+    test_app = FastAPI()
+    test_app.state.db_session_factory = db_session_factory
+    test_app.state.admin_service = AdminService()
+    test_app.state.agent_service = AgentService()
+    test_app.state.group_service = GroupService()
+    test_app.state.membership_service = MembershipService()
+    test_app.state.permission_service = PermissionService(cache=RedisCache(redis))
+    test_app.state.user_service = UserService()
+    test_app.add_middleware(FakeAuthMiddleware)
+    for module in (admin_routes, agent_routes, group_routes, membership_routes):
+        test_app.include_router(module.router, prefix="/api")
+    return test_app
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as c:
+        yield c
+
+
+async def _seed_data(session: AsyncSession):
+    """Layout:
+    - Group 1: user-001 (admin), agents 1 and 2
+    - Group 2: user-002, agent 3
+    """
+    session.add_all(
+        UserEntity(entra_object_id=user.id, display_name=user.name, email=user.email)
+        for user in (SUPERADMIN, MEMBER, OTHER)
+    )
+    session.add_all([Group(name="Group 1"), Group(name="Group 2")])
+    session.add_all(
+        Agent(agent_external_id=f"agent-{i}", name=f"Agent {i}", created_by="sa")
+        for i in range(1, 4)
+    )
+    await session.flush()
+    session.add_all(
+        [
+            GroupMembership(
+                entra_object_id=MEMBER.id, group_id=1, role=GroupRole.ADMIN
+            ),
+            GroupMembership(entra_object_id=OTHER.id, group_id=2, role=GroupRole.USER),
+            GroupAgent(group_id=1, agent_id=1, added_by="sa"),
+            GroupAgent(group_id=1, agent_id=2, added_by="sa"),
+            GroupAgent(group_id=2, agent_id=3, added_by="sa"),
+        ]
+    )
+    await session.commit()
+
+
+async def _get(client, url, user, etag=None):
+    headers = _user_header(user)
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    return await client.get(url, headers=headers)
+
+
+async def _assert_not_modified(client, url, user) -> str:
+    """GET `url` twice; the second, conditional request gets a 304."""
+    first = await _get(client, url, user)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    second = await _get(client, url, user, etag)
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+    return etag
+
+
+URLS = [
+    ("/api/users/user-001/agents", MEMBER),
+    ("/api/users/sa-001/agents", SUPERADMIN),
+    ("/api/groups", MEMBER),
+    ("/api/groups", SUPERADMIN),
+    ("/api/groups/1", MEMBER),
+]
+
+
+class TestConditionalGet:
+    @pytest.mark.parametrize("url,user", URLS)
+    async def test_unchanged_returns_304(self, client, db_session, url, user):
+        await _seed_data(db_session)
+        await _assert_not_modified(client, url, user)
+
+    @pytest.mark.parametrize("url,user", URLS)
+    async def test_etag_header_and_cache_control(self, client, db_session, url, user):
+        await _seed_data(db_session)
+        resp = await _get(client, url, user)
+        assert resp.headers["etag"].startswith('"')
+        assert resp.headers["cache-control"] == "private, no-cache"
+
+    async def test_304_skips_the_database(self, client, db_session, app, monkeypatch):
+        await _seed_data(db_session)
+        etag = (await _get(client, "/api/groups/1", MEMBER)).headers["etag"]
+
+        get_group = AsyncMock()
+        monkeypatch.setattr(app.state.group_service, "get_group", get_group)
+        resp = await _get(client, "/api/groups/1", MEMBER, etag)
+        assert resp.status_code == 304
+        get_group.assert_not_awaited()
+
+    async def test_stale_etag_returns_200(self, client, db_session):
+        await _seed_data(db_session)
+        resp = await _get(client, "/api/groups", MEMBER, '"stale"')
+        assert resp.status_code == 200
+
+    async def test_weak_and_listed_etags_match(self, client, db_session):
+        await _seed_data(db_session)
+        etag = (await _get(client, "/api/groups", MEMBER)).headers["etag"]
+        resp = await _get(client, "/api/groups", MEMBER, f'"other", W/{etag}')
+        assert resp.status_code == 304
+
+    async def test_pages_have_distinct_etags(self, client, db_session):
+        await _seed_data(db_session)
+        whole = await _get(client, "/api/groups", SUPERADMIN)
+        page = await _get(client, "/api/groups?limit=1", SUPERADMIN)
+        assert whole.headers["etag"] != page.headers["etag"]
+
+    async def test_users_have_distinct_etags(self, client, db_session):
+        await _seed_data(db_session)
+        member = await _get(client, "/api/groups", MEMBER)
+        other = await _get(client, "/api/groups", OTHER)
+        assert member.headers["etag"] != other.headers["etag"]
+
+    async def test_non_member_gets_403_not_304(self, client, db_session):
+        await _seed_data(db_session)
+        etag = (await _get(client, "/api/groups/1", MEMBER)).headers["etag"]
+        resp = await _get(client, "/api/groups/1", OTHER, etag)
+        assert resp.status_code == 403
+
+    async def test_other_users_agents_still_403(self, client, db_session):
+        await _seed_data(db_session)
+        etag = (await _get(client, "/api/users/user-001/agents", MEMBER)).headers[
+            "etag"
+        ]
+        resp = await _get(client, "/api/users/user-001/agents", OTHER, etag)
+        assert resp.status_code == 403
+
+    async def test_new_epoch_changes_etags(self, client, db_session, redis):
+        await _seed_data(db_session)
+        etag = await _assert_not_modified(client, "/api/groups", MEMBER)
+        # Redis lost its data: counters restart from 0 under a new epoch
+        redis.data.clear()
+        resp = await _get(client, "/api/groups", MEMBER, etag)
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etag
+        assert ETAG_EPOCH_KEY in redis.data
+
+    async def test_no_etag_without_redis(self, client, db_session, app):
+        await _seed_data(db_session)
+        app.state.permission_service = PermissionService(cache=RedisCache())
+        resp = await _get(client, "/api/groups", MEMBER)
+        assert resp.status_code == 200
+        assert "etag" not in resp.headers
+        assert (await _get(client, "/api/groups", MEMBER, "*")).status_code == 200
+
+
+class TestInvalidation:
+    async def test_add_member(self, client, db_session):
+        await _seed_data(db_session)
+        agents_etag = await _assert_not_modified(
+            client, "/api/users/user-002/agents", OTHER
+        )
+        groups_etag = await _assert_not_modified(client, "/api/groups", OTHER)
+        group_etag = await _assert_not_modified(client, "/api/groups/1", MEMBER)
+
+        resp = await client.post(
+            "/api/groups/1/members",
+            json={"entra_object_id": OTHER.id},
+            headers=_user_header(MEMBER),
+        )
+        assert resp.status_code == 201
+
+        resp = await _get(client, "/api/users/user-002/agents", OTHER, agents_etag)
+        assert resp.status_code == 200
+        assert {a["id"] for a in resp.json()["agents"]} == {1, 2, 3}
+        resp = await _get(client, "/api/groups", OTHER, groups_etag)
+        assert resp.status_code == 200
+        assert {g["id"] for g in resp.json()["groups"]} == {1, 2}
+        # The group itself did not change
+        resp = await _get(client, "/api/groups/1", MEMBER, group_etag)
+        assert resp.status_code == 304
+
+    async def test_remove_agent_from_group(self, client, db_session):
+        await _seed_data(db_session)
+        member_etag = await _assert_not_modified(
+            client, "/api/users/user-001/agents", MEMBER
+        )
+        other_etag = await _assert_not_modified(
+            client, "/api/users/user-002/agents", OTHER
+        )
+        catalog_etag = await _assert_not_modified(
+            client, "/api/users/sa-001/agents", SUPERADMIN
+        )
+
+        resp = await client.delete(
+            "/api/groups/1/agents/2", headers=_user_header(MEMBER)
+        )
+        assert resp.status_code == 204
+
+        resp = await _get(client, "/api/users/user-001/agents", MEMBER, member_etag)
+        assert resp.status_code == 200
+        assert [a["id"] for a in resp.json()["agents"]] == [1]
+        resp = await _get(client, "/api/users/sa-001/agents", SUPERADMIN, catalog_etag)
+        assert resp.status_code == 200
+        # user-002 is not in group 1: their list is untouched
+        resp = await _get(client, "/api/users/user-002/agents", OTHER, other_etag)
+        assert resp.status_code == 304
+
+    async def test_bulk_update_agent_groups(self, client, db_session):
+        await _seed_data(db_session)
+        member_etag = await _assert_not_modified(
+            client, "/api/users/user-001/agents", MEMBER
+        )
+        other_etag = await _assert_not_modified(
+            client, "/api/users/user-002/agents", OTHER
+        )
+
+        # Agent 3 moves from group 2 to group 1
+        resp = await client.put(
+            "/api/admin/agents/3/groups",
+            json={"group_ids": [1]},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert resp.status_code == 200
+
+        resp = await _get(client, "/api/users/user-001/agents", MEMBER, member_etag)
+        assert resp.status_code == 200
+        assert [a["id"] for a in resp.json()["agents"]] == [1, 2, 3]
+        resp = await _get(client, "/api/users/user-002/agents", OTHER, other_etag)
+        assert resp.status_code == 200
+        assert resp.json()["agents"] == []
+
+    async def test_update_group(self, client, db_session):
+        await _seed_data(db_session)
+        group_etag = await _assert_not_modified(client, "/api/groups/1", MEMBER)
+        groups_etag = await _assert_not_modified(client, "/api/groups", OTHER)
+        agents_etag = await _assert_not_modified(
+            client, "/api/users/user-001/agents", MEMBER
+        )
+
+        resp = await client.put(
+            "/api/groups/1",
+            json={"description": "Changed"},
+            headers=_user_header(MEMBER),
+        )
+        assert resp.status_code == 200
+
+        resp = await _get(client, "/api/groups/1", MEMBER, group_etag)
+        assert resp.status_code == 200
+        assert resp.json()["description"] == "Changed"
+        # Group listings are versioned as a whole
+        resp = await _get(client, "/api/groups", OTHER, groups_etag)
+        assert resp.status_code == 200
+        # Agent lists only show group names
+        resp = await _get(client, "/api/users/user-001/agents", MEMBER, agents_etag)
+        assert resp.status_code == 304
+
+    async def test_create_and_delete_group(self, client, db_session):
+        await _seed_data(db_session)
+        etag = await _assert_not_modified(client, "/api/groups", SUPERADMIN)
+
+        resp = await client.post(
+            "/api/groups", json={"name": "Group 3"}, headers=_user_header(SUPERADMIN)
+        )
+        assert resp.status_code == 201
+        resp = await _get(client, "/api/groups", SUPERADMIN, etag)
+        assert resp.status_code == 200
+        assert len(resp.json()["groups"]) == 3
+
+        group_etag = await _assert_not_modified(client, "/api/groups/3", SUPERADMIN)
+        resp = await client.delete("/api/groups/3", headers=_user_header(SUPERADMIN))
+        assert resp.status_code == 204
+        resp = await _get(client, "/api/groups/3", SUPERADMIN, group_etag)
+        assert resp.status_code == 404
@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+from jose.backends.base import Key
+
+from src.base.auth.jwks_provider import JWKSProvider
+from src.base.auth.signing_keys import SigningKeyRegistry
+
+_PUBLIC_PEM = (
+    rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    .public_key()
+    .public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+)
+_PUBLIC_JWK = jwk.construct(_PUBLIC_PEM, "RS256").to_dict()
+
+
+def _jwks(*kids: str) -> dict:
+    return {"keys": [{**_PUBLIC_JWK, "kid": kid} for kid in kids]}
+
+
+@pytest.fixture
+def jwks_file(tmp_path):
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps(_jwks("kid-1")))
+    return path
+
+
+class TestLocalFileSource:
+    async def test_start_loads_keys(self, jwks_file):
+        provider = JWKSProvider(str(jwks_file))
+        await provider.start()
+        try:
+            assert provider.has_kid("kid-1")
+            assert not provider.has_kid("kid-2")
+        finally:
+            await provider.stop()
+
+    async def test_file_url_source(self, jwks_file):
+        provider = JWKSProvider(f"file://{jwks_file}")
+        await provider.refresh()
+        assert provider.has_kid("kid-1")
+
+    async def test_missing_source_does_not_fail_startup(self, tmp_path):
+        provider = JWKSProvider(str(tmp_path / "missing.json"))
+        await provider.start()
+        try:
+            assert provider.jwks == {"keys": []}
+        finally:
+            await provider.stop()
+
+    async def test_unknown_kid_triggers_refetch(self, jwks_file):
+        provider = JWKSProvider(str(jwks_file), min_refetch_interval=0)
+        await provider.refresh()
+
+        jwks_file.write_text(json.dumps(_jwks("kid-1", "kid-2")))
+        assert await provider.refresh_for_kid("kid-2") is True
+        assert provider.has_kid("kid-2")
+
+    async def test_unknown_kid_refetch_is_rate_limited(self, jwks_file):
+        provider = JWKSProvider(str(jwks_file), min_refetch_interval=60)
+        await provider.refresh()
+
+        # Rotation happened, but we fetched too recently to refetch again
+        jwks_file.write_text(json.dumps(_jwks("kid-2")))
+        assert await provider.refresh_for_kid("kid-2") is False
+        assert provider.has_kid("kid-1")
+
+    async def test_background_refresh_picks_up_rotation(self, jwks_file):
+        provider = JWKSProvider(str(jwks_file), refresh_interval=0.01)
+        await provider.start()
+        try:
+            jwks_file.write_text(json.dumps(_jwks("kid-2")))
+            for _ in range(100):
+                if provider.has_kid("kid-2"):
+                    break
+                await asyncio.sleep(0.01)
+            assert provider.has_kid("kid-2")
+            assert not provider.has_kid("kid-1")
+        finally:
+            await provider.stop()
+
+    async def test_invalid_document_keeps_previous_keys(self, jwks_file):
+        provider = JWKSProvider(str(jwks_file), min_refetch_interval=0)
+        await provider.refresh()
+
+        jwks_file.write_text(json.dumps({"error": "nope"}))
+        assert await provider.refresh_for_kid("kid-2") is False
+        assert provider.has_kid("kid-1")
+
+
+class TestSigningKeyRegistry:
+    def test_keys_are_parsed_once_and_indexed_by_kid(self):
+        registry = SigningKeyRegistry.from_jwks(_jwks("kid-1", "kid-2"))
+        assert set(registry) == {"kid-1", "kid-2"}
+        assert isinstance(registry["kid-1"], Key)
+        assert registry.get("kid-3") is None
+
+    def test_unparseable_keys_are_skipped(self):
+        jwks = _jwks("kid-1")
+        jwks["keys"].append({"kid": "broken", "kty": "RSA", "n": "!!", "e": "!!"})
+        jwks["keys"].append({"kty": "RSA"})
+        registry = SigningKeyRegistry.from_jwks(jwks)
+        assert set(registry) == {"kid-1"}
+
+    async def test_refresh_swaps_registry(self, jwks_file):
+        provider = JWKSProvider(str(jwks_file))
+        await provider.refresh()
+        before = provider.keys
+
+        jwks_file.write_text(json.dumps(_jwks("kid-2")))
+        await provider.refresh()
+
+        assert provider.keys is not before
+        assert set(before) == {"kid-1"}
+        assert set(provider.keys) == {"kid-2"}
+
+
+class TestHttpSource:
+    async def test_fetches_from_stub_server(self):
+        calls = 0
+
+        async def handler(request):
+            nonlocal calls
+            calls += 1
+            return web.json_response(_jwks(f"kid-{calls}"))
+
+        app = web.Application()
+        app.router.add_get("/keys", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        provider = JWKSProvider(f"http://127.0.0.1:{port}/keys", min_refetch_interval=0)
+        try:
+            await provider.start()
+            assert provider.has_kid("kid-1")
+
+            assert await provider.refresh_for_kid("kid-2") is True
+            assert calls == 2
+        finally:
+            await provider.stop()
+            await runner.cleanup()
@@ -0,0 +1,181 @@
+import os
+
+os.environ.setdefault("AZURE_TENANT_ID", "test-tenant")
+os.environ.setdefault("AZURE_CLIENT_ID", "test-client")
+
+import pytest  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from jose import ExpiredSignatureError, JWTError  # noqa: E402
+
+from src.base.auth.token_cache import token_cache  # noqa: E402
+from src.base.middleware import jwt_middleware  # noqa: E402
+from src.base.middleware.correlation_middleware import (  # noqa: E402
+    CorrelationMiddleware,
+)
+from src.base.middleware.global_exception_handler_middleware import (  # noqa: E402
+    GlobalExceptionHandlerMiddleware,
+)
+from src.base.middleware.jwt_middleware import (  # noqa: E402
+    JWTMiddleware,
+    compile_whitelist,
+    is_whitelisted,
+)
+from src.base.middleware.request_context import get_request_context  # noqa: E402
+
+CLAIMS = {
+    "oid": "user-001",
+    "name": "Alice",
+    "email": "alice@test.com",
+    "roles": ["agentverse-admin"],
+    "scp": "read write",
+    "exp": 4_102_444_800,
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_validation(monkeypatch):
+    token_cache.clear()
+
+    async def validate(token: str):
+        if token == "expired":
+            raise ExpiredSignatureError("expired")
+        if token != "good":
+            raise JWTError("bad")
+        return CLAIMS
+
+    monkeypatch.setattr(jwt_middleware, "validate_jwt_token_async", validate)
+
+
+@pytest.fixture
+def app():
+    test_app = FastAPI()
+    test_app.add_middleware(JWTMiddleware)
+    test_app.add_middleware(CorrelationMiddleware)
+    test_app.add_middleware(GlobalExceptionHandlerMiddleware)
+
+    @test_app.get("/api/health")
+    async def health():
+        return {"status": "Healthy"}
+
+    @test_app.get("/api/me")
+    async def me(request: Request):
+        return {
+            **request.state.user.model_dump(),
+            "context_user": get_request_context("user_object_id"),
+            "context_correlation": get_request_context("correlation_id"),
+        }
+
+    @test_app.get("/api/boom")
+    async def boom():
+        raise RuntimeError("kaboom")
+
+    return test_app
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(
+        transport=ASGITransport(app=app, raise_app_exceptions=False),
+        base_url="http://test",
+    ) as c:
+        yield c
+
+
+class TestJWTMiddleware:
+    async def test_whitelisted_path_skips_auth(self, client):
+        resp = await client.get("/api/health")
+        assert resp.status_code == 200
+
+    async def test_missing_header_returns_401(self, client):
+        resp = await client.get("/api/me")
+        assert resp.status_code == 401
+        assert resp.json()["detail"] == "Missing or invalid Authorization header"
+
+    async def test_invalid_token_returns_401(self, client):
+        resp = await client.get("/api/me", headers={"Authorization": "Bearer nope"})
+        assert resp.status_code == 401
+        assert resp.json()["detail"] == "Invalid token"
+
+    async def test_expired_token_returns_401(self, client):
+        resp = await client.get("/api/me", headers={"Authorization": "Bearer expired"})
+        assert resp.status_code == 401
+        assert resp.json()["detail"] == "Token has expired"
+
+    async def test_valid_token_populates_user_and_context(self, client):
+        resp = await client.get("/api/me", headers={"Authorization": "Bearer good"})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["id"] == "user-001"
+        assert body["scopes"] == ["read", "write"]
+        assert body["is_superadmin"] is True
+        assert body["context_user"] == "user-001"
+
+
+class TestWhitelistMatcher:
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "/favicon.ico",
+            "/docs",
+            "/docs/oauth2-redirect",
+            "/redoc",
+            "/openapi.json",
+            "/health",
+            "/robots.txt",
+            "/robots-staging.txt",
+            "/api/",
+            "/api/health",
+        ],
+    )
+    def test_public_paths_match(self, path):
+        assert is_whitelisted(path)
+
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "/api",
+            "/api/permissions/check",
+            "/api/users/user-001/agents",
+            "/api/groups/1/health",
+            "/robots.txt.bak",
+        ],
+    )
+    def test_protected_paths_do_not_match(self, path):
+        assert not is_whitelisted(path)
+
+    def test_configured_patterns_extend_whitelist(self):
+        matcher = compile_whitelist([r"^/api/health", r"^/metrics$"])
+        assert matcher.match("/metrics")
+        assert matcher.match("/api/health")
+        assert not matcher.match("/metrics/extra")
+
+
+class TestCorrelationMiddleware:
+    async def test_echoes_incoming_correlation_id(self, client):
+        resp = await client.get(
+            "/api/me",
+            headers={"Authorization": "Bearer good", "x-correlation-id": "abc-123"},
+        )
+        assert resp.headers["x-correlation-id"] == "abc-123"
+        assert resp.json()["context_correlation"] == "abc-123"
+
+    async def test_generates_correlation_id(self, client):
+        resp = await client.get("/api/health")
+        assert resp.headers["x-correlation-id"]
+
+    async def test_header_added_to_auth_errors(self, client):
+        resp = await client.get("/api/me")
+        assert resp.status_code == 401
+        assert resp.headers["x-correlation-id"]
+
+
+class TestGlobalExceptionHandlerMiddleware:
+    async def test_unhandled_exception_returns_problem_details(self, client):
+        resp = await client.get("/api/boom", headers={"Authorization": "Bearer good"})
+        assert resp.status_code == 500
+        body = resp.json()
+        assert body["title"] == "RuntimeError"
+        assert body["detail"] == "kaboom"
+        assert body["status"] == 500
+        assert body["instance"] == "http://test/api/boom"
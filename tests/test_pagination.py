@@ -0,0 +1,283 @@
+import json
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.base.config.redis_cache import RedisCache
+from src.base.models.user import User
+from src.base.utils.pagination import decode_cursor, encode_cursor
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_agent import GroupAgent
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User as UserEntity
+from src.domain.routes import (
+    admin_routes,
+    agent_routes,
+    group_routes,
+    membership_routes,
+)
+from src.domain.services.admin_service import AdminService
+from src.domain.services.agent_service import AgentService
+from src.domain.services.group_service import GroupService
+from src.domain.services.membership_service import MembershipService
+from src.domain.services.permission_service import PermissionService
+from src.domain.services.user_service import UserService
+from tests.conftest import FakeAuthMiddleware
+
+
+def _user_header(user: User) -> dict[str, str]:
+    return {"X-Test-User": json.dumps(user.model_dump())}
+
+
+SUPERADMIN = User(
+    id="sa-001", email="admin@test.com", name="Super Admin", is_superadmin=True
+)
+MEMBER = User(id="u0", email="u0@test.com", name="User 0", is_superadmin=False)
+
+GROUPS = 5
+AGENTS = 7
+MEMBERS = 7
+
+
+@pytest.fixture
+def app(db_session_factory):
+    test_app = FastAPI()
+    test_app.state.db_session_factory = db_session_factory
+    test_app.state.admin_service = AdminService()
+    test_app.state.agent_service = AgentService()
+    test_app.state.group_service = GroupService()
+    test_app.state.membership_service = MembershipService()
+    test_app.state.permission_service = PermissionService(cache=RedisCache())
+    test_app.state.user_service = UserService()
+    test_app.add_middleware(FakeAuthMiddleware)
+    for module in (admin_routes, agent_routes, group_routes, membership_routes):
+        test_app.include_router(module.router, prefix="/api")
+    return test_app
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as c:
+        yield c
+
+
+async def _seed_data(session: AsyncSession):
+    """Layout:
+    - Groups 1-5; u0 belongs to all of them and is admin of group 1
+    - Group 1: users u0-u6, agents 1-7
+    - Group 2: agents 1-3
+    """
+    session.add_all(
+        UserEntity(entra_object_id=f"u{i}", display_name=f"User {i}", email="")
+        for i in range(MEMBERS)
+    )
+    session.add_all(Group(name=f"Group {i}") for i in range(1, GROUPS + 1))
+    session.add_all(
+        Agent(agent_external_id=f"agent-{i}", name=f"Agent {i}", created_by="sa")
+        for i in range(1, AGENTS + 1)
+    )
+    await session.flush()
+    session.add_all(
+        GroupMembership(
+            entra_object_id="u0",
+            group_id=group_id,
+            role=GroupRole.ADMIN if group_id == 1 else GroupRole.USER,
+        )
+        for group_id in range(1, GROUPS + 1)
+    )
+    session.add_all(
+        GroupMembership(entra_object_id=f"u{i}", group_id=1, role=GroupRole.USER)
+        for i in range(1, MEMBERS)
+    )
+    session.add_all(
+        GroupAgent(group_id=1, agent_id=agent_id, added_by="sa")
+        for agent_id in range(1, AGENTS + 1)
+    )
+    session.add_all(
+        GroupAgent(group_id=2, agent_id=agent_id, added_by="sa")
+        for agent_id in range(1, 4)
+    )
+    await session.commit()
+
+
+async def _walk(client, url, key, user=SUPERADMIN, limit=3) -> list[dict]:
+    """Follow next_cursor from the first page to the last; return all items."""
+    items = []
+    params = {"limit": limit}
+    while True:
+        resp = await client.get(url, params=params, headers=_user_header(user))
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert len(body[key]) <= limit
+        items.extend(body[key])
+        if body["next_cursor"] is None:
+            return items
+        params = {"limit": limit, "cursor": body["next_cursor"]}
+
+
+LISTINGS = [
+    ("/api/admin/agents", "agents", SUPERADMIN),
+    ("/api/admin/groups", "groups", SUPERADMIN),
+    ("/api/groups", "groups", SUPERADMIN),
+    ("/api/groups", "groups", MEMBER),
+    ("/api/groups/1/members", "members", MEMBER),
+    ("/api/groups/1/agents", "agents", MEMBER),
+]
+
+
+class TestCursor:
+    def test_round_trip(self):
+        assert decode_cursor(encode_cursor(0)) == 0
+        assert decode_cursor(encode_cursor(123456789)) == 123456789
+
+    @pytest.mark.parametrize("cursor", ["", "!!", "bm90LWFuLWludA", "é"])
+    def test_invalid(self, cursor):
+        with pytest.raises(ValueError, match="invalid_cursor"):
+            decode_cursor(cursor)
+
+
+class TestPaginatedListings:
+    @pytest.mark.parametrize("url,key,user", LISTINGS)
+    async def test_pages_match_unpaginated(self, client, db_session, url, key, user):
+        await _seed_data(db_session)
+        resp = await client.get(url, headers=_user_header(user))
+        assert resp.status_code == 200
+        assert resp.json()["next_cursor"] is None
+        whole = resp.json()[key]
+        assert len(whole) > 3
+
+        def by_key(item):
+            return item.get("id", item.get("entra_object_id"))
+
+        paged = await _walk(client, url, key, user)
+        assert paged == sorted(whole, key=by_key)
+
+    async def test_exact_multiple_of_limit(self, client, db_session):
+        await _seed_data(db_session)
+        resp = await client.get(
+            "/api/admin/groups",
+            params={"limit": GROUPS},
+            headers=_user_header(SUPERADMIN),
+        )
+        body = resp.json()
+        assert len(body["groups"]) == GROUPS
+        assert body["next_cursor"] is None
+
+    async def test_admin_agents_keep_all_groups_on_one_page(self, client, db_session):
+        await _seed_data(db_session)
+        agents = await _walk(client, "/api/admin/agents", "agents", limit=1)
+        assert [a["id"] for a in agents] == list(range(1, AGENTS + 1))
+        assert [g["group_id"] for g in agents[0]["groups"]] == [1, 2]
+
+    async def test_cursor_without_limit_uses_default_page_size(
+        self, client, db_session
+    ):
+        await _seed_data(db_session)
+        resp = await client.get(
+            "/api/admin/groups",
+            params={"cursor": encode_cursor(2)},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert resp.status_code == 200
+        assert [g["id"] for g in resp.json()["groups"]] == [3, 4, 5]
+
+    async def test_invalid_cursor_returns_400(self, client, db_session):
+        await _seed_data(db_session)
+        resp = await client.get(
+            "/api/groups/1/members",
+            params={"cursor": "!!"},
+            headers=_user_header(MEMBER),
+        )
+        assert resp.status_code == 400
+
+    @pytest.mark.parametrize("limit", [0, 100000])
+    async def test_limit_out_of_range_returns_422(self, client, db_session, limit):
+        resp = await client.get(
+            "/api/admin/groups",
+            params={"limit": limit},
+            headers=_user_header(SUPERADMIN),
+        )
+        assert resp.status_code == 422
+
+
+LARGE = 100_000
+PAGE = 1000
+
+
+class TestLargeListings:
+    """Walk 100k rows page by page; the heap used per page must not grow
+    with the depth of the page."""
+
+    PAGES = LARGE // PAGE
+    MEASURED = 5
+
+    async def _walk_measured(self, client, url, key, user) -> tuple[int, list[int]]:
+        """Return the number of items and the peak heap use of the first and
+        last MEASURED requests (tracing every page would be slow)."""
+        count = 0
+        peaks = []
+        params = {"limit": PAGE}
+        for index in range(self.PAGES):
+            measured = index < self.MEASURED or index >= self.PAGES - self.MEASURED
+            if measured:
+                tracemalloc.start()
+            try:
+                resp = await client.get(url, params=params, headers=_user_header(user))
+                if measured:
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            body = resp.json()
+            count += len(body[key])
+            params = {"limit": PAGE, "cursor": body["next_cursor"]}
+        assert body["next_cursor"] is None
+        return count, peaks
+
+    def _assert_constant(self, peaks: list[int]):
+        first, last = peaks[: self.MEASURED], peaks[self.MEASURED :]
+        # The last pages cost about what the first ones did
+        assert max(last) < max(first) * 1.5
+
+    async def test_admin_groups(self, client, db_session):
+        await db_session.execute(
+            insert(Group), [{"name": f"Group {i}"} for i in range(LARGE)]
+        )
+        await db_session.commit()
+
+        count, peaks = await self._walk_measured(
+            client, "/api/admin/groups", "groups", SUPERADMIN
+        )
+        assert count == LARGE
+        self._assert_constant(peaks)
+
+    async def test_group_members(self, client, db_session):
+        await db_session.execute(insert(Group), [{"name": "Large"}])
+        await db_session.execute(
+            insert(UserEntity),
+            [
+                {"entra_object_id": f"u{i}", "display_name": f"User {i}", "email": ""}
+                for i in range(LARGE)
+            ],
+        )
+        await db_session.execute(
+            insert(GroupMembership),
+            [
+                {"entra_object_id": f"u{i}", "group_id": 1, "role": GroupRole.USER}
+                for i in range(LARGE)
+            ],
+        )
+        await db_session.commit()
+
+        count, peaks = await self._walk_measured(
+            client, "/api/groups/1/members", "members", SUPERADMIN
+        )
+        assert count == LARGE
+        self._assert_constant(peaks)
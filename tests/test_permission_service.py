@@ -1,7 +1,9 @@
-import json
-from unittest.mock import AsyncMock
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.base.config.redis_cache import RedisCache
@@ -12,7 +14,39 @@ from src.domain.models.entities.group_agent import GroupAgent
 from src.domain.models.entities.group_membership import GroupMembership
 from src.domain.models.entities.user import User
 from src.domain.models.permission_schemas import PermissionAction
+from src.domain.services import permission_service
+from src.domain.services.cache_codec import CompactCacheCodec
 from src.domain.services.permission_service import PermissionService
+from src.domain.services.user_agent_access_service import UserAgentAccessService
+from tests.conftest import DictRedis
+
+CODEC = CompactCacheCodec()
+
+
+def _agent(agent_id: int) -> dict:
+    """A user agents list entry as AgentService.get_user_agents returns it."""
+    return {
+        "id": agent_id,
+        "agent_external_id": f"ext-{agent_id}",
+        "name": f"Agent {agent_id}",
+        "created_by": "user-001",
+        "created_at": "2024-01-01T00:00:00",
+        "groups": [{"group_id": 1, "group_name": "Group A"}],
+    }
+
+
+def _no_generations(keys: list[str]) -> list[None]:
+    """MGET side effect for a Redis where no counter or value is set yet."""
+    return [None] * len(keys)
+
+
+def _mock_pipeline(mock_redis: AsyncMock) -> MagicMock:
+    """Attach a pipeline mock whose queued commands can be inspected."""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    pipe.reset = AsyncMock()
+    mock_redis.pipeline = MagicMock(return_value=pipe)
+    return pipe
 
 
 async def _seed(session: AsyncSession):
@@ -57,6 +91,8 @@ async def _seed(session: AsyncSession):
         ]
     )
     await session.commit()
+    # Seeded directly, so the access table is built here rather than by services
+    await UserAgentAccessService().backfill(session)
     return {"ga": ga, "gb": gb, "gc": gc, "a1": a1, "a2": a2, "a3": a3}
 
 
@@ -141,9 +177,8 @@ class TestPermissionCaching:
     async def test_cache_hit_returns_cached_result(self, db_session):
         """When cache has a value, the DB should not be queried."""
         mock_redis = AsyncMock()
-        mock_redis.get = AsyncMock(
-            return_value=json.dumps({"allowed": True, "role": "admin"})
-        )
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
+        mock_redis.get = AsyncMock(return_value="a")
         cache = RedisCache(redis_client=mock_redis)
         service = PermissionService(cache=cache)
 
@@ -160,6 +195,7 @@ class TestPermissionCaching:
     async def test_cache_miss_queries_db_and_caches(self, db_session):
         """When cache misses, the result should be fetched from DB and cached."""
         mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
         mock_redis.get = AsyncMock(return_value=None)
         cache = RedisCache(redis_client=mock_redis)
         service = PermissionService(cache=cache)
@@ -170,6 +206,630 @@ class TestPermissionCaching:
         )
         assert allowed is True
         mock_redis.set.assert_called_once()
-        cached_value = json.loads(mock_redis.set.call_args[0][1])
-        assert cached_value["allowed"] is True
-        assert cached_value["role"] == "admin"
+        assert CODEC.decode_verdict(mock_redis.set.call_args[0][1]) == (True, "admin")
+
+    async def test_value_in_another_format_is_a_miss(self, db_session):
+        """A value written with another codec is recomputed, not misread."""
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
+        mock_redis.get = AsyncMock(return_value='{"allowed": false, "role": null}')
+        service = PermissionService(cache=RedisCache(redis_client=mock_redis))
+
+        data = await _seed(db_session)
+        allowed, role = await service.check_permission(
+            db_session, "user-001", data["a1"].id, PermissionAction.ACCESS
+        )
+        assert (allowed, role) == (True, "admin")
+        assert mock_redis.set.call_args[0][1] == "a"
+
+    async def test_unreadable_generations_skip_the_cache(self, db_session):
+        """Entries stored under generations that merely read as 0 during an
+        outage could be served again once Redis is back."""
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=ConnectionError)
+        pipe = _mock_pipeline(mock_redis)
+        service = PermissionService(cache=RedisCache(redis_client=mock_redis))
+
+        data = await _seed(db_session)
+        check = ("user-001", data["a1"].id, PermissionAction.ACCESS)
+        assert await service.check_permission(db_session, *check) == (True, "admin")
+        assert await service.check_permissions_batch(db_session, [check]) == [
+            (True, "admin")
+        ]
+        role = await service.get_group_role(db_session, "user-001", data["ga"].id)
+        assert role == GroupRole.ADMIN
+        load = AsyncMock(return_value=[_agent(1)])
+        assert await service.get_user_agents("user-001", load) == [_agent(1)]
+
+        mock_redis.get.assert_not_called()
+        mock_redis.set.assert_not_called()
+        pipe.set.assert_not_called()
+        pipe.eval.assert_not_called()
+        # Not kept in L1 either: invalidations cannot be published meanwhile
+        local_key = ("user-001", data["a1"].id, PermissionAction.ACCESS.value)
+        assert service._local_get(local_key) is None
+
+
+class TestGroupRole:
+    def _service(self, cached: str | None = None):
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
+        mock_redis.get = AsyncMock(return_value=cached)
+        return PermissionService(cache=RedisCache(redis_client=mock_redis)), mock_redis
+
+    async def test_roles_from_db(self, db_session, service):
+        data = await _seed(db_session)
+        assert (
+            await service.get_group_role(db_session, "user-001", data["ga"].id)
+            == GroupRole.ADMIN
+        )
+        assert (
+            await service.get_group_role(db_session, "user-001", data["gb"].id)
+            == GroupRole.USER
+        )
+        assert (
+            await service.get_group_role(db_session, "user-001", data["gc"].id) is None
+        )
+
+    async def test_cache_hit_skips_db(self):
+        service, mock_redis = self._service(cached="u")
+        assert await service.get_group_role(None, "user-001", 7) == GroupRole.USER
+        mock_redis.get.assert_called_once_with("perm:user-001:group:7:g0")
+
+    async def test_miss_cached_under_user_generation(self, db_session):
+        service, mock_redis = self._service()
+        data = await _seed(db_session)
+
+        assert (
+            await service.get_group_role(db_session, "user-002", data["ga"].id) is None
+        )
+        mock_redis.set.assert_called_once_with(
+            f"perm:user-002:group:{data['ga'].id}:g0", "-", ex=60
+        )
+
+    async def test_local_tier_dropped_on_user_invalidation(self, db_session):
+        service, mock_redis = self._service()
+        data = await _seed(db_session)
+        for _ in range(2):
+            await service.get_group_role(db_session, "user-001", data["ga"].id)
+        mock_redis.get.assert_called_once()
+
+        service._on_invalidation_message(f"agent:{data['ga'].id}")
+        await service.get_group_role(db_session, "user-001", data["ga"].id)
+        mock_redis.get.assert_called_once()
+
+        _mock_pipeline(mock_redis)
+        await service.invalidate_user_permissions("user-001")
+        await service.get_group_role(db_session, "user-001", data["ga"].id)
+        assert mock_redis.get.call_count == 2
+
+
+class TestCheckPermissionsBatch:
+    async def test_results_in_input_order(self, db_session, service):
+        data = await _seed(db_session)
+        checks = [
+            ("user-001", data["a3"].id, PermissionAction.ACCESS),
+            ("user-001", data["a1"].id, PermissionAction.ACCESS),
+            ("user-002", data["a3"].id, PermissionAction.CREATE),
+            ("user-001", data["a2"].id, PermissionAction.ACCESS),
+            ("user-001", 9999, PermissionAction.ACCESS),
+        ]
+        results = await service.check_permissions_batch(db_session, checks)
+        assert results == [
+            (False, None),
+            (True, "admin"),
+            (True, "admin"),
+            (True, "user"),
+            (False, None),
+        ]
+
+    async def test_matches_single_checks(self, db_session, service):
+        data = await _seed(db_session)
+        checks = [
+            (user_id, data[agent].id, action)
+            for user_id in ("user-001", "user-002")
+            for agent in ("a1", "a2", "a3")
+            for action in PermissionAction
+        ]
+        batch = await service.check_permissions_batch(db_session, checks)
+        single = [
+            await service.check_permission(db_session, *check) for check in checks
+        ]
+        assert batch == single
+
+    async def test_create_requires_admin(self, db_session, service):
+        data = await _seed(db_session)
+        results = await service.check_permissions_batch(
+            db_session, [("user-001", data["a2"].id, PermissionAction.CREATE)]
+        )
+        assert results == [(False, None)]
+
+    async def test_superadmin_short_circuit(self, db_session, service):
+        data = await _seed(db_session)
+        results = await service.check_permissions_batch(
+            db_session,
+            [
+                ("anyone", data["a1"].id, PermissionAction.ACCESS),
+                ("anyone", data["a3"].id, PermissionAction.CREATE),
+            ],
+            is_superadmin=True,
+        )
+        assert results == [(True, "superadmin"), (True, "superadmin")]
+
+    async def test_misses_resolved_with_single_query(self, db_engine, db_session):
+        data = await _seed(db_session)
+        mock_redis = AsyncMock()
+        hit = "u"
+        mock_redis.mget = AsyncMock(
+            side_effect=lambda keys: (
+                [None] * len(keys)
+                if keys[0].startswith("gen:")
+                else [hit] + [None] * (len(keys) - 1)
+            )
+        )
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        mock_redis.pipeline = MagicMock(return_value=pipe)
+        service = PermissionService(cache=RedisCache(redis_client=mock_redis))
+
+        statements = []
+        event.listen(
+            db_engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+        results = await service.check_permissions_batch(
+            db_session,
+            [
+                ("user-001", data["a2"].id, PermissionAction.ACCESS),
+                ("user-001", data["a1"].id, PermissionAction.ACCESS),
+                ("user-002", data["a3"].id, PermissionAction.ACCESS),
+                ("user-001", data["a1"].id, PermissionAction.ACCESS),
+            ],
+        )
+
+        assert results == [
+            (True, "user"),
+            (True, "admin"),
+            (True, "admin"),
+            (True, "admin"),
+        ]
+        # One MGET for generations, one for values; duplicates collapse
+        assert mock_redis.mget.call_count == 2
+        gen_keys, value_keys = (call[0][0] for call in mock_redis.mget.call_args_list)
+        assert sorted(gen_keys) == sorted(
+            [
+                "gen:user:user-001",
+                "gen:user:user-002",
+                f"gen:agent:{data['a1'].id}",
+                f"gen:agent:{data['a2'].id}",
+                f"gen:agent:{data['a3'].id}",
+            ]
+        )
+        assert len(value_keys) == 3
+        assert len(statements) == 1
+        # Both misses written back in one pipeline
+        assert pipe.set.call_count == 2
+        pipe.execute.assert_awaited_once()
+
+
+class TestLocalCacheTier:
+    def _service(self):
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
+        mock_redis.get = AsyncMock(return_value=None)
+        return PermissionService(cache=RedisCache(redis_client=mock_redis)), mock_redis
+
+    async def test_repeat_check_served_without_redis(self, db_session):
+        service, mock_redis = self._service()
+        data = await _seed(db_session)
+
+        first = await service.check_permission(
+            db_session, "user-001", data["a1"].id, PermissionAction.ACCESS
+        )
+        second = await service.check_permission(
+            db_session, "user-001", data["a1"].id, PermissionAction.ACCESS
+        )
+
+        assert first == second == (True, "admin")
+        mock_redis.get.assert_called_once()
+
+    async def test_disabled_without_redis(self, db_session, service):
+        data = await _seed(db_session)
+        await service.check_permission(
+            db_session, "user-001", data["a1"].id, PermissionAction.ACCESS
+        )
+        assert service._local is None
+
+    async def test_invalidate_user_drops_local_and_publishes(self, db_session):
+        service, mock_redis = self._service()
+        data = await _seed(db_session)
+        await service.check_permission(
+            db_session, "user-001", data["a1"].id, PermissionAction.ACCESS
+        )
+
+        pipe = _mock_pipeline(mock_redis)
+
+        await service.invalidate_user_permissions("user-001")
+
+        pipe.publish.assert_called_once_with("perm-invalidate", "user:user-001")
+        await service.check_permission(
+            db_session, "user-001", data["a1"].id, PermissionAction.ACCESS
+        )
+        assert mock_redis.get.call_count == 2
+
+    async def test_message_from_other_worker_drops_agent_entries(self, db_session):
+        service, mock_redis = self._service()
+        data = await _seed(db_session)
+        for user_id in ("user-001", "user-002"):
+            await service.check_permission(
+                db_session, user_id, data["a1"].id, PermissionAction.ACCESS
+            )
+        await service.check_permission(
+            db_session, "user-001", data["a2"].id, PermissionAction.ACCESS
+        )
+        assert len(service._local) == 3
+
+        service._on_invalidation_message(f"agent:{data['a1'].id}")
+
+        assert len(service._local) == 1
+
+
+class TestGenerationKeys:
+    def _service(self, gens: dict[str, str]):
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(
+            side_effect=lambda keys: [gens.get(key) for key in keys]
+        )
+        mock_redis.get = AsyncMock(return_value=None)
+        service = PermissionService(cache=RedisCache(redis_client=mock_redis))
+        service._local = None
+        return service, mock_redis
+
+    async def test_keys_embed_user_and_agent_generations(self, db_session):
+        data = await _seed(db_session)
+        agent_id = data["a1"].id
+        service, mock_redis = self._service(
+            {"gen:user:user-001": "3", f"gen:agent:{agent_id}": "7"}
+        )
+
+        await service.check_permission(
+            db_session, "user-001", agent_id, PermissionAction.ACCESS
+        )
+
+        key = f"perm:user-001:{agent_id}:access:g3.7"
+        mock_redis.get.assert_awaited_once_with(key)
+        assert mock_redis.set.call_args[0][0] == key
+
+    async def test_user_agents_key_embeds_generations(self):
+        service, mock_redis = self._service(
+            {
+                "gen:user:user-001": "2",
+                "gen:user_agents:user-001": "3",
+                "gen:user_agents": "5",
+            }
+        )
+        await service.get_user_agents("user-001", AsyncMock(return_value=[]))
+        mock_redis.get.assert_awaited_once_with("user_agents:user-001:g2.3.5")
+
+    async def test_invalidate_user_is_one_pipelined_incr(self):
+        service, mock_redis = self._service({})
+        pipe = _mock_pipeline(mock_redis)
+        await service.invalidate_user_permissions("user-001")
+        pipe.incr.assert_called_once_with("gen:user:user-001")
+        pipe.execute.assert_awaited_once()
+        mock_redis.scan.assert_not_called()
+        mock_redis.delete.assert_not_called()
+
+    async def test_superadmin_list_is_the_shared_catalog(self):
+        service, mock_redis = self._service({"gen:agent_catalog": "4"})
+        mock_redis.hgetall = AsyncMock(return_value={})
+        _mock_pipeline(mock_redis)
+        await service.get_user_agents(
+            "sa-001", AsyncMock(return_value=[]), is_superadmin=True
+        )
+        mock_redis.hgetall.assert_awaited_once_with("agent_catalog")
+        mock_redis.get.assert_not_called()
+
+
+class TestHashLayout:
+    @pytest.fixture(autouse=True)
+    def hash_layout(self, monkeypatch):
+        monkeypatch.setattr(permission_service, "PERMISSION_CACHE_LAYOUT", "hash")
+
+    def _service(self, store: dict[str, dict[str, str]]):
+        """PermissionService over a mock Redis holding one dict per hash."""
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
+        mock_redis.hget = AsyncMock(
+            side_effect=lambda key, field: store.get(key, {}).get(field)
+        )
+        mock_redis.hmget = AsyncMock(
+            side_effect=lambda key, fields: [store.get(key, {}).get(f) for f in fields]
+        )
+        pipe = _mock_pipeline(mock_redis)
+        service = PermissionService(cache=RedisCache(redis_client=mock_redis))
+        service._local = None
+        return service, mock_redis, pipe
+
+    async def test_verdict_read_from_user_hash(self, db_session):
+        data = await _seed(db_session)
+        agent_id = data["a1"].id
+        service, mock_redis, _ = self._service(
+            {"perm:user-001": {f"{agent_id}:access:g0.0": "u"}}
+        )
+
+        verdict = await service.check_permission(
+            db_session, "user-001", agent_id, PermissionAction.ACCESS
+        )
+
+        assert verdict == (True, "user")
+        mock_redis.get.assert_not_called()
+
+    async def test_miss_written_to_user_hash(self, db_session):
+        data = await _seed(db_session)
+        agent_id = data["a1"].id
+        service, mock_redis, _ = self._service({})
+
+        await service.check_permission(
+            db_session, "user-001", agent_id, PermissionAction.ACCESS
+        )
+
+        args = mock_redis.eval.await_args.args
+        assert args[1:] == (
+            1,
+            "perm:user-001",
+            permission_service.CACHE_TTL_SECONDS,
+            f"{agent_id}:access:g0.0",
+            "a",
+        )
+
+    async def test_batch_for_one_user_is_one_hmget(self, db_session):
+        data = await _seed(db_session)
+        service, mock_redis, pipe = self._service({})
+        checks = [
+            ("user-001", data[agent].id, action)
+            for agent in ("a1", "a2", "a3")
+            for action in PermissionAction
+        ]
+
+        results = await service.check_permissions_batch(db_session, checks)
+
+        assert results == [
+            await PermissionService(cache=RedisCache()).check_permission(
+                db_session, *check
+            )
+            for check in checks
+        ]
+        mock_redis.hmget.assert_awaited_once()
+        assert mock_redis.hmget.await_args.args[0] == "perm:user-001"
+        pipe.eval.assert_called_once()
+
+    async def test_batch_across_users_pipelines_hmgets(self, db_session):
+        data = await _seed(db_session)
+        service, mock_redis, pipe = self._service({})
+        pipe.execute = AsyncMock(return_value=[["a"], ["-"]])
+
+        results = await service.check_permissions_batch(
+            db_session,
+            [
+                ("user-001", data["a1"].id, PermissionAction.ACCESS),
+                ("user-002", data["a1"].id, PermissionAction.ACCESS),
+            ],
+        )
+
+        assert results == [(True, "admin"), (False, None)]
+        assert [call.args[0] for call in pipe.hmget.call_args_list] == [
+            "perm:user-001",
+            "perm:user-002",
+        ]
+        mock_redis.hmget.assert_not_called()
+
+    async def test_invalidate_user_deletes_hash(self):
+        service, _, pipe = self._service({})
+        await service.invalidate_user_permissions("user-001")
+        pipe.incr.assert_called_once_with("gen:user:user-001")
+        pipe.delete.assert_called_once_with("perm:user-001")
+        pipe.execute.assert_awaited_once()
+
+
+class TestAgentAssignmentInvalidation:
+    def _service(self):
+        mock_redis = AsyncMock()
+        pipe = _mock_pipeline(mock_redis)
+        return PermissionService(cache=RedisCache(redis_client=mock_redis)), pipe
+
+    async def test_only_members_of_changed_groups_invalidated(self, db_session):
+        data = await _seed(db_session)
+        service, pipe = self._service()
+
+        await service.invalidate_agent_assignment(
+            db_session, data["a1"].id, [data["gc"].id]
+        )
+
+        assert [call[0][0] for call in pipe.incr.call_args_list] == [
+            f"gen:agent:{data['a1'].id}",
+            "gen:user_agents:user-002",
+        ]
+        pipe.publish.assert_called_once_with(
+            "perm-invalidate", f"agent:{data['a1'].id}"
+        )
+        pipe.execute.assert_awaited_once()
+
+    async def test_fan_out_above_threshold_bumps_global_generation(
+        self, db_session, monkeypatch
+    ):
+        monkeypatch.setattr(
+            permission_service, "USER_AGENTS_INVALIDATION_MAX_FANOUT", 1
+        )
+        data = await _seed(db_session)
+        service, pipe = self._service()
+
+        await service.invalidate_agent_assignment(
+            db_session, data["a1"].id, [data["ga"].id, data["gc"].id]
+        )
+
+        incremented = [call[0][0] for call in pipe.incr.call_args_list]
+        assert "gen:user_agents" in incremented
+        assert not any(key.startswith("gen:user_agents:") for key in incremented)
+
+    async def test_no_query_without_redis(self, db_engine, db_session, service):
+        data = await _seed(db_session)
+        statements = []
+        event.listen(
+            db_engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        await service.invalidate_agent_assignment(
+            db_session, data["a1"].id, [data["ga"].id]
+        )
+        assert statements == []
+
+
+class TestMissCoalescing:
+    async def test_concurrent_misses_run_one_query(self, db_engine, db_session):
+        data = await _seed(db_session)
+        service = PermissionService(cache=RedisCache())
+        statements = []
+        event.listen(
+            db_engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+        results = await asyncio.gather(
+            *(
+                service.check_permission(
+                    db_session, "user-001", data["a1"].id, PermissionAction.ACCESS
+                )
+                for _ in range(20)
+            )
+        )
+
+        assert results == [(True, "admin")] * 20
+        assert len(statements) == 1
+
+    async def test_concurrent_user_agents_misses_load_once(self):
+        service = PermissionService(cache=RedisCache())
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return [_agent(1)]
+
+        results = await asyncio.gather(
+            *(service.get_user_agents("user-001", load) for _ in range(20))
+        )
+
+        assert results == [[_agent(1)]] * 20
+        assert calls == 1
+
+    async def test_lock_held_elsewhere_waits_for_value(self, monkeypatch):
+        monkeypatch.setattr(permission_service, "PERMISSION_MISS_LOCK_MS", 200)
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
+        # Miss, then the lock holder's value appears on the first poll
+        entry = CODEC.encode_user_agents(time.time() + 60, [_agent(1)])
+        mock_redis.get = AsyncMock(side_effect=[None, entry])
+        mock_redis.set = AsyncMock(return_value=None)  # SET NX loses
+        service = PermissionService(cache=RedisCache(redis_client=mock_redis))
+        load = AsyncMock()
+
+        assert await service.get_user_agents("user-001", load) == [_agent(1)]
+        load.assert_not_awaited()
+
+    async def test_lock_holder_computes_and_releases(self, monkeypatch):
+        monkeypatch.setattr(permission_service, "PERMISSION_MISS_LOCK_MS", 200)
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=_no_generations)
+        mock_redis.get = AsyncMock(return_value=None)
+        mock_redis.set = AsyncMock(return_value=True)
+        service = PermissionService(cache=RedisCache(redis_client=mock_redis))
+
+        await service.get_user_agents("user-001", AsyncMock(return_value=[]))
+
+        lock_call, value_call = mock_redis.set.await_args_list
+        assert lock_call.args[0] == "lock:user_agents:user-001:g0.0.0"
+        assert lock_call.kwargs == {"nx": True, "px": 200}
+        assert value_call.args[0] == "user_agents:user-001:g0.0.0"
+        assert CODEC.decode_user_agents(value_call.args[1])[1] == []
+        mock_redis.eval.assert_awaited_once()
+
+
+class TestUserAgentsStaleWhileRevalidate:
+    def _service(self, store: dict[str, str]):
+        """PermissionService over a dict-backed Redis."""
+        redis = DictRedis()
+        redis.data = store
+        return PermissionService(cache=RedisCache(redis_client=redis)), redis
+
+    @staticmethod
+    def _entry(agents: list[dict], soft_in: float) -> str:
+        return CODEC.encode_user_agents(time.time() + soft_in, agents)
+
+    async def test_fresh_entry_served_without_load(self):
+        store = {"user_agents:user-001:g0.0.0": self._entry([_agent(1)], 30)}
+        service, _ = self._service(store)
+        load = AsyncMock()
+
+        assert await service.get_user_agents("user-001", load) == [_agent(1)]
+        load.assert_not_awaited()
+
+    async def test_stale_entry_served_and_refreshed_in_background(self):
+        key = "user_agents:user-001:g0.0.0"
+        store = {key: self._entry([_agent(1)], -1)}
+        service, _ = self._service(store)
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return [_agent(2)]
+
+        # Every stale hit returns at once; only one refresh is started
+        for _ in range(5):
+            assert await service.get_user_agents("user-001", load) == [_agent(1)]
+        assert len(service._refreshes) == 1
+
+        release.set()
+        await asyncio.gather(*service._refreshes.values())
+        assert await service.get_user_agents("user-001", load) == [_agent(2)]
+
+    async def test_refresh_keeps_a_value_stored_meanwhile(self):
+        key = "user_agents:user-001:g0.0.0"
+        store = {key: self._entry([_agent(1)], -1)}
+        service, _ = self._service(store)
+        newer = self._entry([_agent(3)], 30)
+
+        async def load():
+            store[key] = newer  # e.g. another worker's refresh
+            return [_agent(2)]
+
+        await service.get_user_agents("user-001", load)
+        await asyncio.gather(*service._refreshes.values())
+        assert store[key] == newer
+
+    async def test_invalidation_bypasses_stale_entry(self):
+        store = {"user_agents:user-001:g0.0.0": self._entry([_agent(1)], -1)}
+        service, _ = self._service(store)
+        store["gen:user:user-001"] = "1"  # invalidate_user_permissions
+
+        load = AsyncMock(return_value=[])
+        assert await service.get_user_agents("user-001", load) == []
+        load.assert_awaited_once()
+        assert service._refreshes == {}
+
+    async def test_stop_cancels_background_refresh(self):
+        store = {"user_agents:user-001:g0.0.0": self._entry([_agent(1)], -1)}
+        service, _ = self._service(store)
+
+        async def load():
+            await asyncio.sleep(10)
+
+        await service.get_user_agents("user-001", load)
+        (refresh,) = service._refreshes.values()
+        await service.stop()
+        assert refresh.cancelled()
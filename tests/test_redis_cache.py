@@ -0,0 +1,203 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.base.config.redis_cache import RedisCache
+
+
+def _redis_with_pipeline():
+    mock_redis = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[1, True])
+    pipe.reset = AsyncMock()
+    mock_redis.pipeline = MagicMock(return_value=pipe)
+    return mock_redis, pipe
+
+
+class TestPipeline:
+    async def test_commands_sent_in_one_round_trip(self):
+        mock_redis, pipe = _redis_with_pipeline()
+        cache = RedisCache(mock_redis)
+
+        async with cache.pipeline() as batch:
+            batch.incr("gen:user:u1")
+            batch.set("k", "v", 60)
+
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
+        pipe.incr.assert_called_once_with("gen:user:u1")
+        pipe.set.assert_called_once_with("k", "v", ex=60)
+        pipe.execute.assert_awaited_once()
+        assert batch.results == [1, True]
+
+    async def test_transaction_flag_passed_through(self):
+        mock_redis, _ = _redis_with_pipeline()
+        async with RedisCache(mock_redis).pipeline(transaction=True) as batch:
+            batch.delete("k")
+        mock_redis.pipeline.assert_called_once_with(transaction=True)
+
+    async def test_empty_pipeline_skips_round_trip(self):
+        mock_redis, pipe = _redis_with_pipeline()
+        async with RedisCache(mock_redis).pipeline():
+            pass
+        pipe.execute.assert_not_awaited()
+
+    async def test_noop_without_redis(self):
+        async with RedisCache().pipeline() as batch:
+            batch.set("k", "v", 60)
+            batch.publish("channel", "message")
+        assert batch.queued == 0
+        assert batch.results == []
+
+    async def test_execute_errors_are_logged_not_raised(self, caplog):
+        mock_redis, pipe = _redis_with_pipeline()
+        pipe.execute.side_effect = ConnectionError("down")
+
+        async with RedisCache(mock_redis).pipeline() as batch:
+            batch.incr("k")
+
+        assert batch.results == []
+        assert "Redis pipeline failed" in caplog.text
+
+    async def test_error_in_block_discards_queued_commands(self):
+        mock_redis, pipe = _redis_with_pipeline()
+
+        with pytest.raises(RuntimeError):
+            async with RedisCache(mock_redis).pipeline() as batch:
+                batch.incr("k")
+                raise RuntimeError("boom")
+
+        pipe.execute.assert_not_awaited()
+        pipe.reset.assert_awaited_once()
+
+
+class TestCompareAndSet:
+    async def test_written_when_value_matches(self):
+        mock_redis = AsyncMock()
+        mock_redis.eval = AsyncMock(return_value=1)
+
+        assert await RedisCache(mock_redis).compare_and_set("k", "old", "new", 60)
+        args = mock_redis.eval.await_args.args
+        assert args[1:] == (1, "k", "0", "old", "new", 60)
+
+    async def test_expected_none_requires_missing_key(self):
+        mock_redis = AsyncMock()
+        mock_redis.eval = AsyncMock(return_value=0)
+
+        assert not await RedisCache(mock_redis).compare_and_set("k", None, "v", 60)
+        assert mock_redis.eval.await_args.args[3] == "1"
+
+    async def test_false_without_redis(self):
+        assert not await RedisCache().compare_and_set("k", None, "v", 60)
+
+    async def test_errors_are_logged_not_raised(self):
+        mock_redis = AsyncMock()
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("down"))
+        assert not await RedisCache(mock_redis).compare_and_set("k", "a", "b", 60)
+
+
+class TestSetIfAbsent:
+    async def test_set_nx_without_expiry(self):
+        mock_redis = AsyncMock()
+        mock_redis.set = AsyncMock(return_value=True)
+
+        assert await RedisCache(mock_redis).set_if_absent("k", "v")
+        mock_redis.set.assert_awaited_once_with("k", "v", nx=True)
+
+    async def test_false_when_key_exists(self):
+        mock_redis = AsyncMock()
+        mock_redis.set = AsyncMock(return_value=None)
+        assert not await RedisCache(mock_redis).set_if_absent("k", "v")
+
+    async def test_false_without_redis(self):
+        assert not await RedisCache().set_if_absent("k", "v")
+
+
+class TestMultiKey:
+    async def test_mget_without_redis_returns_misses(self):
+        assert await RedisCache().mget(["a", "b"]) == [None, None]
+
+    async def test_mget_counters_reads_unset_as_zero(self):
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(return_value=["3", None])
+        assert await RedisCache(mock_redis).mget_counters(["a", "b"]) == [3, 0]
+
+    async def test_mget_counters_is_none_on_error(self):
+        mock_redis = AsyncMock()
+        mock_redis.mget = AsyncMock(side_effect=ConnectionError)
+        assert await RedisCache(mock_redis).mget_counters(["a", "b"]) is None
+
+    async def test_mget_counters_without_redis_reads_zero(self):
+        assert await RedisCache().mget_counters(["a", "b"]) == [0, 0]
+
+    async def test_mset_with_ttl_pipelines_writes(self):
+        mock_redis, pipe = _redis_with_pipeline()
+        await RedisCache(mock_redis).mset_with_ttl({"a": "1", "b": "2"}, 30)
+        assert pipe.set.call_count == 2
+        pipe.execute.assert_awaited_once()
+
+
+class TestHash:
+    async def test_hset_with_ttl_is_one_script_call(self):
+        mock_redis = AsyncMock()
+        await RedisCache(mock_redis).hset_with_ttl(
+            "perm:u1", {"1:access": "a", "2:access": "-"}, 60
+        )
+        args = mock_redis.eval.await_args.args
+        assert args[1:] == (1, "perm:u1", 60, "1:access", "a", "2:access", "-")
+
+    async def test_pipelined_hset_with_ttl(self):
+        mock_redis, pipe = _redis_with_pipeline()
+        async with RedisCache(mock_redis).pipeline() as batch:
+            batch.hset_with_ttl("perm:u1", {"1:access": "a"}, 60)
+            batch.hset_with_ttl("perm:u2", {}, 60)
+        assert batch.queued == 1
+        assert pipe.eval.call_args.args[1:] == (1, "perm:u1", 60, "1:access", "a")
+
+    async def test_hmget_without_redis_returns_misses(self):
+        assert await RedisCache().hmget("perm:u1", ["a", "b"]) == [None, None]
+
+    async def test_hgetall_errors_read_as_empty(self):
+        mock_redis = AsyncMock()
+        mock_redis.hgetall = AsyncMock(side_effect=ConnectionError("down"))
+        assert await RedisCache(mock_redis).hgetall("h") == {}
+        assert await RedisCache().hgetall("h") == {}
+
+
+class TestHashPatch:
+    async def test_one_script_call_with_deletes_as_empty_values(self):
+        mock_redis = AsyncMock()
+        await RedisCache(mock_redis).hash_patch(
+            "catalog", 7, {"1": "row", "2": None}, "gen:catalog"
+        )
+        args = mock_redis.eval.await_args.args
+        assert args[1:] == (2, "catalog", "gen:catalog", 7, "1", "row", "2", "")
+
+    async def test_errors_are_logged_not_raised(self):
+        mock_redis = AsyncMock()
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("down"))
+        await RedisCache(mock_redis).hash_patch("catalog", 1, {"1": "row"}, "gen")
+
+
+class TestRenameIfUnchanged:
+    async def test_renamed_when_counter_matches(self):
+        mock_redis = AsyncMock()
+        mock_redis.eval = AsyncMock(return_value=1)
+
+        assert await RedisCache(mock_redis).rename_if_unchanged(
+            "staging", "catalog", 60, "gen:catalog", 3
+        )
+        args = mock_redis.eval.await_args.args
+        assert args[1:] == (3, "staging", "catalog", "gen:catalog", 3, 60)
+
+    async def test_false_on_mismatch_or_without_redis(self):
+        mock_redis = AsyncMock()
+        mock_redis.eval = AsyncMock(return_value=0)
+        cache = RedisCache(mock_redis)
+        assert not await cache.rename_if_unchanged("s", "k", 60, "gen", 3)
+        assert not await RedisCache().rename_if_unchanged("s", "k", 60, "gen", 3)
+
+    async def test_hmget_errors_are_logged_not_raised(self, caplog):
+        mock_redis = AsyncMock()
+        mock_redis.hmget = AsyncMock(side_effect=ConnectionError("down"))
+        assert await RedisCache(mock_redis).hmget("perm:u1", ["a"]) == [None]
+        assert "hash multi-read failed" in caplog.text
@@ -0,0 +1,128 @@
+"""The Lua scripts RedisCache sends with EVAL, run by a Redis engine.
+
+Other tests use conftest.DictRedis, which runs Python equivalents of these
+scripts; these run the scripts themselves on fakeredis' Lua interpreter.
+"""
+
+import fakeredis
+import pytest
+
+from src.base.config.redis_cache import RedisCache
+
+
+@pytest.fixture
+async def redis():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield redis
+    await redis.aclose()
+
+
+@pytest.fixture
+def cache(redis):
+    return RedisCache(redis_client=redis)
+
+
+class TestReleaseLock:
+    async def test_released_by_its_owner(self, cache, redis):
+        token = await cache.acquire_lock("lock:k", 1000)
+        await cache.release_lock("lock:k", token)
+        assert await redis.get("lock:k") is None
+
+    async def test_kept_when_taken_by_another_worker(self, cache, redis):
+        await redis.set("lock:k", "other")
+        await cache.release_lock("lock:k", "mine")
+        assert await redis.get("lock:k") == "other"
+
+
+class TestCompareAndSet:
+    async def test_replaces_the_expected_value(self, cache, redis):
+        await redis.set("k", "old")
+        assert await cache.compare_and_set("k", "old", "new", 60)
+        assert await redis.get("k") == "new"
+        assert 0 < await redis.ttl("k") <= 60
+
+    async def test_kept_when_value_changed(self, cache, redis):
+        await redis.set("k", "other")
+        assert not await cache.compare_and_set("k", "old", "new", 60)
+        assert await redis.get("k") == "other"
+
+    async def test_expected_none_only_creates(self, cache, redis):
+        assert await cache.compare_and_set("k", None, "v", 60)
+        assert not await cache.compare_and_set("k", None, "w", 60)
+        assert await redis.get("k") == "v"
+
+    async def test_missing_key_does_not_match_a_value(self, cache, redis):
+        assert not await cache.compare_and_set("k", "old", "new", 60)
+        assert not await redis.exists("k")
+
+
+class TestHsetWithTtl:
+    async def test_writes_fields_and_sets_expiry_once(self, cache, redis):
+        await cache.hset_with_ttl("h", {"a": "1", "b": "2"}, 60)
+        await redis.expire("h", 30)
+        async with cache.pipeline() as pipe:
+            pipe.hset_with_ttl("h", {"c": "3"}, 60)
+
+        assert await redis.hgetall("h") == {"a": "1", "b": "2", "c": "3"}
+        assert 0 < await redis.ttl("h") <= 30
+
+
+class TestHashPatch:
+    async def test_patches_fields_and_bumps_counter(self, cache, redis):
+        await redis.hset("h", mapping={"1": "old", "2": "gone"})
+
+        await cache.hash_patch("h", 3, {"1": "new", "2": None, "3": "added"}, "gen")
+
+        assert await redis.hgetall("h") == {
+            "1": "new",
+            "v:1": "3",
+            "v:2": "3",
+            "3": "added",
+            "v:3": "3",
+        }
+        assert await redis.get("gen") == "1"
+
+    async def test_older_version_is_ignored(self, cache, redis):
+        await redis.hset("h", mapping={"1": "newer", "v:1": "5"})
+
+        await cache.hash_patch("h", 4, {"1": "older"}, "gen")
+        await cache.hash_patch("h", 5, {"1": None}, "gen")
+
+        assert await redis.hget("h", "1") == "newer"
+        assert await redis.get("gen") == "2"
+
+    async def test_missing_hash_is_not_created(self, cache, redis):
+        await cache.hash_patch("h", 1, {"1": "row"}, "gen")
+        assert not await redis.exists("h")
+        assert await redis.get("gen") == "1"
+
+
+class TestRenameIfUnchanged:
+    async def test_renamed_when_counter_matches(self, cache, redis):
+        await redis.hset("staging", "1", "row")
+        await redis.hset("h", "stale", "row")
+        await redis.set("gen", "3")
+
+        assert await cache.rename_if_unchanged("staging", "h", 60, "gen", 3)
+
+        assert await redis.hgetall("h") == {"1": "row"}
+        assert not await redis.exists("staging")
+        assert 0 < await redis.ttl("h") <= 60
+
+    async def test_missing_counter_reads_as_zero(self, cache, redis):
+        await redis.hset("staging", "1", "row")
+        assert await cache.rename_if_unchanged("staging", "h", 60, "gen", 0)
+
+    async def test_staging_dropped_when_counter_moved(self, cache, redis):
+        await redis.hset("staging", "1", "row")
+        await redis.set("gen", "4")
+
+        assert not await cache.rename_if_unchanged("staging", "h", 60, "gen", 3)
+
+        assert not await redis.exists("staging")
+        assert not await redis.exists("h")
+
+    async def test_missing_source_leaves_key_alone(self, cache, redis):
+        await redis.hset("h", "1", "row")
+        assert not await cache.rename_if_unchanged("staging", "h", 60, "gen", 0)
+        assert await redis.hgetall("h") == {"1": "row"}
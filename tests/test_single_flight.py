@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from src.base.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_computation(self):
+        flights = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "value"
+
+        tasks = [asyncio.create_task(flights.do("k", compute)) for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == ["value"] * 10
+        assert calls == 1
+        assert flights.stats() == {"in_flight": 0, "leaders": 1, "shared": 9}
+
+    async def test_different_keys_run_independently(self):
+        flights = SingleFlight()
+
+        async def compute(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            flights.do("a", lambda: compute(1)), flights.do("b", lambda: compute(2))
+        )
+        assert results == [1, 2]
+        assert flights.leaders == 2
+
+    async def test_exception_propagates_to_waiters(self):
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0)
+            raise ValueError("user_not_found")
+
+        results = await asyncio.gather(
+            *(flights.do("k", compute) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(flights) == 0
+
+    async def test_waiter_takes_over_when_leader_cancelled(self):
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+            return "slow"
+
+        async def fast():
+            return "fast"
+
+        leader = asyncio.create_task(flights.do("k", slow))
+        await started.wait()
+        waiter = asyncio.create_task(flights.do("k", fast))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await waiter == "fast"
+
+    async def test_cancelled_waiter_does_not_cancel_leader(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "value"
+
+        leader = asyncio.create_task(flights.do("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("k", compute))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        assert await leader == "value"
@@ -0,0 +1,76 @@
+from src.base.auth.token_cache import VerifiedTokenCache
+from src.base.utils.expiring_lru_cache import ExpiringLRUCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(clock: FakeClock, max_size: int = 10, leeway: int = 30):
+    return VerifiedTokenCache(
+        leeway_seconds=leeway, cache=ExpiringLRUCache(max_size, clock=clock)
+    )
+
+
+class TestVerifiedTokenCache:
+    def test_miss_then_hit(self):
+        clock = FakeClock()
+        cache = _cache(clock)
+        claims = {"oid": "user-001", "exp": clock.now + 3600}
+
+        assert cache.get("token-a") is None
+        cache.put("token-a", claims)
+        assert cache.get("token-a") == claims
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_entry_expires_at_exp_minus_leeway(self):
+        clock = FakeClock()
+        cache = _cache(clock, leeway=30)
+        cache.put("token-a", {"exp": clock.now + 100})
+
+        clock.now += 69
+        assert cache.get("token-a") is not None
+        clock.now += 1
+        assert cache.get("token-a") is None
+
+    def test_token_inside_leeway_is_not_cached(self):
+        clock = FakeClock()
+        cache = _cache(clock, leeway=30)
+        cache.put("token-a", {"exp": clock.now + 10})
+        assert cache.get("token-a") is None
+        assert cache.stats()["size"] == 0
+
+    def test_token_without_exp_is_not_cached(self):
+        clock = FakeClock()
+        cache = _cache(clock)
+        cache.put("token-a", {"oid": "user-001"})
+        assert cache.get("token-a") is None
+
+    def test_lru_eviction(self):
+        clock = FakeClock()
+        cache = _cache(clock, max_size=2)
+        exp = clock.now + 3600
+        cache.put("token-a", {"exp": exp, "oid": "a"})
+        cache.put("token-b", {"exp": exp, "oid": "b"})
+
+        # Touch A so B becomes the least recently used entry
+        assert cache.get("token-a") is not None
+        cache.put("token-c", {"exp": exp, "oid": "c"})
+
+        assert cache.get("token-b") is None
+        assert cache.get("token-a") is not None
+        assert cache.get("token-c") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_different_tokens_do_not_collide(self):
+        clock = FakeClock()
+        cache = _cache(clock)
+        cache.put("token-a", {"exp": clock.now + 3600, "oid": "a"})
+        assert cache.get("token-b") is None
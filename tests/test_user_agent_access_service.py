@@ -0,0 +1,286 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.base.config.database import Base
+from src.base.config.redis_cache import RedisCache
+from src.domain.models.entities.agent import Agent
+from src.domain.models.entities.enums import GroupRole
+from src.domain.models.entities.group import Group
+from src.domain.models.entities.group_membership import GroupMembership
+from src.domain.models.entities.user import User
+from src.domain.models.entities.user_agent_access import UserAgentAccess
+from src.domain.models.permission_schemas import PermissionAction
+from src.domain.services import permission_service, user_agent_access_service
+from src.domain.services.admin_service import AdminService
+from src.domain.services.agent_service import AgentService
+from src.domain.services.membership_service import MembershipService
+from src.domain.services.permission_service import PermissionService
+from src.domain.services.user_agent_access_service import UserAgentAccessService
+
+
+async def _seed(session: AsyncSession):
+    """Two users, two groups, one agent in Group A; no memberships yet."""
+    session.add_all(
+        [
+            User(entra_object_id="user-001", display_name="Alice", email="a@test"),
+            User(entra_object_id="user-002", display_name="Bob", email="b@test"),
+        ]
+    )
+    ga, gb = Group(name="Group A"), Group(name="Group B")
+    session.add_all([ga, gb])
+    await session.commit()
+    agent = await AgentService().register_agent(
+        session, "ext-1", "Agent 1", ga.id, "user-001"
+    )
+    return {"ga": ga, "gb": gb, "agent": agent}
+
+
+async def _access(session: AsyncSession) -> dict[tuple[str, int], GroupRole]:
+    result = await session.execute(select(UserAgentAccess))
+    return {
+        (row.entra_object_id, row.agent_id): row.best_role for row in result.scalars()
+    }
+
+
+@pytest.fixture
+def access():
+    return UserAgentAccessService()
+
+
+class TestMaintainedByServices:
+    async def test_membership_changes(self, db_session, access):
+        data = await _seed(db_session)
+        service = MembershipService()
+        agent_id = data["agent"].id
+
+        await service.add_member(db_session, data["ga"].id, "user-001", GroupRole.USER)
+        assert await _access(db_session) == {("user-001", agent_id): GroupRole.USER}
+
+        await service.update_member_role(
+            db_session, data["ga"].id, "user-001", GroupRole.ADMIN
+        )
+        assert await _access(db_session) == {("user-001", agent_id): GroupRole.ADMIN}
+
+        await service.add_member(db_session, data["ga"].id, "user-002", GroupRole.USER)
+        await service.remove_member(db_session, data["ga"].id, "user-002")
+        assert await _access(db_session) == {("user-001", agent_id): GroupRole.ADMIN}
+        assert await access.diff(db_session) == []
+
+    async def test_best_role_across_groups(self, db_session, access):
+        data = await _seed(db_session)
+        agent_id = data["agent"].id
+        await AgentService().assign_agent_to_group(
+            db_session, data["gb"].id, agent_id, "user-001"
+        )
+        service = MembershipService()
+        await service.add_member(db_session, data["ga"].id, "user-001", GroupRole.USER)
+        await service.add_member(db_session, data["gb"].id, "user-001", GroupRole.ADMIN)
+        # A second admin so the first can be removed
+        await service.add_member(db_session, data["gb"].id, "user-002", GroupRole.ADMIN)
+
+        assert await _access(db_session) == {
+            ("user-001", agent_id): GroupRole.ADMIN,
+            ("user-002", agent_id): GroupRole.ADMIN,
+        }
+        await service.remove_member(db_session, data["gb"].id, "user-001")
+        assert (await _access(db_session))[("user-001", agent_id)] == GroupRole.USER
+        assert await access.diff(db_session) == []
+
+    async def test_assignment_changes(self, db_session, access):
+        data = await _seed(db_session)
+        await MembershipService().add_member(
+            db_session, data["gb"].id, "user-002", GroupRole.USER
+        )
+        service = AgentService()
+        agent_id = data["agent"].id
+
+        await service.assign_agent_to_group(
+            db_session, data["gb"].id, agent_id, "user-001"
+        )
+        assert ("user-002", agent_id) in await _access(db_session)
+
+        await service.remove_agent_from_group(db_session, data["gb"].id, agent_id)
+        assert await _access(db_session) == {}
+        assert await access.diff(db_session) == []
+
+    async def test_bulk_update(self, db_session, access):
+        data = await _seed(db_session)
+        await MembershipService().add_member(
+            db_session, data["gb"].id, "user-002", GroupRole.USER
+        )
+        agent_id = data["agent"].id
+
+        await AdminService().bulk_update_agent_groups(
+            db_session, agent_id, [data["gb"].id], "sa"
+        )
+        assert await _access(db_session) == {("user-002", agent_id): GroupRole.USER}
+        assert await access.diff(db_session) == []
+
+    async def test_duplicate_membership_leaves_table_unchanged(self, db_session):
+        data = await _seed(db_session)
+        group_id, agent_id = data["ga"].id, data["agent"].id
+        service = MembershipService()
+        await service.add_member(db_session, group_id, "user-001", GroupRole.USER)
+
+        with pytest.raises(ValueError, match="duplicate_membership"):
+            await service.add_member(db_session, group_id, "user-001", GroupRole.ADMIN)
+        assert await _access(db_session) == {("user-001", agent_id): GroupRole.USER}
+
+
+class TestConcurrentChanges:
+    @pytest.fixture
+    async def session_factory(self, tmp_path):
+        # A file so that each session gets its own connection and transaction
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield async_sessionmaker(engine, expire_on_commit=False)
+        await engine.dispose()
+
+    async def test_membership_and_assignment_on_one_group(
+        self, session_factory, access
+    ):
+        async with session_factory() as session:
+            data = await _seed(session)
+        group_id, agent_id = data["gb"].id, data["agent"].id
+
+        async def add_member():
+            async with session_factory() as session:
+                await MembershipService().add_member(
+                    session, group_id, "user-002", GroupRole.USER
+                )
+
+        async def assign_agent():
+            async with session_factory() as session:
+                await AgentService().assign_agent_to_group(
+                    session, group_id, agent_id, "user-001"
+                )
+
+        await asyncio.gather(add_member(), assign_agent())
+
+        async with session_factory() as session:
+            assert await _access(session) == {("user-002", agent_id): GroupRole.USER}
+            assert await access.diff(session) == []
+
+
+class TestLocking:
+    @pytest.fixture
+    def locks(self, monkeypatch):
+        locks = []
+
+        async def lock(session, space, keys):
+            locks.append((space, set(keys)))
+
+        monkeypatch.setattr(
+            UserAgentAccessService, "_serializes", staticmethod(lambda session: True)
+        )
+        monkeypatch.setattr(UserAgentAccessService, "_lock", staticmethod(lock))
+        return locks
+
+    async def test_membership_change_locks_user_then_its_groups(
+        self, db_session, locks
+    ):
+        data = await _seed(db_session)
+        service = MembershipService()
+        await service.add_member(db_session, data["ga"].id, "user-001", GroupRole.USER)
+        await service.add_member(db_session, data["gb"].id, "user-001", GroupRole.USER)
+        locks.clear()
+
+        await service.remove_member(db_session, data["ga"].id, "user-001")
+
+        assert locks == [
+            (
+                user_agent_access_service._LOCK_USERS,
+                {user_agent_access_service._user_key("user-001")},
+            ),
+            # Group A is no longer among the user's groups, but was touched
+            (user_agent_access_service._LOCK_GROUPS, {data["ga"].id, data["gb"].id}),
+        ]
+
+    async def test_assignment_change_locks_agent_then_its_groups(
+        self, db_session, locks
+    ):
+        data = await _seed(db_session)
+        agent_id = data["agent"].id
+        locks.clear()
+
+        await AdminService().bulk_update_agent_groups(
+            db_session, agent_id, [data["gb"].id], "sa"
+        )
+
+        assert locks == [
+            (user_agent_access_service._LOCK_AGENTS, {agent_id}),
+            (user_agent_access_service._LOCK_GROUPS, {data["ga"].id, data["gb"].id}),
+        ]
+
+
+class TestBackfillAndDiff:
+    async def test_diff_reports_direct_writes_until_backfill(self, db_session, access):
+        data = await _seed(db_session)
+        db_session.add(
+            GroupMembership(
+                entra_object_id="user-002", group_id=data["ga"].id, role=GroupRole.ADMIN
+            )
+        )
+        await db_session.commit()
+
+        assert await access.diff(db_session) == [
+            f"user user-002 agent {data['agent'].id}: table=None live=ADMIN"
+        ]
+        assert await access.backfill(db_session) == 1
+        assert await access.diff(db_session) == []
+
+    async def test_diff_reports_stale_rows(self, db_session, access):
+        await _seed(db_session)
+        agent = Agent(agent_external_id="ext-2", name="Agent 2", created_by="x")
+        db_session.add(agent)
+        await db_session.flush()
+        db_session.add(
+            UserAgentAccess(
+                entra_object_id="user-001", agent_id=agent.id, best_role=GroupRole.USER
+            )
+        )
+        await db_session.commit()
+
+        assert await access.diff(db_session) == [
+            f"user user-001 agent {agent.id}: table=USER live=None"
+        ]
+
+    async def test_diff_reports_wrong_role(self, db_session, access):
+        data = await _seed(db_session)
+        await MembershipService().add_member(
+            db_session, data["ga"].id, "user-001", GroupRole.ADMIN
+        )
+        row = await db_session.get(UserAgentAccess, ("user-001", data["agent"].id))
+        row.best_role = GroupRole.USER
+        await db_session.commit()
+
+        assert await access.diff(db_session) == [
+            f"user user-001 agent {data['agent'].id}: table=USER live=ADMIN"
+        ]
+
+
+class TestPermissionReads:
+    @pytest.mark.parametrize("use_table", [True, False])
+    async def test_checks_agree_with_join(self, db_session, monkeypatch, use_table):
+        monkeypatch.setattr(permission_service, "PERMISSION_ACCESS_TABLE", use_table)
+        data = await _seed(db_session)
+        await MembershipService().add_member(
+            db_session, data["ga"].id, "user-001", GroupRole.USER
+        )
+        service = PermissionService(cache=RedisCache())
+        agent_id = data["agent"].id
+
+        assert await service.check_permission(
+            db_session, "user-001", agent_id, PermissionAction.ACCESS
+        ) == (True, "user")
+        assert await service.check_permissions_batch(
+            db_session,
+            [
+                ("user-001", agent_id, PermissionAction.CREATE),
+                ("user-002", agent_id, PermissionAction.ACCESS),
+            ],
+        ) == [(False, None), (False, None)]
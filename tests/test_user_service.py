@@ -0,0 +1,117 @@
+import datetime
+
+import pytest
+from sqlalchemy import event, select, update
+
+from src.base.utils.expiring_lru_cache import ExpiringLRUCache
+from src.domain.models.entities.user import User
+from src.domain.services import user_service
+from src.domain.services.user_service import UserService
+
+OLD = datetime.datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def statements(db_engine):
+    """SQL statements sent to the database while the test runs."""
+    sent: list[str] = []
+
+    def record(conn, cursor, statement, *args):
+        sent.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+
+async def _user(session, entra_object_id: str = "user-001") -> User:
+    session.expire_all()
+    result = await session.execute(
+        select(User).where(User.entra_object_id == entra_object_id)
+    )
+    return result.scalar_one()
+
+
+async def _age(session, entra_object_id: str = "user-001") -> None:
+    await session.execute(
+        update(User)
+        .where(User.entra_object_id == entra_object_id)
+        .values(updated_at=OLD)
+    )
+    await session.commit()
+
+
+@pytest.fixture(params=["on_conflict", "select_first"])
+def service(request, monkeypatch):
+    if request.param == "select_first":
+        monkeypatch.setattr(user_service, "_UPSERT_INSERTS", {})
+    return UserService()
+
+
+class TestUpsertUser:
+    async def test_inserts_new_user(self, db_session, service):
+        await service.upsert_user(db_session, "user-001", "Alice", "a@test")
+
+        user = await _user(db_session)
+        assert (user.display_name, user.email) == ("Alice", "a@test")
+
+    async def test_updates_changed_claims(self, db_session, service):
+        await service.upsert_user(db_session, "user-001", "Alice", "a@test")
+        await service.upsert_user(db_session, "user-001", "Alice B", "ab@test")
+
+        user = await _user(db_session)
+        assert (user.display_name, user.email) == ("Alice B", "ab@test")
+
+    async def test_unchanged_claims_leave_row_untouched(self, db_session):
+        service = UserService()
+        await service.upsert_user(db_session, "user-001", "Alice", "a@test")
+        await _age(db_session)
+
+        await service.upsert_user(db_session, "user-001", "Alice", "a@test")
+        assert (await _user(db_session)).updated_at == OLD
+
+        await service.upsert_user(db_session, "user-001", "Alice", "new@test")
+        assert (await _user(db_session)).updated_at != OLD
+
+
+class TestSyncUser:
+    async def test_unchanged_claims_skip_database(self, db_session, statements):
+        service = UserService()
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+        statements.clear()
+
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+        assert statements == []
+
+    async def test_changed_claims_are_written(self, db_session):
+        service = UserService()
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+        await service.sync_user(db_session, "user-001", "Alice", "new@test")
+
+        assert (await _user(db_session)).email == "new@test"
+
+    async def test_record_holds_the_claims_not_a_hash(self, db_session):
+        # A hash collision between two claim sets would skip a real change
+        synced = ExpiringLRUCache(10)
+        service = UserService(synced=synced)
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+        assert synced.get("user-001") == ("Alice", "a@test")
+
+    async def test_record_expires(self, db_session, statements):
+        now = [1000.0]
+        service = UserService(synced=ExpiringLRUCache(10, clock=lambda: now[0]))
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+
+        now[0] += user_service.USER_SYNC_TTL_SECONDS
+        statements.clear()
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+        assert statements != []
+
+    async def test_record_disabled(self, db_session, statements, monkeypatch):
+        monkeypatch.setattr(user_service, "USER_SYNC_MAX_SIZE", 0)
+        service = UserService()
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+
+        statements.clear()
+        await service.sync_user(db_session, "user-001", "Alice", "a@test")
+        assert statements != []
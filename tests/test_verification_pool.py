@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.base.auth.verification_pool import VerificationPool
+
+
+@pytest.fixture
+def pool():
+    p = VerificationPool(max_workers=2)
+    yield p
+    p.shutdown()
+
+
+class TestVerificationPool:
+    async def test_runs_off_the_event_loop_thread(self, pool):
+        thread_name = await pool.run(lambda: threading.current_thread().name)
+        assert thread_name.startswith("jwt-verify")
+
+    async def test_propagates_exceptions(self, pool):
+        def boom():
+            raise ValueError("bad token")
+
+        with pytest.raises(ValueError, match="bad token"):
+            await pool.run(boom)
+        assert pool.stats()["in_flight"] == 0
+
+    async def test_concurrency_is_capped_and_queue_depth_recorded(self, pool):
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        await asyncio.gather(*(pool.run(work) for _ in range(8)))
+
+        stats = pool.stats()
+        assert peak <= 2
+        assert stats["completed"] == 8
+        assert stats["max_waiting"] >= 6
+        assert stats["waiting"] == 0
+        assert stats["in_flight"] == 0
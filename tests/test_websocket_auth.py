@@ -0,0 +1,52 @@
+import os
+
+os.environ.setdefault("AZURE_TENANT_ID", "test-tenant")
+os.environ.setdefault("AZURE_CLIENT_ID", "test-client")
+
+from types import SimpleNamespace  # noqa: E402
+from unittest.mock import AsyncMock  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi import WebSocketException  # noqa: E402
+from jose import ExpiredSignatureError  # noqa: E402
+
+from src.base.auth import websocket_auth  # noqa: E402
+from src.base.auth.token_cache import token_cache  # noqa: E402
+
+CLAIMS = {"oid": "user-001", "exp": 4_102_444_800}
+
+
+def _websocket(token: str | None = None):
+    return SimpleNamespace(query_params={"token": token} if token else {})
+
+
+@pytest.fixture(autouse=True)
+def validate(monkeypatch):
+    token_cache.clear()
+    validate = AsyncMock(return_value=CLAIMS)
+    monkeypatch.setattr(websocket_auth, "validate_jwt_token_async", validate)
+    yield validate
+    token_cache.clear()
+
+
+class TestAuthenticateWebsocket:
+    async def test_validates_with_kid_refetch_and_caches_claims(self, validate):
+        for _ in range(2):
+            claims = await websocket_auth.authenticate_websocket(_websocket("t"))
+            assert claims == CLAIMS
+        validate.assert_awaited_once_with("t")
+
+    async def test_shares_the_http_token_cache(self, validate):
+        token_cache.put("t", CLAIMS)
+        assert await websocket_auth.authenticate_websocket(_websocket("t")) == CLAIMS
+        validate.assert_not_awaited()
+
+    async def test_expired_token_is_rejected(self, validate):
+        validate.side_effect = ExpiredSignatureError("expired")
+        with pytest.raises(WebSocketException, match="Token has expired"):
+            await websocket_auth.authenticate_websocket(_websocket("t"))
+
+    async def test_missing_token_is_rejected(self, validate):
+        with pytest.raises(WebSocketException, match="Missing token"):
+            await websocket_auth.authenticate_websocket(_websocket())
+        validate.assert_not_awaited()